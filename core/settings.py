@@ -51,6 +51,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "home",
 ]
 
@@ -130,6 +131,13 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Uploaded files (resumes queued for scanning)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+RESUME_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+SKILL_INDEX_DIR = os.path.join(BASE_DIR, 'skill_index')
+JOB_VECTORS_DIR = os.path.join(BASE_DIR, 'job_vectors')
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 LOGIN_REDIRECT_URL = '/'
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from django.contrib import admin
-from .models import Resume
+from .models import Resume, ScanJob, ScrapeWatermark
 
 
 @admin.register(Resume)
@@ -10,11 +10,12 @@ class ResumeAdmin(admin.ModelAdmin):
                     'years_of_experience', 'total_skills_count', 'scanned_at']
     list_filter = ['scanned_at', 'has_quantifiable_achievements', 'degrees']
     search_fields = ['candidate_name', 'email', 'phone', 'file_name']
-    readonly_fields = ['uploaded_at', 'scanned_at', 'full_scan_data']
+    readonly_fields = ['uploaded_at', 'scanned_at', 'content_hash', 'scanner_version', 'full_scan_data']
 
     fieldsets = (
         ('File Information', {
-            'fields': ('file_name', 'file_path', 'uploaded_at', 'scanned_at')
+            'fields': ('file_name', 'file_path', 'content_hash', 'scanner_version',
+                       'uploaded_at', 'scanned_at')
         }),
         ('ATS Score', {
             'fields': ('ats_score',)
@@ -49,3 +50,18 @@ class ResumeAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(ScanJob)
+class ScanJobAdmin(admin.ModelAdmin):
+    list_display = ['original_name', 'uploaded_by', 'status', 'attempts', 'resume', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['original_name']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
+@admin.register(ScrapeWatermark)
+class ScrapeWatermarkAdmin(admin.ModelAdmin):
+    list_display = ['site', 'search_term', 'location', 'last_scraped_at', 'last_fetched']
+    list_filter = ['site']
+    search_fields = ['search_term', 'location']
@@ -0,0 +1,150 @@
+"""
+Near-duplicate detection for jobs scraped from several sites.
+
+The same posting scraped from indeed, linkedin, zip_recruiter and google has
+four different URLs, so ``job_url`` never matches. Instead every job gets a
+MinHash signature over word shingles of its title, company and description,
+and the signature is cut into LSH bands stored in ``JobLSHBucket``. Only jobs
+that share at least one band are compared, and a pair counts as a duplicate
+when the share of equal signature values (an estimate of the Jaccard
+similarity of their shingle sets) reaches ``DUPLICATE_THRESHOLD``.
+
+Each duplicate group is keyed by ``Jobs.canonical_id``: the id of the first
+job of the group, which points at itself. Views and analytics collapse on
+that column. The index grows one batch at a time with ``dedupe_batch``.
+"""
+import hashlib
+import re
+import zlib
+
+import numpy as np
+from django.db import transaction
+
+from home.models import JobLSHBucket, Jobs
+
+NUM_PERMUTATIONS = 128
+BANDS = 16  # of NUM_PERMUTATIONS // BANDS rows: pairs above ~0.7 similarity almost always share a band
+SHINGLE_WORDS = 3
+# Postings with less text than this (e.g. a bare title) are too generic to call duplicates
+MIN_SHINGLES = 20
+DUPLICATE_THRESHOLD = 0.8
+
+_WORD = re.compile(r'\w+')
+
+# Multiply-shift hash family: h(x) = (a*x + b) mod 2**64 >> 32, with fixed seeds
+# so signatures computed by different processes and runs are comparable
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 2 ** 63, NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2 ** 63, NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)
+
+
+def shingles(title, company, description):
+    """crc32 hashes of the overlapping ``SHINGLE_WORDS``-word runs of the posting."""
+    words = _WORD.findall(' '.join(part for part in (title, company, description) if part).lower())
+    if len(words) < SHINGLE_WORDS:
+        runs = [' '.join(words)] if words else []
+    else:
+        runs = {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.fromiter((zlib.crc32(run.encode()) for run in runs), dtype=np.uint64, count=len(runs))
+
+
+def minhash(hashes):
+    """The MinHash signature of a set of shingle hashes, or None if it is too small to compare."""
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature):
+    """One bucket key per LSH band; the band number is part of the key."""
+    rows = NUM_PERMUTATIONS // BANDS
+    return [
+        int.from_bytes(hashlib.blake2b(bytes([band]) + signature[band * rows:(band + 1) * rows].tobytes(),
+                                       digest_size=8).digest(), 'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(signature, other):
+    return float(np.count_nonzero(signature == other)) / NUM_PERMUTATIONS
+
+
+class JobDeduplicator:
+    """Assigns ``canonical_id`` to jobs, a chunk at a time, against every job indexed so far.
+
+    A job joins the group of its most similar indexed job, or starts a group
+    of its own. A job that changed since it was indexed gets a new signature
+    and buckets, but a job that is already a group's canonical one stays
+    canonical, so ids that views and analytics group by do not move.
+    """
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.processed = 0
+        self.duplicates = 0
+
+    def run(self, queryset):
+        rows = queryset.order_by('id').values_list('id', 'title', 'company', 'description')
+        last_id = None
+        while True:
+            chunk = rows if last_id is None else rows.filter(id__gt=last_id)
+            chunk = list(chunk[:self.chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            self.dedupe_chunk(chunk)
+        return self
+
+    def dedupe_chunk(self, chunk):
+        signatures = {job_id: minhash(shingles(title, company, description))
+                      for job_id, title, company, description in chunk}
+        keys = {job_id: band_keys(signature) for job_id, signature in signatures.items() if signature is not None}
+        ids = [job_id for job_id, *_ in chunk]
+        canonical = {job_id for job_id, canonical_id in
+                     Jobs.objects.filter(id__in=ids).values_list('id', 'canonical_id') if canonical_id == job_id}
+
+        # Jobs of this chunk already in the index (changed postings) are matched afresh
+        bucketed = {}
+        for key, job_id in (JobLSHBucket.objects.filter(key__in={key for job_keys in keys.values() for key in job_keys})
+                            .exclude(job_id__in=ids).values_list('key', 'job_id')):
+            bucketed.setdefault(key, set()).add(job_id)
+        known = {}
+        candidates = set().union(*bucketed.values()) if bucketed else set()
+        for job_id, signature, canonical_id in (Jobs.objects.filter(id__in=candidates).exclude(minhash=None)
+                                                .values_list('id', 'minhash', 'canonical_id')):
+            known[job_id] = (np.frombuffer(bytes(signature), dtype=np.uint32), canonical_id or job_id)
+
+        updates, buckets = [], []
+        for job_id in ids:
+            signature = signatures[job_id]
+            canonical_id = job_id
+            if signature is not None and job_id not in canonical:
+                # Candidates come from the index and from earlier jobs of this chunk
+                best = DUPLICATE_THRESHOLD
+                for candidate in set().union(*(bucketed.get(key, ()) for key in keys[job_id])):
+                    if candidate not in known:
+                        continue
+                    other, other_canonical = known[candidate]
+                    score = similarity(signature, other)
+                    if score >= best:
+                        best, canonical_id = score, other_canonical
+            if signature is not None:
+                known[job_id] = (signature, canonical_id)
+                for key in keys[job_id]:
+                    bucketed.setdefault(key, set()).add(job_id)
+                    buckets.append(JobLSHBucket(key=key, job_id=job_id))
+            self.duplicates += canonical_id != job_id
+            updates.append(Jobs(id=job_id, canonical_id=canonical_id,
+                                minhash=signature.tobytes() if signature is not None else None))
+
+        with transaction.atomic():
+            JobLSHBucket.objects.filter(job_id__in=ids).delete()
+            JobLSHBucket.objects.bulk_create(buckets, batch_size=5000)
+            Jobs.objects.bulk_update(updates, ['canonical_id', 'minhash'], batch_size=1000)
+        self.processed += len(chunk)
+
+
+def dedupe_batch(batch_id, chunk_size=1000):
+    """Group the jobs a scrape batch created or changed with the jobs already indexed."""
+    return JobDeduplicator(chunk_size).run(Jobs.objects.filter(batch_id=batch_id))
@@ -0,0 +1,83 @@
+"""
+Normalized job skills: one ``JobSkill`` row per technical skill a job mentions.
+
+Skills are found with the ATS scanner's compiled single-pass ``SkillMatcher``
+(see ``skill_extractor``), so jobs and resumes use the same skill names. A
+skill listed under several taxonomy categories (e.g. kotlin) is filed under
+the first one. ``Jobs.skill_count`` records that a job has been extracted,
+including jobs that mention no skills at all.
+"""
+from functools import lru_cache
+
+from django.db import transaction
+
+from home.models import Jobs, JobSkill
+
+
+@lru_cache(maxsize=None)
+def skill_extractor():
+    """Return ``text -> set of skills`` using the same taxonomy as resume scans."""
+    from home.management.commands.ats_resume_scan import IndustryATSScanner
+
+    matcher = IndustryATSScanner().skill_matcher
+
+    def extract(text):
+        return {skill for kind, skill in matcher.find(text.lower()) if kind == 'technical'}
+
+    return extract
+
+
+def job_text(title, skills, description):
+    return '\n'.join(part for part in (title, skills, description) if part)
+
+
+@lru_cache(maxsize=None)
+def skill_categories():
+    """``{skill: category}`` for every technical skill in the scanner taxonomy."""
+    from home.management.commands.ats_resume_scan import IndustryATSScanner
+
+    categories = {}
+    for category, skills in IndustryATSScanner().technical_skills.items():
+        for skill in skills:
+            categories.setdefault(skill, category)
+    return categories
+
+
+def populate_job_skills(queryset, chunk_size=1000, on_progress=None):
+    """Replace the ``JobSkill`` rows of every job in ``queryset`` and set its ``skill_count``.
+
+    Returns ``(jobs, rows)``.
+    """
+    extract = skill_extractor()
+    categories = skill_categories()
+    jobs = rows = 0
+
+    last_id = None
+    queryset = queryset.order_by('id').values_list('id', 'title', 'skills', 'description')
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+
+        job_skills, counted = [], []
+        for job_id, title, skills, description in chunk:
+            found = sorted(extract(job_text(title, skills, description)))
+            job_skills.extend(JobSkill(job_id=job_id, skill=skill, category=categories[skill]) for skill in found)
+            counted.append(Jobs(id=job_id, skill_count=len(found)))
+        with transaction.atomic():
+            JobSkill.objects.filter(job_id__in=[row[0] for row in chunk]).delete()
+            JobSkill.objects.bulk_create(job_skills, batch_size=5000)
+            Jobs.objects.bulk_update(counted, ['skill_count'], batch_size=chunk_size)
+
+        jobs += len(chunk)
+        rows += len(job_skills)
+        if on_progress:
+            on_progress(jobs, rows)
+    return jobs, rows
+
+
+def populate_batch(batch_id):
+    """Skills of the jobs a scrape batch created or changed."""
+    return populate_job_skills(Jobs.objects.filter(batch_id=batch_id))
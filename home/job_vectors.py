@@ -0,0 +1,295 @@
+"""
+TF-IDF vectors of job descriptions, for ranking jobs by similarity to a resume.
+
+Jobs are vectorized with the hashing trick (tokens are hashed into a fixed
+number of feature columns), so there is no vocabulary to keep in sync and a
+new batch can be vectorized on its own. Each segment is a SciPy CSR matrix
+saved as plain ``.npy`` arrays:
+
+    <JOB_VECTORS_DIR>/<segment>/data.npy, indices.npy, indptr.npy
+                               /job_ids.npy, batches.npy
+                               /df_features.npy, df_counts.npy
+
+Readers open the arrays with ``mmap_mode='r'``, so every gunicorn worker
+maps the same files and shares their pages through the OS page cache
+instead of holding its own copy of the matrix.
+
+``manage.py build_job_vectors`` writes a base segment for the whole table,
+or appends a segment per new ``batch_id``. Rows are weighted with the IDF of
+the corpus as it was when their segment was written; when a job appears in
+more than one segment the newest copy wins. Rebuild now and then to
+re-weight everything against the current corpus.
+"""
+import math
+import os
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+from home.models import Jobs
+
+N_FEATURES = 2 ** 20
+BASE_SEGMENT = 'base'
+ARRAYS = ('data', 'indices', 'indptr', 'job_ids', 'batches', 'df_features', 'df_counts')
+
+STOP_WORDS = frozenset((
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'from', 'as', 'is', 'was', 'are', 'be', 'been', 'will', 'you', 'your', 'our',
+    'we', 'this', 'that', 'who', 'have', 'has', 'can', 'all', 'not', 'their', 'they',
+    'its', 'into', 'more', 'about', 'any', 'other', 'such', 'also', 'may', 'etc',
+))
+
+
+def vectors_directory():
+    return getattr(settings, 'JOB_VECTORS_DIR', os.path.join(settings.BASE_DIR, 'job_vectors'))
+
+
+class HashingTokenizer:
+    """Text -> ``{feature: sublinear term frequency}`` over hashed features."""
+
+    def __init__(self, n_features=N_FEATURES):
+        from home.management.commands.ats_resume_scan import PATTERNS
+
+        self.n_features = n_features
+        self.pattern = PATTERNS['keyword']
+        self._features = {}
+
+    def feature(self, token):
+        feature = self._features.get(token)
+        if feature is None:
+            # crc32 rather than hash(): the mapping must be the same in every process
+            feature = self._features[token] = zlib.crc32(token.encode()) % self.n_features
+        return feature
+
+    def __call__(self, text):
+        return self.frequencies(self.pattern.findall(text.lower()))
+
+    def frequencies(self, tokens):
+        """Like calling the tokenizer, for text already split by ``PATTERNS['keyword']`` after lowercasing."""
+        counts = Counter(self.feature(token) for token in tokens if token not in STOP_WORDS)
+        return {feature: 1.0 + math.log(count) for feature, count in counts.items()}
+
+
+def encode_terms(frequencies):
+    """Pack ``{feature: term frequency}`` into bytes: int32 features, then float32 frequencies."""
+    features = np.array(sorted(frequencies), dtype='<i4')
+    weights = np.array([frequencies[feature] for feature in features.tolist()], dtype='<f4')
+    return features.tobytes() + weights.tobytes()
+
+
+def decode_terms(data):
+    values = np.frombuffer(bytes(data), dtype='<i4')
+    if len(values) % 2:
+        raise ValueError('Truncated term vector')
+    features, weights = np.split(values, 2)
+    return dict(zip(features.tolist(), weights.view('<f4').tolist()))
+
+
+def tfidf_rows(term_frequencies, idf):
+    """L2-normalized TF-IDF rows as CSR arrays ``(data, indices, indptr)``."""
+    data, indices, indptr = [], [], [0]
+    for frequencies in term_frequencies:
+        features = np.fromiter(frequencies, dtype=np.int64, count=len(frequencies))
+        features.sort()
+        weights = np.array([frequencies[feature] for feature in features], dtype=np.float64) * idf[features]
+        norm = np.sqrt(weights @ weights)
+        data.append((weights / norm if norm else weights).astype(np.float32))
+        indices.append(features)
+        indptr.append(indptr[-1] + len(features))
+    data = np.concatenate(data) if data else np.array([], dtype=np.float32)
+    # SciPy copies a CSR matrix whose indices and indptr differ in dtype, which would defeat mmap
+    index_dtype = np.int32 if indptr[-1] < 2 ** 31 else np.int64
+    indices = np.concatenate(indices).astype(index_dtype) if indices else np.array([], dtype=index_dtype)
+    return data, indices, np.array(indptr, dtype=index_dtype)
+
+
+def segment_paths(directory):
+    """Segment directories oldest first: the base segment, then appended ones by timestamp."""
+    if not os.path.isdir(directory):
+        return []
+    names = [name for name in os.listdir(directory)
+             if os.path.isfile(os.path.join(directory, name, 'indptr.npy')) and not name.startswith('.')]
+    names.sort(key=lambda name: (name != BASE_SEGMENT, len(name), name))
+    return [os.path.join(directory, name) for name in names]
+
+
+def document_frequencies(paths):
+    """Documents already indexed and their per-feature document counts."""
+    documents = 0
+    df = np.zeros(N_FEATURES, dtype=np.int64)
+    for path in paths:
+        documents += len(np.load(os.path.join(path, 'indptr.npy'), mmap_mode='r')) - 1
+        np.add.at(df, np.load(os.path.join(path, 'df_features.npy')), np.load(os.path.join(path, 'df_counts.npy')))
+    return documents, df
+
+
+def smooth_idf(documents, df):
+    return np.log((1 + documents) / (1 + df)) + 1.0
+
+
+def write_segment(queryset, name=None, chunk_size=2000, on_progress=None):
+    """Vectorize every job in ``queryset`` into one new segment; returns the job count.
+
+    The base segment is written fresh; any other segment is weighted against
+    the document frequencies of the segments already on disk plus its own.
+    """
+    tokenizer = HashingTokenizer()
+    job_ids, batches, term_frequencies = [], set(), []
+
+    last_id = None
+    rows = queryset.order_by('id')
+    while True:
+        chunk = rows if last_id is None else rows.filter(id__gt=last_id)
+        chunk = list(chunk.values_list('id', 'batch_id', 'title', 'description')[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1][0]
+        for job_id, batch_id, title, description in chunk:
+            job_ids.append(job_id)
+            batches.add(batch_id or '')
+            term_frequencies.append(tokenizer('\n'.join(part for part in (title, description) if part)))
+        if on_progress:
+            on_progress(len(job_ids))
+    if not job_ids:
+        return 0
+
+    directory = vectors_directory()
+    name = name or f'segment-{time.time_ns()}'
+    earlier = [] if name == BASE_SEGMENT else segment_paths(directory)
+    documents, df = document_frequencies(earlier)
+    own_df = Counter(feature for frequencies in term_frequencies for feature in frequencies)
+    df_features = np.fromiter(own_df, dtype=np.int32, count=len(own_df))
+    df_counts = np.fromiter(own_df.values(), dtype=np.int32, count=len(own_df))
+    df[df_features] += df_counts
+    data, indices, indptr = tfidf_rows(term_frequencies, smooth_idf(documents + len(job_ids), df))
+
+    # Written under a hidden name and renamed into place, so readers never see half a segment
+    os.makedirs(directory, exist_ok=True)
+    staging = os.path.join(directory, f'.{name}-{time.time_ns()}')
+    os.makedirs(staging)
+    arrays = {
+        'data': data, 'indices': indices, 'indptr': indptr,
+        'job_ids': np.array(job_ids, dtype=str), 'batches': np.array(sorted(batches), dtype=str),
+        'df_features': df_features, 'df_counts': df_counts,
+    }
+    for array_name in ARRAYS:
+        np.save(os.path.join(staging, f'{array_name}.npy'), arrays[array_name])
+    target = os.path.join(directory, name)
+    if os.path.exists(target):
+        retired = os.path.join(directory, f'.retired-{time.time_ns()}')
+        os.rename(target, retired)
+        os.rename(staging, target)
+        shutil.rmtree(retired)
+    else:
+        os.rename(staging, target)
+    return len(job_ids)
+
+
+def rebuild(chunk_size=2000, on_progress=None):
+    """Vectorize every job into a fresh base segment and drop the older segments."""
+    directory = vectors_directory()
+    stale = segment_paths(directory)
+    count = write_segment(Jobs.objects.all(), BASE_SEGMENT, chunk_size, on_progress)
+    # Segments appended while the rebuild ran are newer than the base; keep them
+    for path in stale:
+        if os.path.basename(path) != BASE_SEGMENT:
+            shutil.rmtree(path)
+    return count
+
+
+def indexed_batches():
+    batches = set()
+    for path in segment_paths(vectors_directory()):
+        batches.update(str(batch) for batch in np.load(os.path.join(path, 'batches.npy')))
+    return batches
+
+
+def append_batch(batch_id):
+    """Append a segment for the jobs currently tagged with ``batch_id``."""
+    return write_segment(Jobs.objects.filter(batch_id=batch_id))
+
+
+class JobVectors:
+    """Read-only, memory-mapped view of every segment."""
+
+    def __init__(self, paths):
+        self.segments = []
+        for path in paths:
+            arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+                      for name in ('data', 'indices', 'indptr', 'job_ids')}
+            matrix = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                       shape=(len(arrays['indptr']) - 1, N_FEATURES), copy=False)
+            self.segments.append((matrix, arrays['job_ids']))
+
+        # Only the newest copy of a job counts
+        job_ids = np.concatenate([ids for _, ids in self.segments]) if self.segments else np.array([], dtype=str)
+        _, last = np.unique(job_ids[::-1], return_index=True)
+        live = np.zeros(len(job_ids), dtype=bool)
+        live[len(job_ids) - 1 - last] = True
+        self.live = np.split(live, np.cumsum([len(ids) for _, ids in self.segments])[:-1]) if self.segments else []
+        self.job_count = len(last)
+
+        documents, df = document_frequencies(paths)
+        self.idf = smooth_idf(documents, df)
+        self.tokenizer = HashingTokenizer()
+
+    def vectorize(self, term_frequencies):
+        data, indices, indptr = tfidf_rows(term_frequencies, self.idf)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(term_frequencies), N_FEATURES))
+
+    def top_jobs(self, texts, k=20, block_rows=50000):
+        """For each text, the ``k`` most similar jobs as ``[(job_id, score), ...]``, best first."""
+        return self.top_jobs_for_terms([self.tokenizer(text) for text in texts], k, block_rows)
+
+    def top_jobs_for_terms(self, term_frequencies, k=20, block_rows=50000):
+        """``top_jobs`` for texts already tokenized into ``{feature: term frequency}``.
+
+        All queries are scored together, one sparse product per block of job
+        rows, so only ``block_rows x len(term_frequencies)`` scores are held at
+        a time.
+        """
+        if not term_frequencies:
+            return []
+        queries = self.vectorize(term_frequencies).T.tocsc()
+        best_scores = np.empty((len(term_frequencies), 0), dtype=np.float32)
+        best_ids = np.empty((len(term_frequencies), 0), dtype=object)
+        for (matrix, job_ids), live in zip(self.segments, self.live):
+            for start in range(0, matrix.shape[0], block_rows):
+                stop = min(start + block_rows, matrix.shape[0])
+                scores = (matrix[start:stop] @ queries).toarray().T
+                scores[:, ~live[start:stop]] = 0.0
+                take = min(k, stop - start)
+                top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+                best_scores = np.hstack([best_scores, np.take_along_axis(scores, top, axis=1)])
+                best_ids = np.hstack([best_ids, np.asarray(job_ids[start:stop], dtype=object)[top]])
+                if best_scores.shape[1] > k:
+                    keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                    best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                    best_ids = np.take_along_axis(best_ids, keep, axis=1)
+
+        results = []
+        for scores, ids in zip(best_scores, best_ids):
+            order = np.argsort(-scores, kind='stable')
+            results.append([(str(ids[i]), round(float(scores[i]), 4)) for i in order if scores[i] > 0])
+        return results
+
+
+_cache_lock = threading.Lock()
+_cache = (None, None)
+
+
+def get_job_vectors():
+    """The current matrix, re-mapped only when the segments on disk change."""
+    global _cache
+    with _cache_lock:
+        paths = segment_paths(vectors_directory())
+        signature = tuple((path, os.stat(os.path.join(path, 'indptr.npy')).st_mtime_ns) for path in paths)
+        if _cache[0] != signature:
+            _cache = (signature, JobVectors(paths))
+        return _cache[1]
@@ -0,0 +1,388 @@
+"""
+Set-based ingest of scraped jobs into the ``Jobs`` table.
+
+Instead of an ``exists()`` query and an ``INSERT`` per job, a batch is written
+with a handful of statements:
+
+1. the ``job_url``s already in the table are loaded in one query per chunk,
+2. jobs with unseen URLs are inserted with chunked ``bulk_create``,
+3. jobs whose content hash differs from the stored one are written back with
+   ``bulk_create(update_conflicts=True)`` (``INSERT ... ON CONFLICT DO UPDATE``),
+4. jobs with an unchanged content hash are not written at all.
+
+On PostgreSQL, ``CopyJobsLoader`` does the same with ``COPY`` into an unlogged
+staging table and a single ``INSERT ... ON CONFLICT`` statement.
+"""
+import csv
+import hashlib
+import io
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils import timezone
+
+from home.models import Jobs
+
+# Job columns that come from the scraper (everything but the bookkeeping fields)
+SCRAPED_FIELDS = [
+    'site', 'job_url', 'job_url_direct', 'title', 'company', 'location', 'date_posted',
+    'job_type', 'salary_source', 'interval', 'min_amount', 'max_amount', 'currency',
+    'is_remote', 'job_level', 'job_function', 'listing_type', 'emails', 'description',
+    'company_industry', 'company_url', 'company_logo', 'company_url_direct',
+    'company_addresses', 'company_num_employees', 'company_revenue',
+    'company_description', 'skills', 'experience_range', 'company_rating',
+    'company_reviews_count', 'vacancy_count', 'work_from_home_type',
+]
+
+# Fields that make up a posting's content. A change to any of them is a real
+# update. The company rating and logo are shown and filtered on, so they count
+# too; the remaining company metadata (review counts, size, revenue, ...) drifts
+# constantly and is left out so it doesn't rewrite otherwise unchanged rows.
+HASHED_FIELDS = [
+    'title', 'company', 'location', 'date_posted', 'job_type', 'salary_source', 'interval',
+    'min_amount', 'max_amount', 'currency', 'is_remote', 'job_level', 'job_function', 'emails',
+    'description', 'skills', 'experience_range', 'vacancy_count', 'work_from_home_type',
+    'company_rating', 'company_logo',
+]
+
+# Typed columns and the scraped text field each is parsed from
+TYPED_FIELDS = {
+    'min_salary': 'min_amount',
+    'max_salary': 'max_amount',
+    'posted_date': 'date_posted',
+    'remote': 'is_remote',
+    'rating': 'company_rating',
+    'scraped_at': 'jobs_scraped_at',
+}
+
+# Every column of a cleaned job row, in the order of the tuples built below
+JOB_COLUMNS = ['id'] + SCRAPED_FIELDS + ['jobs_scraped_at', 'batch_id', 'content_hash'] + list(TYPED_FIELDS)
+
+# Columns rewritten when a stored job changed
+UPDATE_FIELDS = JOB_COLUMNS[1:] + ['updated_at']
+
+BOOLEAN_TEXT = {'true': True, 'yes': True, '1': True, 'false': False, 'no': False, '0': False}
+
+# Fields cut shorter than their column, to keep rows small
+MAX_LENGTHS = {
+    'description': 5000,
+    'company_description': 1000,
+    'skills': 1000,
+}
+
+# Per-column truncation, taken from the model so values always fit
+FIELD_LIMITS = {
+    field: min(Jobs._meta.get_field(field).max_length, MAX_LENGTHS.get(field, float('inf')))
+    for field in ['id'] + SCRAPED_FIELDS
+}
+
+
+def _text_column(jobs_df, field):
+    """A column as strings, with missing values (None/NaN/NaT) as ''."""
+    if field not in jobs_df:
+        return pd.Series('', index=jobs_df.index, dtype=object)
+    column = jobs_df[field].astype(object)
+    return column.where(column.notna(), '').astype(str)
+
+
+def _objects(series):
+    """Series values as a Python object array, with missing values as None."""
+    return series.astype(object).where(series.notna(), None).to_numpy(dtype=object)
+
+
+def _decimal_column(text, field):
+    """Parse numbers, dropping values that don't fit the model field."""
+    model_field = Jobs._meta.get_field(field)
+    numbers = pd.to_numeric(text.str.replace(',', '', regex=False).str.strip(), errors='coerce')
+    numbers = numbers.where(numbers.abs() < 10 ** (model_field.max_digits - model_field.decimal_places))
+    return _objects(numbers.round(model_field.decimal_places))
+
+
+def _datetime_column(text):
+    parsed = pd.to_datetime(text, errors='coerce', format='ISO8601')
+    if settings.USE_TZ and parsed.dt.tz is None:
+        parsed = parsed.dt.tz_localize(timezone.get_default_timezone(), ambiguous='NaT', nonexistent='NaT')
+    return np.array([value.to_pydatetime() if not pd.isna(value) else None for value in parsed], dtype=object)
+
+
+def parse_typed_columns(text):
+    """Typed values for ``TYPED_FIELDS``, parsed column-wise from cleaned text columns.
+
+    Anything that doesn't parse is stored as NULL; the raw text stays in the
+    scraped field.
+    """
+    posted = pd.to_datetime(text['date_posted'], errors='coerce', format='ISO8601')
+    rating = pd.to_numeric(text['company_rating'], errors='coerce')
+    return {
+        'min_salary': _decimal_column(text['min_amount'], 'min_salary'),
+        'max_salary': _decimal_column(text['max_amount'], 'max_salary'),
+        'posted_date': np.array([value.date() if not pd.isna(value) else None for value in posted], dtype=object),
+        'remote': _objects(text['is_remote'].str.strip().str.lower().map(BOOLEAN_TEXT)),
+        'rating': _objects(rating.where((rating >= 0) & (rating <= 5)).round(2)),
+        'scraped_at': _datetime_column(text['jobs_scraped_at']),
+    }
+
+
+def _job_ids(jobs_df, batch_id):
+    """The scraper's id where present, else a hash of job_url, else a batch-unique fallback."""
+    ids = _text_column(jobs_df, 'id').str.strip()
+    missing = (ids == '').to_numpy()
+    # A copy: pandas may hand out a read-only view, and missing ids are filled in below
+    ids = ids.str.slice(0, FIELD_LIMITS['id']).to_numpy(dtype=object, copy=True)
+    if not missing.any():
+        return ids
+
+    urls = _text_column(jobs_df, 'job_url').to_numpy(dtype=object)
+    has_url = missing & (_text_column(jobs_df, 'job_url').str.strip() != '').to_numpy()
+    # Use hash of URL for consistent ID
+    ids[has_url] = [f"job-{hashlib.md5(url.encode()).hexdigest()[:16]}" for url in urls[has_url]]
+
+    timestamp = str(int(time.time() * 1000000))[-10:]
+    ids[missing & ~has_url] = [f"{batch_id[:8]}-{index:04d}-{timestamp}"
+                               for index in np.flatnonzero(missing & ~has_url)]
+    return ids
+
+
+def clean_jobs_frame(jobs_df, batch_id, scraped_at):
+    """Turn a scraped DataFrame into plain tuples in ``JOB_COLUMNS`` order.
+
+    NaN handling, string conversion, truncation and id generation are done a
+    column at a time rather than per cell.
+    """
+    text = {field: _text_column(jobs_df, field).str.slice(0, FIELD_LIMITS[field]) for field in SCRAPED_FIELDS}
+    columns = [_job_ids(jobs_df, batch_id)]
+    columns.extend(text[field].to_numpy(dtype=object) for field in SCRAPED_FIELDS)
+    columns.append(np.full(len(jobs_df), scraped_at, dtype=object))
+    columns.append(np.full(len(jobs_df), batch_id, dtype=object))
+    columns.append(content_hashes(text))
+    text['jobs_scraped_at'] = pd.Series(scraped_at, index=jobs_df.index, dtype=object)
+    columns.extend(parse_typed_columns(text).values())
+    return list(zip(*(column.tolist() for column in columns)))
+
+
+def content_hashes(text):
+    """SHA-256 of each row's ``HASHED_FIELDS``, given cleaned text columns."""
+    joined = text[HASHED_FIELDS[0]].str.cat([text[field] for field in HASHED_FIELDS[1:]], sep='\x1f')
+    return np.array([hashlib.sha256(row.encode()).hexdigest() for row in joined], dtype=object)
+
+
+class JobsIngester:
+    """Upserts cleaned job rows (see ``clean_jobs_frame``) into ``Jobs`` in chunks.
+
+    ``created``, ``updated``, ``skipped`` and ``errors`` count the outcome of
+    every row passed to ``ingest``. Jobs are matched to stored rows by
+    ``job_url``; rows without one are always inserted. If a chunk fails, it
+    is retried row by row so the bad rows can be reported through
+    ``on_error`` and the rest are still written.
+    """
+
+    def __init__(self, chunk_size=1000, on_error=None):
+        self.chunk_size = max(1, chunk_size)
+        self.on_error = on_error
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def ingest(self, records):
+        """Write tuples in ``JOB_COLUMNS`` order; errors report their position."""
+        jobs = []
+        seen_urls = set()
+        for index, record in enumerate(records):
+            job = Jobs(**dict(zip(JOB_COLUMNS, record)))
+            if job.job_url:
+                if job.job_url in seen_urls:
+                    # Same posting twice in one scrape: keep the first
+                    self.skipped += 1
+                    continue
+                seen_urls.add(job.job_url)
+            jobs.append((index, job))
+
+        existing = self.existing_jobs(seen_urls)
+
+        new, changed = [], []
+        for index, job in jobs:
+            stored = existing.get(job.job_url) if job.job_url else None
+            if stored is None:
+                new.append((index, job))
+            elif stored['content_hash'] == job.content_hash:
+                self.skipped += 1
+            else:
+                # Keep the stored primary key, so the upsert conflicts on it
+                job.id = stored['id']
+                changed.append((index, job))
+
+        for start in range(0, len(new), self.chunk_size):
+            self.created += self._write(new[start:start + self.chunk_size], update=False)
+        for start in range(0, len(changed), self.chunk_size):
+            self.updated += self._write(changed[start:start + self.chunk_size], update=True)
+
+    def existing_jobs(self, urls):
+        """Map each already-stored ``job_url`` to its id and content hash."""
+        urls = list(urls)
+        existing = {}
+        # Chunked only to stay under the database's bound-parameter limit
+        for start in range(0, len(urls), self.chunk_size * 5):
+            for stored in (Jobs.objects
+                           .filter(job_url__in=urls[start:start + self.chunk_size * 5])
+                           .order_by()
+                           .values('id', 'job_url', 'content_hash')):
+                existing.setdefault(stored['job_url'], stored)
+        return existing
+
+    def _write(self, chunk, update):
+        """Write one chunk; returns the number of rows written."""
+        options = {}
+        if update:
+            options = dict(update_conflicts=True, unique_fields=['id'],
+                           update_fields=UPDATE_FIELDS)
+        try:
+            with transaction.atomic():
+                Jobs.objects.bulk_create([job for _, job in chunk], **options)
+            return len(chunk)
+        except Exception:
+            written = 0
+            for index, job in chunk:
+                try:
+                    with transaction.atomic():
+                        if update:
+                            job.save(force_update=True)
+                        else:
+                            job.save(force_insert=True)
+                except Exception as e:
+                    self._error(index, e)
+                else:
+                    written += 1
+            return written
+
+    def _error(self, index, error):
+        self.errors += 1
+        if self.on_error:
+            self.on_error(index, error)
+
+
+class CopyJobsLoader(JobsIngester):
+    """PostgreSQL loader: ``COPY`` into an unlogged staging table, then one upsert.
+
+    Matches and counts rows like ``JobsIngester``, but the whole batch goes to
+    the server as one ``COPY`` stream and is merged into ``home_jobs`` by a
+    single ``INSERT ... ON CONFLICT (id) DO UPDATE``. As with the ORM path, a
+    new row whose id already belongs to a different posting is an error, not
+    an overwrite. On other databases, or if the COPY path fails, the batch is
+    written by the ORM path instead and ``on_fallback`` is called with the
+    error.
+    """
+
+    # Rows serialized per COPY buffer, to bound the memory of the text form
+    COPY_BUFFER_ROWS = 10000
+
+    def __init__(self, chunk_size=1000, on_error=None, on_fallback=None):
+        super().__init__(chunk_size, on_error)
+        self.on_fallback = on_fallback
+
+    def ingest(self, records):
+        records = records if isinstance(records, list) else list(records)
+        if connection.vendor != 'postgresql' or not records:
+            return super().ingest(records)
+        try:
+            with transaction.atomic():
+                created, updated, rejected = self._copy_and_merge(records)
+        except DatabaseError as e:
+            if self.on_fallback:
+                self.on_fallback(e)
+            return super().ingest(records)
+        self.created += created
+        self.updated += updated
+        self.skipped += len(records) - created - updated - len(rejected)
+        for seq, job_id in rejected:
+            self._error(seq - 1, IntegrityError(f'Job id {job_id} already belongs to another posting'))
+
+    def _copy_and_merge(self, records):
+        quote = connection.ops.quote_name
+        staging = quote(f'{Jobs._meta.db_table}_staging_{uuid.uuid4().hex[:12]}')
+        target = quote(Jobs._meta.db_table)
+        columns = [quote(Jobs._meta.get_field(field).column) for field in JOB_COLUMNS]
+        id_column = quote(Jobs._meta.get_field('id').column)
+        url_column = quote(Jobs._meta.get_field('job_url').column)
+        hash_column = quote(Jobs._meta.get_field('content_hash').column)
+        updated_column = quote(Jobs._meta.get_field('updated_at').column)
+        data_columns = [column for column in columns if column != id_column]
+        # Staging holds text; typed columns are cast on the way in, '' meaning NULL
+        select_columns = [
+            f"NULLIF({quote(field.column)}, '')::{field.db_type(connection)}"
+            if field.name in TYPED_FIELDS else quote(field.column)
+            for field in (Jobs._meta.get_field(name) for name in JOB_COLUMNS[1:])
+        ]
+
+        with connection.cursor() as cursor:
+            # Unlogged: the staging rows are throwaway, so they skip the WAL
+            cursor.execute(
+                f'CREATE UNLOGGED TABLE {staging} (seq bigserial, '
+                + ', '.join(f'{column} text' for column in columns) + ')')
+            copy_sql = f"COPY {staging} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+            for start in range(0, len(records), self.COPY_BUFFER_ROWS):
+                buffer = io.StringIO()
+                # Quoting every value keeps '' as an empty string rather than NULL
+                csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(
+                    records[start:start + self.COPY_BUFFER_ROWS])
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+
+            # Keep the first row per job_url (or per id, without one) and write
+            # it under the stored row's id when the URL is already known. Stored
+            # rows are only touched when their URL matches and their content hash
+            # changed; a row whose id is taken by another posting (stored, or
+            # earlier in the batch) is rejected, as JobsIngester reports it.
+            cursor.execute(f"""
+                WITH by_url AS (
+                    SELECT DISTINCT ON (COALESCE(NULLIF(s.{url_column}, ''), s.{id_column}))
+                           s.*, COALESCE(stored.{id_column}, s.{id_column}) AS target_id,
+                           stored.{id_column} IS NOT NULL AS matched
+                    FROM {staging} s
+                    LEFT JOIN LATERAL (
+                        SELECT j.{id_column} FROM {target} j
+                        WHERE s.{url_column} <> '' AND j.{url_column} = s.{url_column}
+                        LIMIT 1
+                    ) stored ON true
+                    ORDER BY COALESCE(NULLIF(s.{url_column}, ''), s.{id_column}), s.seq
+                ),
+                batch AS (
+                    SELECT DISTINCT ON (target_id) * FROM by_url ORDER BY target_id, NOT matched, seq
+                ),
+                written AS (
+                    INSERT INTO {target} ({id_column}, {', '.join(data_columns)}, {updated_column})
+                    SELECT target_id, {', '.join(select_columns)}, now() FROM batch
+                    ON CONFLICT ({id_column}) DO UPDATE SET
+                        {', '.join(f'{column} = EXCLUDED.{column}' for column in data_columns)},
+                        {updated_column} = EXCLUDED.{updated_column}
+                    WHERE EXCLUDED.{url_column} <> ''
+                      AND {target}.{url_column} = EXCLUDED.{url_column}
+                      AND {target}.{hash_column} IS DISTINCT FROM EXCLUDED.{hash_column}
+                    RETURNING {target}.{id_column} AS job_id, (xmax = 0) AS inserted
+                ),
+                rejected AS (
+                    SELECT seq, target_id FROM by_url WHERE seq NOT IN (SELECT seq FROM batch)
+                    UNION ALL
+                    SELECT seq, target_id FROM batch
+                    WHERE NOT matched AND target_id NOT IN (SELECT job_id FROM written)
+                )
+                SELECT (SELECT COUNT(*) FROM written WHERE inserted),
+                       (SELECT COUNT(*) FROM written WHERE NOT inserted),
+                       (SELECT COALESCE(json_agg(json_build_array(seq, target_id) ORDER BY seq), '[]')
+                        FROM rejected)
+            """)
+            counts = cursor.fetchone()
+            # On failure the rollback removes the table along with everything else
+            cursor.execute(f'DROP TABLE {staging}')
+        return counts
+
+
+def make_ingester(method='auto', chunk_size=1000, on_error=None, on_fallback=None):
+    """``CopyJobsLoader`` on PostgreSQL (``auto``/``copy``), else ``JobsIngester``."""
+    if method == 'copy' or (method == 'auto' and connection.vendor == 'postgresql'):
+        return CopyJobsLoader(chunk_size, on_error, on_fallback)
+    return JobsIngester(chunk_size, on_error)
@@ -0,0 +1,219 @@
+"""
+End-to-end benchmark for IndustryATSScanner on a synthetic resume corpus.
+
+Generates a reproducible corpus (TXT and PDF, 1 to 50 pages, low/medium/high
+skill density), then times read_resume, preprocessing, every extractor and
+the full scan_resume call on each file. Reports p50/p95 per stage, taken
+over each file's best of --repeat runs so a busy machine does not show up
+as a regression, and the peak RSS of the process. Results can be saved as a JSON baseline and later
+runs compared against it, failing on regressions. The baseline committed in
+benchmarks/ats_baseline.json is the default for --compare; timings depend
+on the machine, so re-record it (--save-baseline) on the machine that runs
+the comparison.
+
+Usage:
+    python manage.py ats_benchmark
+    python manage.py ats_benchmark --compare
+    python manage.py ats_benchmark --save-baseline benchmarks/ats_baseline.json
+    python manage.py ats_benchmark --compare benchmarks/ats_baseline.json --tolerance 0.25
+    python manage.py ats_benchmark --pages 1 5 --formats pdf --repeat 10
+"""
+import gc
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from home.management.commands.ats_regex_bench import EXTRACTORS
+from home.management.commands.ats_resume_scan import IndustryATSScanner
+from home.synthetic_resumes import SKILL_DENSITIES, build_corpus
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Differences smaller than this are timer noise, whatever the tolerance says
+NOISE_FLOOR_MS = 0.5
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'ats_baseline.json')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the ATS scanner on a synthetic corpus and compare against a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', type=str,
+                            help='Directory to write the corpus to (default: a temporary directory)')
+        parser.add_argument('--pages', type=int, nargs='+', default=[1, 2, 5, 10, 25, 50],
+                            help='Page counts to generate')
+        parser.add_argument('--densities', nargs='+', choices=list(SKILL_DENSITIES),
+                            default=list(SKILL_DENSITIES), help='Skill densities to generate')
+        parser.add_argument('--formats', nargs='+', choices=['txt', 'pdf'], default=['txt', 'pdf'],
+                            help='File formats to generate')
+        parser.add_argument('--seed', type=int, default=42, help='Corpus seed (default: 42)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs per file and stage (default: 5)')
+        parser.add_argument('--save-baseline', type=str, help='Write the results to this JSON file')
+        parser.add_argument('--compare', type=str, nargs='?', const=DEFAULT_BASELINE,
+                            help='Compare against a saved baseline JSON file '
+                                 '(default: the committed benchmarks/ats_baseline.json)')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p50/p95 slowdown over the baseline, as a fraction (default: 0.25)')
+
+    def handle(self, *args, **options):
+        if options['corpus']:
+            results = self.run(options['corpus'], options)
+        else:
+            with tempfile.TemporaryDirectory(prefix='ats_corpus_') as directory:
+                results = self.run(directory, options)
+
+        self.display_results(results)
+
+        if options['save_baseline']:
+            path = options['save_baseline']
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {path}'))
+
+        if options['compare']:
+            self.compare(results, options['compare'], options['tolerance'])
+
+    def run(self, directory, options):
+        paths = build_corpus(directory, page_counts=options['pages'], densities=options['densities'],
+                             formats=options['formats'], seed=options['seed'])
+        self.stdout.write(f'Generated {len(paths)} resume(s) in {directory}')
+
+        # No cache: every scan_resume call must do the full work
+        scanner = IndustryATSScanner()
+        repeat = max(1, options['repeat'])
+        timings = {}
+
+        def timed(stage, path, func, *args):
+            # As timeit does: a collection triggered by earlier stages' garbage
+            # would otherwise be billed to whichever stage happens to run then
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                value = func(*args)
+                elapsed = time.perf_counter() - started
+            finally:
+                gc.enable()
+            timings.setdefault(stage, {}).setdefault(path, []).append(elapsed * 1000)
+            return value
+
+        def preprocess(text):
+            # preprocess() only wraps the text; build the views scan_resume builds up front
+            return scanner.preprocess(text).prepare('lines', 'lower_lines', 'words')
+
+        for path in paths:
+            for _ in range(repeat):
+                gc.collect()
+                text = timed('read_resume', path, scanner.read_resume, path)
+                timed('preprocess', path, preprocess, text)
+                for extractor in EXTRACTORS:
+                    # Fresh document each time, so lazy preprocessing is part of the timing
+                    timed(extractor, path, getattr(scanner, extractor), scanner.preprocess(text))
+                timed('scan_resume', path, scanner.scan_resume, path)
+
+        # Best run per file: slower repeats measure the machine, not the scanner
+        best = {stage: [min(values) for values in by_path.values()]
+                for stage, by_path in timings.items()}
+
+        return {
+            'meta': {
+                'scanner_version': IndustryATSScanner.SCANNER_VERSION,
+                'seed': options['seed'],
+                'pages': options['pages'],
+                'densities': options['densities'],
+                'formats': options['formats'],
+                'files': len(paths),
+                'repeat': repeat,
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+            },
+            'stages': {
+                stage: {
+                    'p50_ms': round(percentile(values, 50), 3),
+                    'p95_ms': round(percentile(values, 95), 3),
+                    'runs': len(values) * repeat,
+                }
+                for stage, values in best.items()
+            },
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+    def display_results(self, results):
+        self.stdout.write(f"\n{'ATS SCANNER BENCHMARK':=^70}")
+        meta = results['meta']
+        self.stdout.write(f"Files: {meta['files']}, runs per file: {meta['repeat']}, "
+                          f"scanner version: {meta['scanner_version']}\n")
+        self.stdout.write(f"{'Stage':<24} {'p50 (ms)':>12} {'p95 (ms)':>12}")
+        for stage, stats in results['stages'].items():
+            self.stdout.write(f"{stage:<24} {stats['p50_ms']:>12.2f} {stats['p95_ms']:>12.2f}")
+        if results['peak_rss_mb'] is not None:
+            self.stdout.write(f"\nPeak RSS: {results['peak_rss_mb']} MB")
+        self.stdout.write(f"{'=' * 70}\n")
+
+    def compare(self, results, path, tolerance):
+        try:
+            with open(path, encoding='utf-8') as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read baseline {path}: {e}')
+
+        if baseline.get('meta', {}).get('files') != results['meta']['files']:
+            self.stdout.write(self.style.WARNING(
+                'Baseline was recorded on a different corpus; comparisons may not be meaningful'))
+
+        self.stdout.write(f"\n{'COMPARISON WITH BASELINE':-^70}")
+        regressions = []
+        for stage, stats in results['stages'].items():
+            before = baseline.get('stages', {}).get(stage)
+            if before is None:
+                continue
+            for key in ('p50_ms', 'p95_ms'):
+                old, new = before[key], stats[key]
+                change = (new - old) / old if old else 0.0
+                line = f"{stage:<24} {key[:3]} {old:>10.2f} → {new:>10.2f} ms ({change:+.0%})"
+                if change > tolerance and new - old > NOISE_FLOOR_MS:
+                    regressions.append(f'{stage} {key[:3]} {change:+.0%}')
+                    self.stdout.write(self.style.ERROR(f"✗ {line}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"✓ {line}"))
+
+        old_rss, new_rss = baseline.get('peak_rss_mb'), results['peak_rss_mb']
+        if old_rss and new_rss:
+            change = (new_rss - old_rss) / old_rss
+            line = f"{'peak RSS':<28} {old_rss:>10.1f} → {new_rss:>10.1f} MB ({change:+.0%})"
+            if change > tolerance:
+                regressions.append(f'peak RSS {change:+.0%}')
+                self.stdout.write(self.style.ERROR(f"✗ {line}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {line}"))
+
+        if regressions:
+            raise CommandError(f'Regressed beyond {tolerance:.0%} of the baseline: ' + ', '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
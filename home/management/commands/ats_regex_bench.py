@@ -0,0 +1,96 @@
+"""
+Regression benchmark for the ATS scanner extractors.
+
+Feeds adversarial inputs (by default 1 MB single-line documents shaped to
+trigger catastrophic regex backtracking) to every extractor and fails if
+any of them exceeds the time bound. ExtractorPatternTests in home/tests.py
+asserts the default bound on every test run; this command is for trying
+other sizes and limits by hand.
+
+Usage:
+    python manage.py ats_regex_bench
+    python manage.py ats_regex_bench --size 2000000 --limit 3
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home.management.commands.ats_resume_scan import IndustryATSScanner
+
+EXTRACTORS = [
+    'extract_contact_info',
+    'detect_sections',
+    'extract_education',
+    'extract_experience',
+    'extract_skills',
+    'check_achievements',
+    'calculate_keywords',
+]
+
+
+def _repeat(unit, size):
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def adversarial_inputs(size):
+    """Inputs of ``size`` characters, none of them containing a newline unless noted."""
+    return {
+        'plain words': _repeat('lorem ipsum dolor sit amet ', size),
+        'digit run': '1' * size,
+        'letter run': 'a' * size,
+        'whitespace run': ' ' * size,
+        'trend keywords, no digits': _repeat('increased reduced improved decreased ', size),
+        'email local part, no domain': _repeat('a.', size - 1) + '@',
+        'email domain, no tld': 'x@' + _repeat('a.', size - 3) + '1',
+        'repeated at-signs': _repeat('a@', size),
+        'percent run': _repeat('1%', size),
+        'month names': _repeat('jan ', size),
+        'years, no range': _repeat('2019 ', size),
+        'experience, no years': _repeat('experience ', size),
+        'section headers (one per line)': _repeat('experience\n', size),
+        'mixed symbols': _repeat('a1 .@%$-_', size),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Time every ATS extractor on adversarial inputs and fail on a time bound'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000000,
+                            help='Characters per adversarial input (default: 1 MB)')
+        parser.add_argument('--limit', type=float, default=2.0,
+                            help='Maximum seconds per extractor per input (default: 2.0)')
+
+    def handle(self, *args, **options):
+        size = options['size']
+        limit = options['limit']
+        scanner = IndustryATSScanner()
+
+        self.stdout.write(f"\n{'ATS EXTRACTOR REGRESSION BENCHMARK':=^70}")
+        self.stdout.write(f"Input size: {size} characters, limit: {limit}s per extractor\n")
+
+        failures = []
+        for name, text in adversarial_inputs(size).items():
+            self.stdout.write(f"\n{name:-^70}")
+            for extractor in EXTRACTORS:
+                # Fresh document each time, so preprocessing is part of the timing
+                doc = scanner.preprocess(text)
+                started = time.perf_counter()
+                getattr(scanner, extractor)(doc)
+                elapsed = time.perf_counter() - started
+
+                line = f"{extractor:<24} {elapsed * 1000:>10.1f} ms"
+                if elapsed > limit:
+                    failures.append((name, extractor, elapsed))
+                    self.stdout.write(self.style.ERROR(f"✗ {line}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"✓ {line}"))
+
+        self.stdout.write(f"\n{'=' * 70}\n")
+        if failures:
+            raise CommandError(
+                f"{len(failures)} extractor run(s) exceeded {limit}s: " +
+                ', '.join(f"{extractor} on '{name}' ({elapsed:.2f}s)"
+                          for name, extractor, elapsed in failures)
+            )
+        self.stdout.write(self.style.SUCCESS('All extractors within the time bound'))
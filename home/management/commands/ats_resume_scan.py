@@ -10,19 +10,362 @@ your_project/
 
 Usage:
     python manage.py ats_resume_scan path/to/resume.pdf
+    python manage.py ats_resume_scan path/to/resume.pdf --profile
+    python manage.py ats_resume_scan --dir path/to/resumes/ --workers 8
+    python manage.py ats_resume_scan --glob "drive/**/*.pdf"
+    python manage.py ats_resume_scan --manifest resumes.txt
 """
 from datetime import timezone, datetime
 
 import PyPDF2
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 import re
 import os
+import io
+import glob
+import time
+import hashlib
+import signal
+import sys
+import threading
 from collections import Counter
+from contextlib import contextmanager
+from functools import cached_property
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+_MONTH = (r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec'
+          r'|january|february|march|april|may|june|july|august|'
+          r'september|october|november|december)')
+
+# Extractor patterns, compiled once at import. Each one either starts at a
+# literal anchor or can begin only at the start of a character run, so no
+# pattern rescans a long line from every position (e.g. a 1 MB PDF line
+# without newlines stays linear-time).
+PATTERNS = {
+    # The local part may only start where a run of local-part characters
+    # starts, otherwise a long run without an '@' is rescanned from every offset.
+    'email': re.compile(r'(?<![A-Za-z0-9._%+-])[.%+-]*?\b([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,})\b'),
+    'phone': re.compile(r'(?:\+?\d{1,3}[-.\s]?)?\d{10}'),
+    'linkedin': re.compile(r'linkedin\.com/in/[\w-]+'),
+    'github': re.compile(r'github\.com/[\w-]+'),
+    'location': re.compile(r'[A-Z][a-z]+,\s*[A-Z]{2}'),
+    'year': re.compile(r'\b(19|20)\d{2}\b'),
+    'gpa': re.compile(r'gpa[:\s]+(\d\.\d+)'),
+    # Numbers only start at the beginning of a digit run (?<!\d)
+    'years_experience': re.compile(r'(?<!\d)(\d+)\+?\s*years?\s*(?:of\s*)?experience'),
+    'experience_years': re.compile(r'experience\s*(?:of\s*)?(\d+)\+?\s*years?'),
+    'date_range': re.compile(
+        r'(' + _MONTH + r'\.?\s*\d{4}|(?:19|20)\d{2})'
+        r'\s*(?:-|–|—|to)\s*'
+        r'(' + _MONTH + r'\.?\s*\d{4}|(?:19|20)\d{2}|present|current)'
+    ),
+    'percent': re.compile(r'(?<!\d)\d+%'),
+    'dollars': re.compile(r'\$\d+'),
+    'last_digit': re.compile(r'\d\D*\Z'),
+    'keyword': re.compile(r'\b[a-zA-Z+#.-]{3,}\b'),
+}
+
+DEGREE_PATTERNS = {
+    'Bachelor': re.compile(r"bachelor[']?s?|b\.?s\.?|b\.?a\.?"),
+    'Master': re.compile(r"master[']?s?|m\.?s\.?|m\.?a\.?|mba"),
+    'PhD': re.compile(r"ph\.?d\.?|doctorate"),
+    'Associate': re.compile(r"associate[']?s?|a\.?s\.?"),
+}
+
+# "<keyword> ... <number>" claims, matched per line by _trend_claims instead
+# of the backtracking-prone ``increased.*\d+``.
+TREND_KEYWORDS = ['increased', 'decreased', 'improved', 'reduced']
+
+
+def _trend_claims(lines, keyword):
+    """Same matches as ``re.findall(keyword + r'.*\d+', text)`` in linear time.
+
+    On each line that regex matches at most once: from the first occurrence of
+    the keyword up to the last digit on the line, if there is one after it.
+    """
+    claims = []
+    for line in lines:
+        start = line.find(keyword)
+        if start == -1:
+            continue
+        last_digit = PATTERNS['last_digit'].search(line, start + len(keyword))
+        if last_digit:
+            claims.append(line[start:last_digit.start() + 1])
+    return claims
+
+
+class ExtractionTimeout(BaseException):
+    """Raised by ``_deadline`` once the time budget is spent.
+
+    A ``BaseException``, like ``KeyboardInterrupt``: PyPDF2 wraps text and cmap
+    parsing in ``except Exception`` blocks, which would otherwise swallow it
+    and let the page run to completion.
+    """
+
+
+class ExtractionLimitExceeded(Exception):
+    """The extraction limits rejected a document before any text was read.
+
+    Kept apart from the generic errors of unreadable or corrupt files, so
+    callers can tell the two apart.
+    """
+
+
+@contextmanager
+def _deadline(seconds):
+    """Raise ``ExtractionTimeout`` in the block once ``seconds`` have passed.
+
+    The deadline is a SIGALRM timer, so it also interrupts a single slow call
+    into PyPDF2. Signals are only delivered to the main thread, which is where
+    every scan runs (the command itself and its pool worker processes); in any
+    other thread, or without ``setitimer`` (Windows), the block is not bounded.
+    """
+    if not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise ExtractionTimeout(f'Time budget of {seconds}s exceeded')
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+def _at_boundary(text, i):
+    """Mirror of the regex ``\\b`` assertion at position ``i`` of ``text``."""
+    before = i > 0 and _is_word_char(text[i - 1])
+    after = i < len(text) and _is_word_char(text[i])
+    return before != after
+
+
+class SkillMatcher:
+    """Single-pass skill matcher backed by a character trie.
+
+    Phrases are inserted once and the trie is compiled into one nested
+    alternation regex, so locating candidates is a single C-level pass whose
+    cost depends on the text length and the longest phrase rather than on the
+    number of phrases. The trie is only walked in Python at positions where
+    the regex found a hit, to collect every label there. Matching follows
+    ``\\b<phrase>\\b`` (or ``\\b<phrase>s?\\b`` when plurals are allowed), and
+    overlapping phrases such as ``spring`` and ``spring boot`` are all
+    reported.
+    """
+
+    def __init__(self):
+        self._root = {}
+        self._pattern = None
+
+    def add(self, phrase, label, allow_plural=False):
+        node = self._root
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        terminals = node.setdefault(None, [])
+        if (label, allow_plural) not in terminals:
+            terminals.append((label, allow_plural))
+        self._pattern = None
+
+    @classmethod
+    def _trie_regex(cls, node):
+        branches = [re.escape(ch) + cls._trie_regex(node[ch])
+                    for ch in sorted(ch for ch in node if ch is not None)]
+        if not branches:
+            return ''
+        if len(branches) == 1 and None not in node:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if None in node else '')
+
+    @property
+    def pattern(self):
+        if self._pattern is None:
+            self._pattern = re.compile(r'\b(?=' + self._trie_regex(self._root) + r's?\b)')
+        return self._pattern
+
+    def find(self, text):
+        """Return the set of labels whose phrase occurs in ``text``."""
+        found = set()
+        length = len(text)
+        for candidate in self.pattern.finditer(text):
+            node = self._root
+            i = candidate.start()
+            while i < length:
+                node = node.get(text[i])
+                if node is None:
+                    break
+                i += 1
+                terminals = node.get(None)
+                if not terminals:
+                    continue
+                exact = _at_boundary(text, i)
+                plural = (not exact and i < length and text[i] == 's'
+                          and _at_boundary(text, i + 1))
+                for label, allow_plural in terminals:
+                    if exact or (plural and allow_plural):
+                        found.add(label)
+        return found
+
+
+class ResumeDocument:
+    """Resume text preprocessed once and shared by every extractor.
+
+    The lowercased copy, line list, tokens and section spans are each built on
+    first use and then reused, instead of every extractor re-lowering and
+    re-splitting the full text.
+    """
+
+    def __init__(self, text, section_headers=()):
+        self.text = text
+        self.section_headers = section_headers
+
+    @cached_property
+    def lower(self):
+        return self.text.lower()
+
+    @cached_property
+    def lines(self):
+        return self.text.split('\n')
+
+    @cached_property
+    def lower_lines(self):
+        # Lowercasing never adds or removes newlines, so indexes match ``lines``
+        return self.lower.split('\n')
+
+    @cached_property
+    def words(self):
+        return self.text.split()
+
+    def prepare(self, *views):
+        """Build the named cached views now rather than on first use."""
+        for view in views:
+            getattr(self, view)
+        return self
+
+    @cached_property
+    def keyword_tokens(self):
+        return PATTERNS['keyword'].findall(self.lower)
+
+    @cached_property
+    def first_line(self):
+        return next((line.strip() for line in self.lines if line.strip()), None)
+
+    @cached_property
+    def section_spans(self):
+        """Map each detected section header to its ``(start, end)`` content line range."""
+        spans = {}
+        current_section = None
+        start = 0
+
+        for index, line_lower in enumerate(self.lower_lines):
+            line_lower = line_lower.strip()
+            if len(line_lower) >= 50:
+                continue
+            for header in self.section_headers:
+                if header in line_lower:
+                    if current_section:
+                        spans[current_section] = (start, index)
+                    current_section = header
+                    start = index + 1
+                    break
+
+        if current_section:
+            spans[current_section] = (start, len(self.lines))
+
+        return spans
+
+    def section_text(self, header):
+        start, end = self.section_spans[header]
+        return '\n'.join(self.lines[start:end])
+
+
+class ResumeScanCache:
+    """Looks up earlier scans of byte-identical resumes in the ``Resume`` table."""
+
+    def get(self, content_hash, scanner_version):
+        from home.models import Resume
+
+        resume = (Resume.objects
+                  .filter(content_hash=content_hash, scanner_version=scanner_version)
+                  .only('id', 'full_scan_data', 'text_terms')
+                  .order_by('-scanned_at')
+                  .first())
+        if resume is None or not resume.full_scan_data:
+            return None
+        text_terms = bytes(resume.text_terms) if resume.text_terms is not None else None
+        return dict(resume.full_scan_data, text_terms=text_terms, cached=True, resume_id=resume.id)
+
+
+class ScanHook:
+    """Receives per-stage measurements from ``IndustryATSScanner.scan_resume``.
+
+    Subclass and override the methods you need; the defaults do nothing.
+    ``allocated_blocks`` is the net change in ``sys.getallocatedblocks()``
+    over the stage, i.e. how many more memory blocks were live at its end.
+    """
+
+    def scan_started(self, file_path):
+        pass
+
+    def stage_finished(self, stage, seconds, allocated_blocks):
+        pass
+
+    def scan_finished(self, file_path, results):
+        pass
+
+
+class StageProfiler(ScanHook):
+    """Collects a stage breakdown and attaches it to the results as ``profile``."""
+
+    def __init__(self):
+        self.stages = []
+
+    def scan_started(self, file_path):
+        self.stages = []
+
+    def stage_finished(self, stage, seconds, allocated_blocks):
+        self.stages.append({
+            'stage': stage,
+            'seconds': round(seconds, 6),
+            'allocated_blocks': allocated_blocks,
+        })
+
+    def scan_finished(self, file_path, results):
+        results['profile'] = {
+            'stages': self.stages,
+            'total_seconds': round(sum(stage['seconds'] for stage in self.stages), 6),
+        }
+
 
 class IndustryATSScanner:
     """Professional ATS Resume Scanner"""
 
-    def __init__(self):
+    # Bump whenever a change to the scanner alters its results, so cached scans
+    # produced by older versions are not reused.
+    SCANNER_VERSION = '1.2'
+
+    # Per-document extraction limits. Text past MAX_CHARS is more than scoring
+    # needs, so pages after it are not parsed at all.
+    MAX_PAGES = 50
+    MAX_CHARS = 200000
+    MAX_SECONDS = 20.0
+
+    def __init__(self, cache=None, max_pages=None, max_chars=None, max_seconds=None, hooks=()):
+        self.cache = cache
+        self.hooks = list(hooks)
+        self.max_pages = max_pages or self.MAX_PAGES
+        self.max_chars = max_chars or self.MAX_CHARS
+        self.max_seconds = max_seconds or self.MAX_SECONDS
+        self._text_tokenizer = None
+
         self.technical_skills = {
             'programming': ['python', 'java', 'javascript', 'typescript', 'c', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin', 'go', 'rust', 'scala', 'r', 'matlab', 'perl', 'dart', 'bash', 'powershell', 'objective-c'],
             'web_frontend': ['react', 'react.js', 'angular', 'vue', 'vue.js', 'svelte', 'next.js', 'nuxt.js', 'html', 'html5', 'css', 'css3', 'sass', 'scss', 'jquery', 'bootstrap', 'tailwind', 'material-ui', 'redux', 'webpack', 'vite'],
@@ -78,51 +421,162 @@ class IndustryATSScanner:
             'projects', 'certifications', 'summary', 'objective', 'additional information',
         ]
 
-    def extract_text_from_pdf(self, file_path):
+        self._build_skill_matcher()
+
+    def _build_skill_matcher(self):
+        """Compile the skill taxonomy into one matcher, reused for every resume."""
+        self.skill_matcher = SkillMatcher()
+        self._skill_positions = {}
+        for cat_index, (category, skills) in enumerate(self.technical_skills.items()):
+            for position, skill in enumerate(skills):
+                self.skill_matcher.add(skill, ('technical', skill), allow_plural=True)
+                self._skill_positions.setdefault(skill, []).append((cat_index, position, category))
+        for skill in self.soft_skills:
+            self.skill_matcher.add(skill, ('soft', skill))
+
+    @property
+    def extraction_limits(self):
+        return {
+            'max_pages': self.max_pages,
+            'max_chars': self.max_chars,
+            'max_seconds': self.max_seconds,
+        }
+
+    def iter_pdf_pages(self, pdf_reader):
+        """Lazily yield the text of each page, so callers can stop at any page."""
+        for page in pdf_reader.pages:
+            yield page.extract_text() or ""
+
+    def _bounded_pdf_text(self, data):
+        started = time.monotonic()
+        pages_total = None
+        parts = []
+        chars = 0
+        truncated_by = None
+
+        try:
+            # Hard limit: a pathological page or cross-reference table is cut
+            # off mid-call instead of only being noticed between pages
+            with _deadline(self.max_seconds):
+                pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+                pages_total = len(pdf_reader.pages)
+                for page_text in self.iter_pdf_pages(pdf_reader):
+                    parts.append(page_text)
+                    chars += len(page_text) + 1
+                    if len(parts) >= pages_total:
+                        break
+                    if chars >= self.max_chars:
+                        truncated_by = 'max_chars'
+                    elif len(parts) >= self.max_pages:
+                        truncated_by = 'max_pages'
+                    elif time.monotonic() - started >= self.max_seconds:
+                        truncated_by = 'max_seconds'  # where no deadline timer is available
+                    if truncated_by:
+                        break
+        except ExtractionTimeout:
+            if pages_total is None:
+                raise ExtractionLimitExceeded(f'PDF could not be opened within {self.max_seconds}s')
+            # Keep the pages read before the deadline
+            truncated_by = 'max_seconds'
+
+        text = "\n".join(parts) + "\n" if parts else ""
+        if len(text) > self.max_chars:
+            text = text[:self.max_chars]
+            truncated_by = truncated_by or 'max_chars'
+
+        return text, {
+            'pages_total': pages_total,
+            'pages_read': len(parts),
+            'characters': len(text),
+            'seconds': round(time.monotonic() - started, 3),
+            'truncated': truncated_by is not None,
+            'truncated_by': truncated_by,
+            'limits': self.extraction_limits,
+        }
+
+    def _bounded_txt_text(self, data):
+        text = data.decode('utf-8')
+        truncated = len(text) > self.max_chars
+        if truncated:
+            text = text[:self.max_chars]
+        return text, {
+            'pages_total': None,
+            'pages_read': None,
+            'characters': len(text),
+            'seconds': 0.0,
+            'truncated': truncated,
+            'truncated_by': 'max_chars' if truncated else None,
+            'limits': self.extraction_limits,
+        }
+
+    def extract_text_from_pdf(self, file_path, data=None):
+        return self.extract_pdf(file_path, data)[0]
+
+    def extract_pdf(self, file_path, data=None):
+        """Return ``(text, extraction)`` for a PDF, read within the scanner's limits."""
         if not PyPDF2:
             raise ImportError("PyPDF2 not installed. Run: pip install PyPDF2")
-        text = ""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            if data is None:
+                data = self.read_file_bytes(file_path)
+            return self._bounded_pdf_text(data)
+        except ExtractionLimitExceeded:
+            raise
         except Exception as e:
             raise Exception(f"Error reading PDF: {e}")
-        return text
 
-    def extract_text_from_txt(self, file_path):
+    def extract_text_from_txt(self, file_path, data=None):
+        return self.extract_txt(file_path, data)[0]
+
+    def extract_txt(self, file_path, data=None):
+        """Return ``(text, extraction)`` for a plain-text resume."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+            if data is None:
+                data = self.read_file_bytes(file_path)
+            return self._bounded_txt_text(data)
         except Exception as e:
             raise Exception(f"Error reading TXT: {e}")
 
-    def read_resume(self, file_path):
+    def read_file_bytes(self, file_path):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        with open(file_path, 'rb') as file:
+            return file.read()
+
+    def read_resume(self, file_path, data=None):
+        return self.extract_resume(file_path, data)[0]
+
+    def extract_resume(self, file_path, data=None):
+        """Return ``(text, extraction)``, where ``extraction`` reports truncation."""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         ext = os.path.splitext(file_path)[1].lower()
         if ext == '.pdf':
-            return self.extract_text_from_pdf(file_path)
+            return self.extract_pdf(file_path, data)
         elif ext == '.txt':
-            return self.extract_text_from_txt(file_path)
+            return self.extract_txt(file_path, data)
         else:
             raise ValueError(f"Unsupported format: {ext}")
 
-    def extract_contact_info(self, text):
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
+    def preprocess(self, text):
+        """Build the shared ``ResumeDocument`` that every extractor reads from."""
+        return ResumeDocument(text, self.section_headers)
+
+    def _document(self, text):
+        # Extractors accept raw text too, for callers outside scan_resume
+        return text if isinstance(text, ResumeDocument) else self.preprocess(text)
 
-        phone_pattern = r'(?:\+?\d{1,3}[-.\s]?)?\d{10}'
-        phones = re.findall(phone_pattern, text)
+    def extract_contact_info(self, text):
+        doc = self._document(text)
+        emails = PATTERNS['email'].findall(doc.text) if '@' in doc.text else []
+        phones = PATTERNS['phone'].findall(doc.text)
 
-        linkedin = re.findall(r'linkedin\.com/in/[\w-]+', text.lower())
-        github = re.findall(r'github\.com/[\w-]+', text.lower())
+        linkedin = PATTERNS['linkedin'].findall(doc.lower)
+        github = PATTERNS['github'].findall(doc.lower)
 
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        name = lines[0] if lines else "Not found"
+        name = doc.first_line or "Not found"
 
-        location = re.findall(r'[A-Z][a-z]+,\s*[A-Z]{2}', text)
+        location = PATTERNS['location'].findall(doc.text)
 
         return {
             'name': name,
@@ -134,49 +588,19 @@ class IndustryATSScanner:
         }
 
     def detect_sections(self, text):
-        detected = {}
-        lines = text.split('\n')
-        current_section = None
-        content = []
-
-        for line in lines:
-            line_lower = line.lower().strip()
-            is_header = False
-
-            for header in self.section_headers:
-                if header in line_lower and len(line_lower) < 50:
-                    if current_section:
-                        detected[current_section] = '\n'.join(content)
-                    current_section = header
-                    content = []
-                    is_header = True
-                    break
-
-            if not is_header and current_section:
-                content.append(line)
-
-        if current_section:
-            detected[current_section] = '\n'.join(content)
-
-        return detected
+        doc = self._document(text)
+        return {header: doc.section_text(header) for header in doc.section_spans}
 
     def extract_education(self, text):
-        degrees = {
-            'Bachelor': r"bachelor[']?s?|b\.?s\.?|b\.?a\.?",
-            'Master': r"master[']?s?|m\.?s\.?|m\.?a\.?|mba",
-            'PhD': r"ph\.?d\.?|doctorate",
-            'Associate': r"associate[']?s?|a\.?s\.?"
-        }
-
+        doc = self._document(text)
         found = []
-        text_lower = text.lower()
 
-        for degree, pattern in degrees.items():
-            if re.search(pattern, text_lower):
+        for degree, pattern in DEGREE_PATTERNS.items():
+            if pattern.search(doc.lower):
                 found.append(degree)
 
-        years = re.findall(r'\b(19|20)\d{2}\b', text)
-        gpa_match = re.findall(r'gpa[:\s]+(\d\.\d+)', text.lower())
+        years = PATTERNS['year'].findall(doc.text)
+        gpa_match = PATTERNS['gpa'].findall(doc.lower)
 
         return {
             'degrees': list(set(found)),
@@ -185,28 +609,12 @@ class IndustryATSScanner:
         }
 
     def extract_experience(self, text):
-        exp_patterns = [
-            r'(\d+)\+?\s*years?\s*(?:of\s*)?experience',
-            r'experience\s*(?:of\s*)?(\d+)\+?\s*years?'
-        ]
-
+        doc = self._document(text)
         years = []
-        for pattern in exp_patterns:
-            matches = re.findall(pattern, text.lower())
-            years.extend([int(y) for y in matches])
-
-        date_ranges = re.findall(
-            r'((?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec'
-            r'|january|february|march|april|may|june|july|august|'
-            r'september|october|november|december)\.?\s*\d{4}'
-            r'|(?:19|20)\d{2})'
-            r'\s*(?:-|–|—|to)\s*'
-            r'((?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec'
-            r'|january|february|march|april|may|june|july|august|'
-            r'september|october|november|december)\.?\s*\d{4}'
-            r'|(?:19|20)\d{2}|present|current)',
-            text.lower()
-        )
+        for pattern in (PATTERNS['years_experience'], PATTERNS['experience_years']):
+            years.extend(int(y) for y in pattern.findall(doc.lower))
+
+        date_ranges = PATTERNS['date_range'].findall(doc.lower)
 
         return {
             'years_mentioned': max(years) if years else None,
@@ -214,45 +622,32 @@ class IndustryATSScanner:
         }
 
     def extract_skills(self, text):
-        text_lower = text.lower()
-        technical = []
-        soft = []
+        matches = self.skill_matcher.find(self._document(text).lower)
+        technical = [skill for kind, skill in matches if kind == 'technical']
+        soft = [skill for kind, skill in matches if kind == 'soft']
+
+        placed = []
+        for skill in technical:
+            placed.extend((cat_index, position, category, skill)
+                          for cat_index, position, category in self._skill_positions[skill])
         categories = {}
-
-        for category, skills in self.technical_skills.items():
-            cat_skills = []
-            for skill in skills:
-                pattern = r'\b' + re.escape(skill) + r's?\b'
-                if re.search(pattern, text_lower):
-                    technical.append(skill)
-                    cat_skills.append(skill)
-            if cat_skills:
-                categories[category] = cat_skills
-
-        for skill in self.soft_skills:
-            if re.search(r'\b' + re.escape(skill) + r'\b', text_lower):
-                soft.append(skill)
+        for _, _, category, skill in sorted(placed):
+            categories.setdefault(category, []).append(skill)
 
         return {
-            'technical': list(set(technical)),
-            'soft': list(set(soft)),
+            'technical': technical,
+            'soft': soft,
             'by_category': categories,
-            'total': len(set(technical)) + len(set(soft))
+            'total': len(technical) + len(soft)
         }
 
     def check_achievements(self, text):
-        patterns = [
-            r'\d+%',
-            r'\$\d+',
-            r'increased.*\d+',
-            r'decreased.*\d+',
-            r'improved.*\d+',
-            r'reduced.*\d+'
-        ]
-
-        achievements = []
-        for pattern in patterns:
-            achievements.extend(re.findall(pattern, text.lower()))
+        doc = self._document(text)
+        achievements = PATTERNS['percent'].findall(doc.lower)
+        achievements.extend(PATTERNS['dollars'].findall(doc.lower))
+        for keyword in TREND_KEYWORDS:
+            if keyword in doc.lower:
+                achievements.extend(_trend_claims(doc.lower_lines, keyword))
 
         return {
             'has_achievements': len(achievements) > 0,
@@ -261,26 +656,82 @@ class IndustryATSScanner:
         }
 
     def calculate_keywords(self, text, top_n=20):
-        words = re.findall(r'\b[a-zA-Z+#.-]{3,}\b', text.lower())
+        words = self._document(text).keyword_tokens
         stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
                       'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are'}
         filtered = [w for w in words if w not in stop_words]
         freq = Counter(filtered)
         return dict(freq.most_common(top_n))
 
-    def scan_resume(self, file_path):
-        resume_text = self.read_resume(file_path)
+    def _cached_scan_usable(self, cached):
+        # A scan cut short by other extraction limits may be missing text this run would read
+        extraction = cached.get('extraction') or {}
+        return not extraction.get('truncated') or extraction.get('limits') == self.extraction_limits
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    @contextmanager
+    def _stage(self, name):
+        if not self.hooks:
+            yield
+            return
+        blocks = sys.getallocatedblocks()
+        started = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - started
+        allocated = sys.getallocatedblocks() - blocks
+        for hook in self.hooks:
+            hook.stage_finished(name, seconds, allocated)
+
+    def scan_resume(self, file_path, force=False):
+        """Scan a resume file.
+
+        When the scanner has a cache and ``force`` is False, a resume whose
+        bytes were already scanned by this ``SCANNER_VERSION`` is answered from
+        the stored results (flagged with ``cached`` and ``resume_id``) without
+        parsing it again.
+
+        Every registered ``ScanHook`` is told the wall time and allocation
+        count of each stage, and gets the results of every scan, cached or not.
+        """
+        for hook in self.hooks:
+            hook.scan_started(file_path)
+
+        with self._stage('read'):
+            data = self.read_file_bytes(file_path)
+            content_hash = hashlib.sha256(data).hexdigest()
+        if self.cache is not None and not force:
+            with self._stage('cache_lookup'):
+                cached = self.cache.get(content_hash, self.SCANNER_VERSION)
+            if cached is not None and self._cached_scan_usable(cached):
+                return self._scan_finished(file_path, cached)
+
+        with self._stage('extract_text'):
+            resume_text, extraction = self.extract_resume(file_path, data)
 
         if not resume_text or len(resume_text) < 100:
-            return {"error": "Insufficient text extracted"}
-
-        contact = self.extract_contact_info(resume_text)
-        sections = self.detect_sections(resume_text)
-        education = self.extract_education(resume_text)
-        experience = self.extract_experience(resume_text)
-        skills = self.extract_skills(resume_text)
-        achievements = self.check_achievements(resume_text)
-        keywords = self.calculate_keywords(resume_text)
+            return self._scan_finished(file_path, {"error": "Insufficient text extracted"})
+
+        with self._stage('preprocess'):
+            # Build the shared views here so they are not billed to the first extractor
+            doc = self.preprocess(resume_text).prepare('lines', 'lower_lines', 'words')
+        with self._stage('contact_info'):
+            contact = self.extract_contact_info(doc)
+        with self._stage('sections'):
+            sections = self.detect_sections(doc)
+        with self._stage('education'):
+            education = self.extract_education(doc)
+        with self._stage('experience'):
+            experience = self.extract_experience(doc)
+        with self._stage('skills'):
+            skills = self.extract_skills(doc)
+        with self._stage('achievements'):
+            achievements = self.check_achievements(doc)
+        with self._stage('keywords'):
+            keywords = self.calculate_keywords(doc)
+        with self._stage('text_terms'):
+            text_terms = self.text_terms(doc)
 
         # Calculate score
         score = 0
@@ -292,7 +743,7 @@ class IndustryATSScanner:
         score += 10 if achievements['has_achievements'] else 0
 
 
-        return {
+        results = {
             'score': round(min(100, score), 1),
             'contact': contact,
             'sections': list(sections.keys()),
@@ -301,23 +752,236 @@ class IndustryATSScanner:
             'skills': skills,
             'achievements': achievements,
             'keywords': keywords,
-            'word_count': len(resume_text.split()),
-            'character_count': len(resume_text)
+            'word_count': len(doc.words),
+            'character_count': len(resume_text),
+            'extraction': extraction,
+            'text_terms': text_terms,
+            'content_hash': content_hash,
+            'scanner_version': self.SCANNER_VERSION
         }
+        return self._scan_finished(file_path, results)
+
+    def text_terms(self, doc):
+        """The resume text as packed hashed term frequencies, the same features jobs are vectorized with.
+
+        Counted from ``doc.keyword_tokens``, which calculate_keywords has
+        already built, so the text is not lowercased and tokenized again.
+        """
+        from home.job_vectors import HashingTokenizer, encode_terms
+
+        if self._text_tokenizer is None:
+            self._text_tokenizer = HashingTokenizer()
+        return encode_terms(self._text_tokenizer.frequencies(doc.keyword_tokens))
+
+    def _scan_finished(self, file_path, results):
+        for hook in self.hooks:
+            hook.scan_finished(file_path, results)
+        return results
+
+
+def resume_fields_from_scan(results, file_path):
+    """Map a ``scan_resume`` result onto ``Resume`` model fields."""
+    from home.skill_bitsets import encode_skills
+
+    # Stored in its own column; full_scan_data stays plain JSON
+    results = dict(results)
+    text_terms = results.pop('text_terms', None)
+    return dict(
+        # File info
+        file_name=os.path.basename(file_path),
+        file_path=file_path,
+        scanned_at=datetime.now(),
+        content_hash=results.get('content_hash'),
+        scanner_version=results.get('scanner_version'),
+
+        # ATS Score
+        ats_score=results['score'],
+
+        # Contact
+        candidate_name=results['contact']['name'],
+        email=results['contact']['emails'][0] if results['contact']['emails'] else None,
+        phone=results['contact']['phones'][0] if results['contact']['phones'] else None,
+        linkedin_url=f"https://{results['contact']['linkedin'][0]}" if results['contact'][
+            'linkedin'] else None,
+        github_url=f"https://{results['contact']['github'][0]}" if results['contact']['github'] else None,
+        location=results['contact']['location'],
+
+        # Education
+        degrees=results['education']['degrees'],
+        graduation_years=results['education']['years'],
+        gpa=results['education']['gpa'],
+
+        # Experience
+        years_of_experience=results['experience']['years_mentioned'],
+        total_jobs=results['experience']['date_ranges'],
+
+        # Skills
+        technical_skills=results['skills']['technical'],
+        soft_skills=results['skills']['soft'],
+        skills_by_category=results['skills']['by_category'],
+        total_skills_count=results['skills']['total'],
+        skill_bitset=encode_skills(results['skills']['technical']),
+        text_terms=text_terms,
+
+        # Sections
+        sections_detected=results['sections'],
+        has_summary='summary' in results['sections'] or 'objective' in results['sections'],
+        has_experience_section='experience' in results['sections'] or 'work experience' in results[
+            'sections'],
+        has_education_section='education' in results['sections'],
+        has_skills_section='skills' in results['sections'] or 'technical skills' in results['sections'],
+
+        # Achievements
+        has_quantifiable_achievements=results['achievements']['has_achievements'],
+        achievement_count=results['achievements']['count'],
+        top_keywords=results['keywords'],
+
+        # Stats
+        word_count=results['word_count'],
+        character_count=results['character_count'],
+
+        # Full data
+        full_scan_data=results
+    )
+
+
+class ResumeBulkWriter:
+    """Buffers scan results and inserts them as ``Resume`` rows in batches.
+
+    Every ``batch_size`` results are written with one ``bulk_create`` inside
+    one transaction. If a batch fails, it is retried row by row (each in its
+    own transaction) so the bad rows can be reported through ``on_error`` and
+    the rest of the batch is still saved.
+    """
+
+    def __init__(self, batch_size=500, on_saved=None, on_error=None):
+        from home.models import Resume
+
+        self.model = Resume
+        self.batch_size = max(1, batch_size)
+        self.on_saved = on_saved
+        self.on_error = on_error
+        self.pending = []
+        self.saved = 0
+        self.failed = 0
+
+    def add(self, results, file_path, **overrides):
+        fields = resume_fields_from_scan(results, file_path)
+        fields.update(overrides)
+        self.pending.append((file_path, self.model(**fields)))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create([resume for _, resume in batch])
+        except Exception:
+            for file_path, resume in batch:
+                resume.pk = None
+                try:
+                    with transaction.atomic():
+                        resume.save(force_insert=True)
+                except Exception as e:
+                    self._failed(file_path, e)
+                else:
+                    self._saved(file_path, resume)
+        else:
+            for file_path, resume in batch:
+                self._saved(file_path, resume)
+
+    def _saved(self, file_path, resume):
+        self.saved += 1
+        if self.on_saved:
+            self.on_saved(file_path, resume)
+
+    def _failed(self, file_path, error):
+        self.failed += 1
+        if self.on_error:
+            self.on_error(file_path, error)
+
+
+SCANNABLE_EXTENSIONS = ('.pdf', '.txt')
+
+
+def file_content_hash(file_path):
+    """sha256 of a file's bytes, the same key ``scan_resume`` stores as ``content_hash``."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+_worker_scanner = None
+
+
+def _init_worker(limits, profile=False):
+    global _worker_scanner
+    from django.apps import apps
+    if not apps.ready:
+        # Spawned (rather than forked) workers start without Django configured
+        import django
+        django.setup()
+    _worker_scanner = IndustryATSScanner(cache=ResumeScanCache(), **limits)
+    if profile:
+        _worker_scanner.add_hook(StageProfiler())
+
+
+def _scan_in_worker(file_path, force=False):
+    """Process pool entry point: never raises, so one bad file can't abort a batch."""
+    try:
+        results = _worker_scanner.scan_resume(file_path, force=force)
+    except Exception as e:
+        return file_path, None, str(e)
+    if 'error' in results:
+        return file_path, None, results['error']
+    return file_path, results, None
 
 
 class Command(BaseCommand):
     help = 'Scan resume with ATS and store results in database'
 
     def add_arguments(self, parser):
-        parser.add_argument('file_path', type=str, help='Path to resume file')
+        parser.add_argument('file_path', type=str, nargs='?', help='Path to resume file')
         parser.add_argument('--detailed', action='store_true', help='Show detailed analysis')
         parser.add_argument('--no-save', action='store_true', help='Don\'t save to database')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-scan even if identical file contents were already scanned')
+        parser.add_argument('--profile', action='store_true',
+                            help='Print per-stage wall time and allocation counts')
+        parser.add_argument('--store-profile', action='store_true',
+                            help='Keep the stage timings in Resume.full_scan_data (implies --profile)')
+
+        limits = parser.add_argument_group('extraction limits')
+        limits.add_argument('--max-pages', type=int,
+                            help=f'Pages to read per PDF (default: {IndustryATSScanner.MAX_PAGES})')
+        limits.add_argument('--max-chars', type=int,
+                            help=f'Characters to keep per resume (default: {IndustryATSScanner.MAX_CHARS})')
+        limits.add_argument('--max-seconds', type=float,
+                            help=f'Time budget for reading one PDF (default: {IndustryATSScanner.MAX_SECONDS})')
+
+        batch = parser.add_argument_group('batch mode')
+        batch.add_argument('--dir', dest='directory', help='Scan every PDF/TXT resume in this directory')
+        batch.add_argument('--glob', dest='pattern', help='Scan every PDF/TXT resume matching this glob pattern')
+        batch.add_argument('--manifest', help='Scan the resume paths listed in this file, one per line')
+        batch.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                           help='Number of scanner processes in batch mode (default: CPU count)')
+        batch.add_argument('--batch-size', type=int, default=500,
+                           help='Resumes inserted per database transaction in batch mode (default: 500)')
 
     def handle(self, *args, **options):
         file_path = options['file_path']
         detailed = options.get('detailed', False)
         no_save = options.get('no_save', False)
+        force = options.get('force', False)
+
+        if options['directory'] or options['pattern'] or options['manifest']:
+            return self.handle_batch(options)
+        if not file_path:
+            raise CommandError('Provide a file_path, or one of --dir, --glob or --manifest')
 
         self.stdout.write(self.style.SUCCESS('\n' + '=' * 70))
         self.stdout.write(self.style.SUCCESS('ATS RESUME SCANNER - WITH DATABASE STORAGE'))
@@ -327,116 +991,31 @@ class Command(BaseCommand):
             # Import model here to avoid circular imports
             from home.models import Resume
 
-            scanner = IndustryATSScanner()
-            results = scanner.scan_resume(file_path)
+            scanner = IndustryATSScanner(cache=ResumeScanCache(), **self.extraction_limits(options))
+            if self.profiling(options):
+                scanner.add_hook(StageProfiler())
+            results = scanner.scan_resume(file_path, force=force)
+            profile = results.get('profile') if options['store_profile'] else results.pop('profile', None)
 
             if 'error' in results:
                 raise CommandError(results['error'])
 
+            if results.get('cached'):
+                # Identical file already scanned by this scanner version
+                no_save = True
+                self.stdout.write(self.style.SUCCESS(
+                    f"\n♻️  Identical resume already scanned (ID: {results['resume_id']}), "
+                    f"using stored results. Pass --force to re-scan."))
+
             # Save to database
             if not no_save:
-                resume_obj = Resume.objects.create(
-                    # File info
-                    file_name=os.path.basename(file_path),
-                    file_path=file_path,
-                    scanned_at=datetime.now(),
-
-                    # ATS Score
-                    ats_score=results['score'],
-
-                    # Contact
-                    candidate_name=results['contact']['name'],
-                    email=results['contact']['emails'][0] if results['contact']['emails'] else None,
-                    phone=results['contact']['phones'][0] if results['contact']['phones'] else None,
-                    linkedin_url=f"https://{results['contact']['linkedin'][0]}" if results['contact'][
-                        'linkedin'] else None,
-                    github_url=f"https://{results['contact']['github'][0]}" if results['contact']['github'] else None,
-                    location=results['contact']['location'],
-
-                    # Education
-                    degrees=results['education']['degrees'],
-                    graduation_years=results['education']['years'],
-                    gpa=results['education']['gpa'],
-
-                    # Experience
-                    years_of_experience=results['experience']['years_mentioned'],
-                    total_jobs=results['experience']['date_ranges'],
-
-                    # Skills
-                    technical_skills=results['skills']['technical'],
-                    soft_skills=results['skills']['soft'],
-                    skills_by_category=results['skills']['by_category'],
-                    total_skills_count=results['skills']['total'],
-
-                    # Sections
-                    sections_detected=results['sections'],
-                    has_summary='summary' in results['sections'] or 'objective' in results['sections'],
-                    has_experience_section='experience' in results['sections'] or 'work experience' in results[
-                        'sections'],
-                    has_education_section='education' in results['sections'],
-                    has_skills_section='skills' in results['sections'] or 'technical skills' in results['sections'],
-
-                    # Achievements
-                    has_quantifiable_achievements=results['achievements']['has_achievements'],
-                    achievement_count=results['achievements']['count'],
-                    top_keywords=results['keywords'],
-
-                    # Stats
-                    word_count=results['word_count'],
-                    character_count=results['character_count'],
-
-                    # Full data
-                    full_scan_data=results
-                )
+                resume_obj = Resume.objects.create(**resume_fields_from_scan(results, file_path))
 
                 self.stdout.write(self.style.SUCCESS(f'\n✅ Resume saved to database (ID: {resume_obj.id})'))
 
-            # Display results
-            score = results['score']
-            self.stdout.write(f"\n{'OVERALL ATS SCORE':=^70}")
-
-            if score >= 80:
-                self.stdout.write(self.style.SUCCESS(f"\n🎯 SCORE: {score}/100"))
-                self.stdout.write(self.style.SUCCESS("✅ EXCELLENT - Highly ATS-compatible\n"))
-            elif score >= 60:
-                self.stdout.write(self.style.WARNING(f"\n🎯 SCORE: {score}/100"))
-                self.stdout.write(self.style.WARNING("⚠️  GOOD - ATS-compatible with improvements\n"))
-            else:
-                self.stdout.write(self.style.ERROR(f"\n🎯 SCORE: {score}/100"))
-                self.stdout.write(self.style.ERROR("❌ NEEDS WORK - Requires optimization\n"))
-
-            # Contact Info
-            self.stdout.write(f"\n{'CONTACT INFORMATION':-^70}")
-            contact = results['contact']
-            self.stdout.write(f"Name: {contact['name']}")
-
-            if contact['emails']:
-                self.stdout.write(self.style.SUCCESS(f"✓ Email: {', '.join(contact['emails'])}"))
-            else:
-                self.stdout.write(self.style.ERROR("✗ Email: NOT FOUND"))
-
-            if contact['phones']:
-                self.stdout.write(self.style.SUCCESS(f"✓ Phone: {', '.join(contact['phones'])}"))
-            else:
-                self.stdout.write(self.style.ERROR("✗ Phone: NOT FOUND"))
-
-            # Skills Summary
-            self.stdout.write(f"\n{'SKILLS SUMMARY':-^70}")
-            skills = results['skills']
-            self.stdout.write(f"Total Skills: {skills['total']}")
-            self.stdout.write(f"Technical: {len(skills['technical'])}")
-            if detailed:
-                self.stdout.write(f"Skills: {', '.join(skills['technical'][:10])}")
-
-            # Achievements
-            self.stdout.write(f"\n{'ACHIEVEMENTS':-^70}")
-            ach = results['achievements']
-            if ach['has_achievements']:
-                self.stdout.write(self.style.SUCCESS(f"✓ {ach['count']} quantifiable achievements"))
-            else:
-                self.stdout.write(self.style.WARNING("⚠️  No quantifiable achievements"))
-
-            self.stdout.write(f"\n{'=' * 70}\n")
+            self.display_results(results, detailed)
+            if profile:
+                self.display_profile([profile])
 
             if not no_save:
                 self.stdout.write(self.style.SUCCESS(f"✅ Data stored in database"))
@@ -450,4 +1029,213 @@ class Command(BaseCommand):
                 )
             raise CommandError(f"Missing dependency: {e}")
         except Exception as e:
-            raise CommandError(f"Error: {str(e)}")
\ No newline at end of file
+            raise CommandError(f"Error: {str(e)}")
+
+    def profiling(self, options):
+        return options.get('profile') or options.get('store_profile')
+
+    def extraction_limits(self, options):
+        return {
+            'max_pages': options.get('max_pages'),
+            'max_chars': options.get('max_chars'),
+            'max_seconds': options.get('max_seconds'),
+        }
+
+    def display_results(self, results, detailed=False):
+        score = results['score']
+        self.stdout.write(f"\n{'OVERALL ATS SCORE':=^70}")
+
+        if score >= 80:
+            self.stdout.write(self.style.SUCCESS(f"\n🎯 SCORE: {score}/100"))
+            self.stdout.write(self.style.SUCCESS("✅ EXCELLENT - Highly ATS-compatible\n"))
+        elif score >= 60:
+            self.stdout.write(self.style.WARNING(f"\n🎯 SCORE: {score}/100"))
+            self.stdout.write(self.style.WARNING("⚠️  GOOD - ATS-compatible with improvements\n"))
+        else:
+            self.stdout.write(self.style.ERROR(f"\n🎯 SCORE: {score}/100"))
+            self.stdout.write(self.style.ERROR("❌ NEEDS WORK - Requires optimization\n"))
+
+        # Contact Info
+        self.stdout.write(f"\n{'CONTACT INFORMATION':-^70}")
+        contact = results['contact']
+        self.stdout.write(f"Name: {contact['name']}")
+
+        if contact['emails']:
+            self.stdout.write(self.style.SUCCESS(f"✓ Email: {', '.join(contact['emails'])}"))
+        else:
+            self.stdout.write(self.style.ERROR("✗ Email: NOT FOUND"))
+
+        if contact['phones']:
+            self.stdout.write(self.style.SUCCESS(f"✓ Phone: {', '.join(contact['phones'])}"))
+        else:
+            self.stdout.write(self.style.ERROR("✗ Phone: NOT FOUND"))
+
+        # Skills Summary
+        self.stdout.write(f"\n{'SKILLS SUMMARY':-^70}")
+        skills = results['skills']
+        self.stdout.write(f"Total Skills: {skills['total']}")
+        self.stdout.write(f"Technical: {len(skills['technical'])}")
+        if detailed:
+            self.stdout.write(f"Skills: {', '.join(skills['technical'][:10])}")
+
+        # Achievements
+        self.stdout.write(f"\n{'ACHIEVEMENTS':-^70}")
+        ach = results['achievements']
+        if ach['has_achievements']:
+            self.stdout.write(self.style.SUCCESS(f"✓ {ach['count']} quantifiable achievements"))
+        else:
+            self.stdout.write(self.style.WARNING("⚠️  No quantifiable achievements"))
+
+        # Extraction
+        extraction = results.get('extraction')
+        if extraction and extraction['truncated']:
+            self.stdout.write(f"\n{'EXTRACTION':-^70}")
+            pages = (f"{extraction['pages_read']}/{extraction['pages_total']} pages, "
+                     if extraction['pages_total'] is not None else '')
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  Truncated by {extraction['truncated_by']}: read {pages}"
+                f"{extraction['characters']} characters"))
+
+        self.stdout.write(f"\n{'=' * 70}\n")
+
+    def display_profile(self, profiles):
+        """Print the stage breakdown of one scan, or the per-stage totals of many."""
+        totals = {}
+        for profile in profiles:
+            for stage in profile['stages']:
+                seconds, blocks = totals.get(stage['stage'], (0.0, 0))
+                totals[stage['stage']] = (seconds + stage['seconds'], blocks + stage['allocated_blocks'])
+        overall = sum(seconds for seconds, _ in totals.values()) or 1.0
+
+        title = 'STAGE PROFILE' if len(profiles) == 1 else f'STAGE PROFILE ({len(profiles)} scans)'
+        self.stdout.write(f"\n{title:-^70}")
+        self.stdout.write(f"{'Stage':<16} {'Time (ms)':>12} {'Share':>8} {'Alloc blocks':>14}")
+        for stage, (seconds, blocks) in totals.items():
+            self.stdout.write(f"{stage:<16} {seconds * 1000:>12.2f} {seconds / overall:>8.1%} {blocks:>14}")
+        self.stdout.write(f"{'total':<16} {overall * 1000:>12.2f}\n")
+
+    def collect_batch_paths(self, options):
+        paths = []
+        if options['directory']:
+            if not os.path.isdir(options['directory']):
+                raise CommandError(f"Directory not found: {options['directory']}")
+            for name in sorted(os.listdir(options['directory'])):
+                if os.path.splitext(name)[1].lower() in SCANNABLE_EXTENSIONS:
+                    paths.append(os.path.join(options['directory'], name))
+        if options['pattern']:
+            paths.extend(path for path in sorted(glob.glob(options['pattern'], recursive=True))
+                         if os.path.splitext(path)[1].lower() in SCANNABLE_EXTENSIONS)
+        if options['manifest']:
+            try:
+                with open(options['manifest'], 'r', encoding='utf-8') as manifest:
+                    paths.extend(line.strip() for line in manifest
+                                 if line.strip() and not line.lstrip().startswith('#'))
+            except OSError as e:
+                raise CommandError(f"Cannot read manifest: {e}")
+        # Keep the first occurrence of each path, in input order
+        return list(dict.fromkeys(paths))
+
+    def handle_batch(self, options):
+        no_save = options.get('no_save', False)
+        force = options.get('force', False)
+        paths = self.collect_batch_paths(options)
+        if not paths:
+            raise CommandError('No resumes found to scan')
+
+        failed = []
+
+        def save_failed(file_path, error):
+            failed.append((file_path, error))
+            self.stderr.write(self.style.ERROR(f'✗ {file_path}: Could not save: {error}'))
+
+        writer = None if no_save else ResumeBulkWriter(options['batch_size'], on_error=save_failed)
+
+        workers = max(1, min(options['workers'], len(paths)))
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanning {len(paths)} resumes with {workers} worker process(es)\n'))
+
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+
+        scanned = 0
+        cached = 0
+        duplicates = 0
+        profiles = []
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.extraction_limits(options), self.profiling(options))) as pool:
+            # A copy of a file scanned earlier in this batch would miss the cache
+            # (its row is still pending in the writer) and be inserted twice, so
+            # only the first file per content hash is scanned at all.
+            futures = {}
+            first_by_hash = {}
+            copies = {}
+            for path in paths:
+                try:
+                    content_hash = file_content_hash(path)
+                except OSError:
+                    content_hash = None  # the worker reports the error
+                if content_hash in first_by_hash:
+                    copies[first_by_hash[content_hash]].append(path)
+                    continue
+                if content_hash is not None:
+                    first_by_hash[content_hash] = path
+                    copies[path] = []
+                futures[pool.submit(_scan_in_worker, path, force)] = path
+
+            for future in as_completed(futures):
+                try:
+                    file_path, results, error = future.result()
+                except Exception as e:
+                    # The worker process itself died (e.g. killed by the OS)
+                    file_path, results, error = futures[future], None, f'Worker failed: {e}'
+
+                for copy in copies.get(file_path, ()):
+                    if error is not None:
+                        failed.append((copy, error))
+                        self.stderr.write(self.style.ERROR(f'✗ {copy}: {error}'))
+                    else:
+                        duplicates += 1
+                        self.stdout.write(self.style.SUCCESS(
+                            f"♻ {copy}: {results['score']}/100 (same contents as {file_path})"))
+
+                if error is None and self.profiling(options):
+                    profiles.append(results['profile'] if options['store_profile'] else results.pop('profile'))
+
+                if error is None and results.get('cached'):
+                    cached += 1
+                    self.stdout.write(self.style.SUCCESS(
+                        f"♻ {file_path}: {results['score']}/100 (cached, ID: {results['resume_id']})"))
+                    continue
+
+                if error is not None:
+                    failed.append((file_path, error))
+                    self.stderr.write(self.style.ERROR(f'✗ {file_path}: {error}'))
+                    continue
+
+                scanned += 1
+                extraction = results['extraction']
+                truncated = f" [truncated by {extraction['truncated_by']}]" if extraction['truncated'] else ''
+                self.stdout.write(self.style.SUCCESS(
+                    f"✓ {file_path}: {results['score']}/100{truncated}"))
+                if writer is not None:
+                    writer.add(results, file_path)
+
+        if writer is not None:
+            writer.flush()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"\n{'BATCH SUMMARY':=^70}")
+        self.stdout.write(f'Resumes: {len(paths)}')
+        self.stdout.write(self.style.SUCCESS(f'Scanned: {scanned}'))
+        if writer is not None:
+            self.stdout.write(self.style.SUCCESS(f'Saved to database: {writer.saved}'))
+        if cached:
+            self.stdout.write(f'Already scanned (cached): {cached}')
+        if duplicates:
+            self.stdout.write(f'Duplicates within this batch: {duplicates}')
+        if failed:
+            self.stdout.write(self.style.ERROR(f'Failed: {len(failed)}'))
+        self.stdout.write(f'Elapsed: {elapsed:.1f}s\n')
+        if profiles:
+            self.display_profile(profiles)
@@ -0,0 +1,89 @@
+"""
+Backfill the typed Jobs columns (salary, dates, remote flag, rating) from the
+scraped text fields, for rows ingested before those columns existed.
+
+Walks the table in primary-key order, one short transaction per chunk, so
+no lock is held for long and the command can be stopped and re-run at any
+point: only rows whose scraped_at is still NULL are touched. Every row it
+touches gets a scraped_at, even when jobs_scraped_at does not parse (see
+``fallback_scraped_at``), so a re-run never selects the same row again.
+
+This is a command rather than a data migration because home's migrations
+are generated per deployment (none are committed), so a RunPython step
+would have no migration to depend on. Also, running the backfill apart from
+``migrate`` keeps a long copy out of the deploy; the ingest path fills the
+typed columns for new rows in the meantime.
+
+Usage:
+    python manage.py backfill_job_columns
+    python manage.py backfill_job_columns --chunk-size 2000 --sleep 0.5
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from home.jobs_ingest import TYPED_FIELDS, parse_typed_columns
+from home.models import Jobs
+
+# Stored for rows with no usable timestamp at all, so they sort last in the
+# newest-first listing instead of being re-selected on every run
+UNKNOWN_SCRAPED_AT = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def fallback_scraped_at(row, posted_date):
+    """When a legacy row's jobs_scraped_at does not parse: its last write, else its posting day."""
+    if row['updated_at'] is not None:
+        return row['updated_at']
+    if posted_date is not None:
+        return datetime.combine(posted_date, datetime.min.time(), tzinfo=dt_timezone.utc)
+    return UNKNOWN_SCRAPED_AT
+
+
+class Command(BaseCommand):
+    help = 'Fill the typed Jobs columns from the scraped text fields, in small chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Rows updated per transaction (default: 1000)')
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Seconds to pause between chunks, to leave room for other writers')
+        parser.add_argument('--all', action='store_true',
+                            help='Re-parse every row, not just the ones never backfilled')
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        rows = Jobs.objects.all() if options['all'] else Jobs.objects.filter(scraped_at__isnull=True)
+        sources = sorted(set(TYPED_FIELDS.values()))
+
+        done = 0
+        last_id = None
+        started = time.perf_counter()
+        while True:
+            chunk = rows.order_by('id')
+            if last_id is not None:
+                chunk = chunk.filter(id__gt=last_id)
+            chunk = list(chunk.values('id', 'updated_at', *sources)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1]['id']
+
+            # Only the text sources are blanked; updated_at stays a datetime or None in ``chunk``
+            frame = pd.DataFrame(chunk, columns=sources)
+            typed = parse_typed_columns({field: frame[field].fillna('').astype(str) for field in sources})
+            jobs = [Jobs(id=row['id'], **{field: typed[field][index] for field in TYPED_FIELDS})
+                    for index, row in enumerate(chunk)]
+            for job, row in zip(jobs, chunk):
+                if job.scraped_at is None:
+                    job.scraped_at = fallback_scraped_at(row, job.posted_date)
+            with transaction.atomic():
+                Jobs.objects.bulk_update(jobs, list(TYPED_FIELDS))
+
+            done += len(jobs)
+            self.stdout.write(f'{done} rows backfilled ({time.perf_counter() - started:.1f}s)')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Backfill complete: {done} rows'))
@@ -0,0 +1,38 @@
+"""
+Fill the JobSkill table for jobs loaded before it existed.
+
+scrape_jobs fills it for every batch it loads; this covers older rows, or
+all rows after the skill taxonomy changed. Works in primary-key order, one
+short transaction per chunk, so it can be stopped and re-run. Jobs already
+extracted (``skill_count`` set) are skipped, even if they mention no skills.
+
+Usage:
+    python manage.py backfill_job_skills
+    python manage.py backfill_job_skills --all
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.job_skills import populate_job_skills
+from home.models import Jobs
+
+
+class Command(BaseCommand):
+    help = 'Extract each job\'s technical skills into the JobSkill table, in small chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Jobs processed per transaction (default: 1000)')
+        parser.add_argument('--all', action='store_true',
+                            help='Re-extract every job, not just the ones not extracted yet')
+
+    def handle(self, *args, **options):
+        jobs = Jobs.objects.all() if options['all'] else Jobs.objects.filter(skill_count__isnull=True)
+        started = time.perf_counter()
+
+        def progress(done, rows):
+            self.stdout.write(f'{done} jobs, {rows} skills ({time.perf_counter() - started:.1f}s)')
+
+        done, rows = populate_job_skills(jobs, max(1, options['chunk_size']), on_progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Backfill complete: {done} jobs, {rows} skills'))
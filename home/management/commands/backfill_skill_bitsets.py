@@ -0,0 +1,51 @@
+"""
+Backfill Resume.skill_bitset from the stored technical_skills lists.
+
+Resumes scanned before the bitset column existed have it NULL and are left
+out of candidate ranking until this runs. Walks the table in primary-key
+order, one short transaction per chunk, so it can be stopped and re-run.
+
+Usage:
+    python manage.py backfill_skill_bitsets
+    python manage.py backfill_skill_bitsets --all   # after a taxonomy change
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from home.models import Resume
+from home.skill_bitsets import encode_skills
+
+
+class Command(BaseCommand):
+    help = 'Encode each resume\'s technical skills as a skill bitset, in small chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Rows updated per transaction (default: 1000)')
+        parser.add_argument('--all', action='store_true',
+                            help='Re-encode every resume, not just the ones without a bitset')
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        rows = Resume.objects.all() if options['all'] else Resume.objects.filter(skill_bitset__isnull=True)
+
+        done = 0
+        last_id = 0
+        started = time.perf_counter()
+        while True:
+            chunk = list(rows.filter(id__gt=last_id).order_by('id').values_list('id', 'technical_skills')[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+
+            resumes = [Resume(id=resume_id, skill_bitset=encode_skills(skills or []))
+                       for resume_id, skills in chunk]
+            with transaction.atomic():
+                Resume.objects.bulk_update(resumes, ['skill_bitset'])
+
+            done += len(resumes)
+            self.stdout.write(f'{done} resumes encoded ({time.perf_counter() - started:.1f}s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfill complete: {done} resumes'))
@@ -0,0 +1,57 @@
+"""
+Build the TF-IDF matrix of job descriptions used to rank jobs by similarity
+to a resume (see home/job_vectors.py).
+
+With no options the whole Jobs table is vectorized into a fresh base
+segment. --batch appends a segment for one scrape batch, and --new appends
+one for every batch that is not in the matrix yet.
+
+Usage:
+    python manage.py build_job_vectors
+    python manage.py build_job_vectors --new
+    python manage.py build_job_vectors --batch 3f2c... --batch 9a41...
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.job_vectors import append_batch, get_job_vectors, indexed_batches, rebuild, vectors_directory
+from home.models import Jobs
+
+
+class Command(BaseCommand):
+    help = 'Build or extend the TF-IDF matrix of job descriptions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', action='append', default=[], metavar='BATCH_ID',
+                            help='Append the jobs of this scrape batch (repeatable)')
+        parser.add_argument('--new', action='store_true',
+                            help='Append every batch that has not been vectorized yet')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Jobs read per query during a full rebuild (default: 2000)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        batches = list(options['batch'])
+        if options['new']:
+            done = indexed_batches()
+            batches += sorted(batch for batch in Jobs.objects.order_by().values_list('batch_id', flat=True).distinct()
+                              if batch and batch not in done and batch not in batches)
+
+        if batches:
+            for batch_id in batches:
+                count = append_batch(batch_id)
+                self.stdout.write(f'Batch {batch_id}: {count} jobs appended')
+        elif options['new']:
+            self.stdout.write('No new batches')
+        else:
+            def progress(done):
+                self.stdout.write(f'{done} jobs vectorized ({time.perf_counter() - started:.1f}s)')
+
+            rebuild(max(1, options['chunk_size']), on_progress=progress)
+
+        vectors = get_job_vectors()
+        self.stdout.write(self.style.SUCCESS(
+            f'{vectors.job_count} jobs in {len(vectors.segments)} segment(s) at {vectors_directory()} '
+            f'({time.perf_counter() - started:.1f}s)'
+        ))
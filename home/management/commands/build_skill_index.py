@@ -0,0 +1,37 @@
+"""
+Rebuild the resume-to-job skill index from the whole Jobs table.
+
+scrape_jobs appends a segment per batch as it ingests; run this to index
+jobs loaded before the index existed, or to compact the appended segments
+back into a single base segment.
+
+Usage:
+    python manage.py build_skill_index
+    python manage.py build_skill_index --chunk-size 5000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.skill_index import SkillIndex, index_directory, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the inverted skill index used to match resumes to jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Jobs read per query (default: 2000)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(done):
+            self.stdout.write(f'{done} jobs indexed ({time.perf_counter() - started:.1f}s)')
+
+        count = rebuild(max(1, options['chunk_size']), on_progress=progress)
+        index = SkillIndex.load()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {count} jobs into {index_directory()}: '
+            f'{len(index.vocabulary)} skills, {len(index.postings)} postings'
+        ))
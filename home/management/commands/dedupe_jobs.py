@@ -0,0 +1,44 @@
+"""
+Group near-duplicate jobs (the same posting scraped from several sites)
+under one canonical job id; see home/dedup.py.
+
+scrape_jobs dedupes each batch as it loads it. Run this once for jobs loaded
+before, or to dedupe a particular batch again.
+
+Usage:
+    python manage.py dedupe_jobs
+    python manage.py dedupe_jobs --batch 3f2c...
+    python manage.py dedupe_jobs --all
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.dedup import JobDeduplicator
+from home.models import Jobs
+
+
+class Command(BaseCommand):
+    help = 'Find near-duplicate jobs with MinHash/LSH and set their canonical_id'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', metavar='BATCH_ID', help='Only the jobs of this scrape batch')
+        parser.add_argument('--all', action='store_true',
+                            help='Every job, not just the ones never deduplicated')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Jobs compared per transaction (default: 1000)')
+
+    def handle(self, *args, **options):
+        if options['batch']:
+            jobs = Jobs.objects.filter(batch_id=options['batch'])
+        elif options['all']:
+            jobs = Jobs.objects.all()
+        else:
+            jobs = Jobs.objects.filter(canonical_id__isnull=True)
+
+        started = time.perf_counter()
+        deduplicator = JobDeduplicator(max(1, options['chunk_size'])).run(jobs)
+        self.stdout.write(self.style.SUCCESS(
+            f'{deduplicator.processed} jobs checked, {deduplicator.duplicates} duplicates found '
+            f'({time.perf_counter() - started:.1f}s)'
+        ))
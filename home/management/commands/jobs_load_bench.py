@@ -0,0 +1,108 @@
+"""
+Throughput benchmark for the Jobs loaders.
+
+Builds a synthetic scraped DataFrame (50k rows by default, with multi-KB
+descriptions) and loads it three ways, each inside a transaction that is
+rolled back so the table is left untouched:
+
+    orm    one exists() + create() per row (the original scrape_jobs path)
+    bulk   JobsIngester: chunked bulk_create / ON CONFLICT upserts
+    copy   CopyJobsLoader: COPY into an unlogged staging table + one upsert
+           (PostgreSQL only)
+
+Usage:
+    python manage.py jobs_load_bench
+    python manage.py jobs_load_bench --rows 10000 --orm-rows 1000
+"""
+import random
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from home.jobs_ingest import JOB_COLUMNS, CopyJobsLoader, JobsIngester, clean_jobs_frame
+from home.models import Jobs
+
+WORDS = ('data pipeline spark python sql airflow kafka cloud warehouse team build maintain '
+         'design scalable reliable batch streaming analytics platform engineer experience').split()
+
+
+def synthetic_jobs_frame(rows, seed=7):
+    """A DataFrame shaped like a jobspy result, with realistic field widths."""
+    rng = random.Random(seed)
+
+    def text(words):
+        return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+    return pd.DataFrame([{
+        'id': f'bench-{index}',
+        'site': rng.choice(['indeed', 'linkedin', 'zip_recruiter', 'google']),
+        'job_url': f'https://jobs.example.com/view/{index}',
+        'job_url_direct': f'https://careers.example.com/{index}',
+        'title': text(5).title(),
+        'company': f'Company {rng.randint(1, 2000)}',
+        'location': rng.choice(['Pune, MH, IN', 'Mumbai, MH, IN', 'Bengaluru, KA, IN']),
+        'date_posted': f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+        'job_type': rng.choice(['fulltime', 'contract', None]),
+        'min_amount': rng.choice([None, float(rng.randint(5, 20) * 100000)]),
+        'max_amount': rng.choice([None, float(rng.randint(20, 40) * 100000)]),
+        'currency': 'INR',
+        'is_remote': rng.random() < 0.3,
+        'description': text(rng.randint(300, 700)),
+        'company_description': text(80),
+        'company_rating': round(rng.uniform(2.5, 5.0), 1),
+    } for index in range(rows)])
+
+
+class Command(BaseCommand):
+    help = 'Compare per-row ORM, bulk_create and COPY throughput for loading Jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='Rows in the synthetic frame (default: 50000)')
+        parser.add_argument('--orm-rows', type=int, default=2000,
+                            help='Rows loaded by the slow per-row ORM path (default: 2000)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per bulk_create (default: 1000)')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        self.stdout.write(f"\n{'JOBS LOADER BENCHMARK':=^70}")
+        self.stdout.write(f'Database: {connection.vendor}, synthetic rows: {rows}\n')
+
+        jobs_df = synthetic_jobs_frame(rows)
+        started = time.perf_counter()
+        records = clean_jobs_frame(jobs_df, str(uuid.uuid4()), datetime.now().isoformat())
+        self.report('clean (column-wise)', rows, time.perf_counter() - started)
+
+        orm_rows = min(rows, options['orm_rows'])
+        self.report('orm (exists + create)', orm_rows, self.timed(lambda: self.load_per_row(records[:orm_rows])))
+        self.report('bulk (bulk_create)', rows,
+                    self.timed(lambda: JobsIngester(options['chunk_size']).ingest(records)))
+        if connection.vendor == 'postgresql':
+            self.report('copy (COPY + upsert)', rows,
+                        self.timed(lambda: CopyJobsLoader(options['chunk_size']).ingest(records)))
+        else:
+            self.stdout.write(self.style.WARNING('copy: skipped, needs PostgreSQL'))
+        self.stdout.write(f"{'=' * 70}\n")
+
+    def timed(self, load):
+        # Roll back afterwards so every loader starts from the same table
+        with transaction.atomic():
+            started = time.perf_counter()
+            load()
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return elapsed
+
+    def load_per_row(self, records):
+        for record in records:
+            fields = dict(zip(JOB_COLUMNS, record))
+            if fields['job_url'] and Jobs.objects.filter(job_url=fields['job_url']).exists():
+                continue
+            with transaction.atomic():
+                Jobs.objects.create(**fields)
+
+    def report(self, name, rows, seconds):
+        self.stdout.write(f'{name:<24} {rows:>8} rows {seconds:>9.2f}s {rows / seconds if seconds else 0:>12,.0f} rows/s')
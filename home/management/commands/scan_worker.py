@@ -0,0 +1,145 @@
+"""
+Background worker for resumes uploaded through the resume analyzer.
+
+Claims queued ScanJob rows with SELECT ... FOR UPDATE SKIP LOCKED, so any
+number of workers (on any number of hosts) can drain the same queue, and
+runs IndustryATSScanner on them in a process pool.
+
+Usage:
+    python manage.py scan_worker
+    python manage.py scan_worker --workers 4 --poll 2
+    python manage.py scan_worker --once
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from home.management.commands.ats_resume_scan import (
+    _init_worker, _scan_in_worker, resume_fields_from_scan,
+)
+from home.models import Resume, ScanJob
+
+
+class Command(BaseCommand):
+    help = 'Claim queued resume scan jobs and run them in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of scanner processes (default: CPU count)')
+        parser.add_argument('--poll', type=float, default=2.0,
+                            help='Seconds to wait between queue polls when idle')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty instead of polling forever')
+        parser.add_argument('--stale-after', type=int, default=900,
+                            help='Requeue jobs left running this many seconds by a dead worker')
+        parser.add_argument('--recover-every', type=float, default=60.0,
+                            help='Seconds between checks for stale jobs (default: 60)')
+        parser.add_argument('--max-attempts', type=int, default=3,
+                            help='Fail a stale job instead of requeueing it after this many attempts')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        poll = options['poll']
+
+        self.stdout.write(self.style.SUCCESS(f'Scan worker started with {workers} process(es)'))
+
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+
+        in_flight = {}
+        recovered_at = None
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=({},)) as pool:
+            try:
+                while True:
+                    # Checked all along, not just at startup: another worker may die while this one runs
+                    if recovered_at is None or time.monotonic() - recovered_at >= options['recover_every']:
+                        self.recover_stale_jobs(options['stale_after'], options['max_attempts'])
+                        recovered_at = time.monotonic()
+
+                    free = workers - len(in_flight)
+                    if free > 0:
+                        for job in self.claim_jobs(free):
+                            future = pool.submit(_scan_in_worker, job.file.path)
+                            in_flight[future] = job
+                            self.stdout.write(f'→ job {job.id}: {job.original_name}')
+
+                    if not in_flight:
+                        if options['once']:
+                            break
+                        time.sleep(poll)
+                        continue
+
+                    done, _ = wait(in_flight, timeout=poll, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.finish_job(in_flight.pop(future), future)
+            except KeyboardInterrupt:
+                # Hand unfinished jobs back to the queue for the next worker
+                ScanJob.objects.filter(pk__in=[job.pk for job in in_flight.values()]).update(
+                    status=ScanJob.STATUS_QUEUED, started_at=None)
+                self.stdout.write(self.style.WARNING(
+                    f'\nStopping; requeued {len(in_flight)} unfinished job(s)'))
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def claim_jobs(self, limit):
+        """Atomically move up to ``limit`` queued jobs to running and return them."""
+        with transaction.atomic():
+            jobs = list(ScanJob.objects
+                        .select_for_update(skip_locked=True)
+                        .filter(status=ScanJob.STATUS_QUEUED)
+                        .order_by('created_at')[:limit])
+            if jobs:
+                ScanJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                    status=ScanJob.STATUS_RUNNING,
+                    started_at=timezone.now(),
+                    attempts=F('attempts') + 1,
+                )
+        return jobs
+
+    def finish_job(self, job, future):
+        try:
+            _, results, error = future.result()
+        except Exception as e:
+            results, error = None, f'Worker failed: {e}'
+
+        resume_id = None
+        if error is None:
+            try:
+                # One transaction, so a crash between the two writes cannot leave
+                # a Resume behind that the retry of this job would then duplicate
+                with transaction.atomic():
+                    if results.get('cached'):
+                        resume_id = results['resume_id']
+                    else:
+                        fields = resume_fields_from_scan(results, job.file.path)
+                        fields['file_name'] = job.original_name
+                        resume_id = Resume.objects.create(**fields).id
+                    ScanJob.objects.filter(pk=job.pk).update(
+                        status=ScanJob.STATUS_DONE, resume_id=resume_id, error=None,
+                        finished_at=timezone.now())
+            except Exception as e:
+                error = f'Could not save: {e}'
+
+        if error is None:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ job {job.id}: {results['score']}/100 (Resume ID: {resume_id})"))
+        else:
+            ScanJob.objects.filter(pk=job.pk).update(
+                status=ScanJob.STATUS_FAILED, error=error, finished_at=timezone.now())
+            self.stderr.write(self.style.ERROR(f'✗ job {job.id}: {error}'))
+
+    def recover_stale_jobs(self, stale_after, max_attempts):
+        cutoff = timezone.now() - timedelta(seconds=stale_after)
+        stale = ScanJob.objects.filter(status=ScanJob.STATUS_RUNNING, started_at__lt=cutoff)
+        failed = stale.filter(attempts__gte=max_attempts).update(
+            status=ScanJob.STATUS_FAILED, error='Gave up after repeated worker failures',
+            finished_at=timezone.now())
+        requeued = stale.update(status=ScanJob.STATUS_QUEUED, started_at=None)
+        if failed or requeued:
+            self.stdout.write(self.style.WARNING(
+                f'Recovered stale jobs: {requeued} requeued, {failed} failed'))
@@ -1,151 +1,336 @@
 import csv
+import json
+import math
+import os
+import queue
+import threading
 import uuid
-import hashlib
 import time
-from django.core.management.base import BaseCommand
-from django.db import transaction
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
 from jobspy import scrape_jobs
-from home.models import Jobs
+from home.dedup import dedupe_batch
+from home.job_skills import populate_batch
+from home.jobs_ingest import clean_jobs_frame, make_ingester
+from home.models import Jobs, ScrapeWatermark
+from home.scraping import SiteLimiter, build_tasks, fan_out, limited_call
+from home.skill_index import index_batch
 from datetime import datetime
 
+DEFAULT_TERMS = ['data engineer']
+DEFAULT_LOCATIONS = ['Pune, Maharashtra, India']
+DEFAULT_SITES = ["indeed", "linkedin", "zip_recruiter", "google"]
+
+# Sites whose results are known to come back newest first. Only for these does an
+# incremental scrape stop at the first page holding an already-stored posting;
+# for any other site, newer postings may still follow that page. None is listed
+# by default: add a site (here or with "newest_first_sites" in --config) only
+# after checking its ordering for the hours_old searches this command makes.
+DEFAULT_NEWEST_FIRST_SITES = []
+
+# Per-site request limits; LinkedIn blocks bursts quickly, so it gets one request at a time
+DEFAULT_SITE_LIMITS = {
+    'indeed': {'concurrency': 2, 'min_interval': 1.0},
+    'linkedin': {'concurrency': 1, 'min_interval': 5.0},
+    'zip_recruiter': {'concurrency': 2, 'min_interval': 2.0},
+    'google': {'concurrency': 2, 'min_interval': 2.0},
+}
+
+
 class Command(BaseCommand):
     help = 'Scrapes job data and saves it to the database'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--term', dest='terms', action='append',
+                            help='Search term (repeatable; default: "data engineer")')
+        parser.add_argument('--location', dest='locations', action='append',
+                            help='Location (repeatable; default: "Pune, Maharashtra, India")')
+        parser.add_argument('--site', dest='sites', action='append', choices=DEFAULT_SITES,
+                            help='Site to scrape (repeatable; default: all four)')
+        parser.add_argument('--config', help=(
+            'JSON file with any of: terms, locations, sites, results_wanted, hours_old, '
+            'country_indeed, site_limits ({"linkedin": {"concurrency": 1, "min_interval": 5}}), '
+            'newest_first_sites (sites whose incremental scrapes may stop at already-seen postings). '
+            'Command-line options take precedence.'))
+        parser.add_argument('--results-wanted', type=int, help='Results per sub-scrape (default: 10000)')
+        parser.add_argument('--hours-old', type=int,
+                            help='Largest window to ask for, and the window for first scrapes (default: 200)')
+        parser.add_argument('--overlap-hours', type=float, default=2.0,
+                            help='Hours added to the time since the last scrape, to cover late postings (default: 2)')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Results per request, and rows cleaned and saved at a time (default: 500)')
+        parser.add_argument('--loader', choices=['auto', 'copy', 'orm'], default='auto',
+                            help='How rows are written: COPY on PostgreSQL, bulk ORM upserts otherwise (default: auto)')
+        parser.add_argument('--load-from', metavar='CSV',
+                            help='Re-ingest a backup CSV from an earlier run instead of scraping')
+        parser.add_argument('--full', action='store_true',
+                            help='Ignore watermarks: scrape the whole --hours-old window without stopping early')
+        parser.add_argument('--country-indeed', help='Country for Indeed searches (default: India)')
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Sub-scrapes running at once per site, if its site limit allows that many (default: 8)')
+        parser.add_argument('--retries', type=int, default=3, help='Retries per failed page request (default: 3)')
+        parser.add_argument('--backoff', type=float, default=2.0,
+                            help='Seconds before the first retry, doubling after each (default: 2)')
+
+    def load_config(self, options):
+        config = {}
+        if options['config']:
+            try:
+                with open(options['config'], 'r', encoding='utf-8') as file:
+                    config = json.load(file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read config {options['config']}: {e}")
+
+        site_limits = {site: dict(limits) for site, limits in DEFAULT_SITE_LIMITS.items()}
+        for site, limits in config.get('site_limits', {}).items():
+            site_limits.setdefault(site, {}).update(limits)
+
+        return {
+            'terms': options['terms'] or config.get('terms') or DEFAULT_TERMS,
+            'locations': options['locations'] or config.get('locations') or DEFAULT_LOCATIONS,
+            'sites': options['sites'] or config.get('sites') or DEFAULT_SITES,
+            'results_wanted': options['results_wanted'] or config.get('results_wanted', 10000),
+            'hours_old': options['hours_old'] or config.get('hours_old', 200),
+            'country_indeed': options['country_indeed'] or config.get('country_indeed', 'India'),
+            'site_limits': site_limits,
+            'newest_first_sites': set(config.get('newest_first_sites', DEFAULT_NEWEST_FIRST_SITES)),
+        }
+
     def handle(self, *args, **options):
-        # Fixed parameters
-        search_term = 'data engineer'
-        location = 'Pune, Maharashtra, India'
-        results_wanted = 10000
+        self.chunk_size = max(1, options['chunk_size'])
 
         # Generate batch ID for this scraping session
         batch_id = str(uuid.uuid4())
         scraped_at = datetime.now().isoformat()
 
-        self.stdout.write(f'Starting job scraping for: {search_term}')
+        def report_error(index, error):
+            self.stderr.write(f"Error creating job (row {index}): {error}")
 
-        # Scrape jobs
-        try:
-            jobs_df = scrape_jobs(
-                site_name=["indeed", "linkedin", "zip_recruiter", "google"],
-                search_term=search_term,
-                google_search_term=f"{search_term} jobs near {location} since yesterday",
-                location=location,
-                results_wanted=results_wanted,
-                hours_old=200,
-                country_indeed='India',
-            )
+        def report_fallback(error):
+            self.stderr.write(self.style.WARNING(f"COPY load failed, retrying chunk through the ORM: {error}"))
 
+        self.ingester = make_ingester(options['loader'], on_error=report_error, on_fallback=report_fallback)
+        self.ingest_seconds = 0.0
+        started = time.perf_counter()
+
+        if options['load_from']:
+            summary = self.load_backup(options['load_from'], batch_id, scraped_at)
+            filename = None
+        else:
             timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
             filename = f"jobs_{timestamp}.csv"
+            summary = self.scrape(options, batch_id, scraped_at, filename)
+
+        # Jobs this batch created or changed are grouped with their duplicates
+        # from other sites, get their JobSkill rows and go into a new skill
+        # index segment
+        duplicates = dedupe_batch(batch_id).duplicates
+        _, job_skills = populate_batch(batch_id)
+        indexed = index_batch(batch_id)
+        elapsed = time.perf_counter() - started
 
-            # Save to CSV for backup
+        # Summary
+        self.stdout.write(self.style.SUCCESS(
+            f'\n=== Scraping Summary ===\n'
+            f'{summary}'
+            f'Created: {self.ingester.created}\n'
+            f'Updated: {self.ingester.updated}\n'
+            f'Skipped (unchanged): {self.ingester.skipped}\n'
+            f'Errors: {self.ingester.errors}\n'
+            f'Cross-site duplicates: {duplicates}\n'
+            f'Job skills: {job_skills}\n'
+            f'Skill-indexed: {indexed}\n'
+            f'Elapsed: {elapsed:.1f}s (saving: {self.ingest_seconds:.1f}s)\n'
+            + (f'Backup: {filename if os.path.exists(filename) else "none"}\n' if filename else '') +
+            f'Batch ID: {batch_id}\n'
+        ))
+
+    def ingest_chunk(self, jobs_df, batch_id, scraped_at, backup=None):
+        """Back up and upsert one chunk of scraped rows; returns (created, updated, errors)."""
+        if backup:
+            # Append to one CSV backup for the whole run
             jobs_df.to_csv(
-                filename,
+                backup,
                 sep="|",
                 quoting=csv.QUOTE_NONNUMERIC,
                 escapechar="\\",
-                index=False
+                index=False,
+                mode='a',
+                header=not os.path.exists(backup),
             )
-            self.stdout.write(self.style.SUCCESS(f'Saved {len(jobs_df)} jobs to {filename}'))
-
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f'Error during scraping: {e}'))
-            return
-
-        # Save to database
-        created_count = 0
-        skipped_count = 0
-        error_count = 0
-
-        # Helper function to truncate long strings
-        def safe_str(value, max_length=1000000):
-            """Convert value to string and truncate if needed"""
-            if value is None or (isinstance(value, float) and value != value):  # Check for NaN
-                return ''
-            text = str(value)
-            return text[:max_length] if len(text) > max_length else text
-
-        # Generate unique IDs
-        def generate_job_id(row, index):
-            """Generate a unique ID for the job"""
-            # Try to use existing ID from scraper
-            raw_id = row.get('id')
-            if raw_id is not None and not (isinstance(raw_id, float) and raw_id != raw_id):  # Not None and not NaN
-                str_id = str(raw_id).strip()
-                if str_id:  # Not empty after stripping
-                    return str_id[:255]  # Ensure it fits in the field
-
-            # Create ID from job_url if available
-            job_url = row.get('job_url')
-            if job_url is not None and str(job_url).strip():
-                # Use hash of URL for consistent ID
-                url_hash = hashlib.md5(str(job_url).encode()).hexdigest()[:16]
-                return f"job-{url_hash}"
-
-            # Fallback: create ID from batch_id, index and timestamp
-            timestamp = str(int(time.time() * 1000000))[-10:]
-            return f"{batch_id[:8]}-{index:04d}-{timestamp}"
-
-        for index, row in jobs_df.iterrows():
+        created, updated, errors = self.ingester.created, self.ingester.updated, self.ingester.errors
+        ingest_started = time.perf_counter()
+        self.ingester.ingest(clean_jobs_frame(jobs_df, batch_id, scraped_at))
+        self.ingest_seconds += time.perf_counter() - ingest_started
+        return (self.ingester.created - created, self.ingester.updated - updated,
+                self.ingester.errors - errors)
+
+    def load_backup(self, path, batch_id, scraped_at):
+        """Re-ingest a pipe-delimited backup CSV written by an earlier run, a chunk at a time."""
+        if not os.path.exists(path):
+            raise CommandError(f'Backup not found: {path}')
+        self.stdout.write(f'Loading {path} in chunks of {self.chunk_size}')
+
+        rows = 0
+        # Read every value as text, as it was scraped; only empty fields are missing
+        for chunk in pd.read_csv(path, sep='|', escapechar='\\', dtype=str, keep_default_na=False,
+                                 na_values=[''], chunksize=self.chunk_size):
+            rows += len(chunk)
+            created, updated, _ = self.ingest_chunk(chunk, batch_id, scraped_at)
+            self.stdout.write(f'{rows} rows read, {created} new, {updated} updated')
+        return f'Loaded from: {path}\nTotal rows: {rows}\n'
+
+    def scrape(self, options, batch_id, scraped_at, filename):
+        config = self.load_config(options)
+        tasks = build_tasks(config['terms'], config['locations'], config['sites'])
+
+        self.stdout.write(
+            f"Starting {len(tasks)} sub-scrape(s): {len(config['terms'])} term(s) × "
+            f"{len(config['locations'])} location(s) × {len(config['sites'])} site(s)")
+
+        watermarks = {} if options['full'] else self.load_watermarks(tasks)
+        windows = {task: self.window_hours(watermarks.get(task), config['hours_old'], options['overlap_hours'])
+                   for task in tasks}
+        incremental = sum(1 for task in tasks if task in watermarks)
+        if incremental:
+            self.stdout.write(f'{incremental} sub-scrape(s) resume from their last watermark')
+
+        # Pages travel from the scraping threads to this thread through a bounded
+        # queue: scrapers block while it is full, so at most a few chunks are in
+        # memory however many results are wanted
+        events = queue.Queue(maxsize=max(2, options['workers']))
+        # Set once this thread stops reading the queue (e.g. a chunk failed to
+        # save), so the scrapers give up instead of blocking on it forever
+        stop = threading.Event()
+
+        def emit(event):
+            """Queue ``event`` for this thread; False once it has stopped reading."""
+            while not stop.is_set():
+                try:
+                    events.put(event, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        limiters = {site: SiteLimiter(**limits) for site, limits in config['site_limits'].items()}
+
+        def fetch(task):
+            started_at = timezone.now()
+            fetched, stopped_early, offset = 0, False, 0
+            limiter = limiters.get(task.site)
+
+            def report_retry(attempt, error, delay):
+                self.stderr.write(self.style.WARNING(
+                    f'Retrying {task} at offset {offset} (attempt {attempt}) in {delay:.1f}s: {error}'))
+
+            try:
+                while offset < config['results_wanted'] and not stop.is_set():
+                    # One request per page, retried on its own: a failure never
+                    # re-fetches (and re-emits) the pages before it
+                    page = limited_call(limiter, lambda: scrape_jobs(
+                        site_name=[task.site],
+                        search_term=task.term,
+                        google_search_term=f"{task.term} jobs near {task.location} since yesterday",
+                        location=task.location,
+                        results_wanted=min(self.chunk_size, config['results_wanted'] - offset),
+                        hours_old=windows[task],
+                        country_indeed=config['country_indeed'],
+                        offset=offset,
+                    ), options['retries'], options['backoff'], report_retry)
+                    if page.empty:
+                        break
+                    if not emit(('page', task, page)):
+                        break
+                    fetched += len(page)
+                    offset += len(page)
+                    # On a site that lists newest postings first, a page holding URLs we
+                    # already have means everything after it was seen by an earlier run
+                    if task in watermarks and task.site in config['newest_first_sites'] and 'job_url' in page:
+                        urls = page['job_url'].dropna().astype(str).tolist()
+                        if urls and Jobs.objects.filter(job_url__in=urls).exists():
+                            stopped_early = True
+                            break
+                    if len(page) < self.chunk_size:
+                        break
+            finally:
+                # Worker threads get their own connection; don't leave it open
+                connection.close()
+            return started_at, fetched, stopped_early
+
+        def run_scrapes():
             try:
-                # Check if job already exists (by job_url to avoid duplicates)
-                job_url = safe_str(row.get('job_url', ''))
-                if job_url and Jobs.objects.filter(job_url=job_url).exists():
-                    skipped_count += 1
+                for task, result, error in fan_out(tasks, fetch, options['workers'], limiters):
+                    if not emit(('done', task, result, error)):
+                        break
+            finally:
+                emit(None)
+
+        threading.Thread(target=run_scrapes, name='scrape-fan-out', daemon=True).start()
+
+        counts = {task: [0, 0, 0] for task in tasks}
+        failed_tasks = 0
+        total_scraped = 0
+        # Each chunk is saved as soon as it arrives, while the scrapes keep running
+        try:
+            while (event := events.get()) is not None:
+                if event[0] == 'page':
+                    _, task, page = event
+                    for start in range(0, len(page), self.chunk_size):
+                        created, updated, errors = self.ingest_chunk(page.iloc[start:start + self.chunk_size],
+                                                                     batch_id, scraped_at, filename)
+                        counts[task][0] += created
+                        counts[task][1] += updated
+                        counts[task][2] += errors
                     continue
 
-                # Create Jobs object with transaction per record
-                with transaction.atomic():
-                    Jobs.objects.create(
-                        id=generate_job_id(row, index),
-                        site=safe_str(row.get('site', '')),
-                        job_url=job_url,
-                        job_url_direct=safe_str(row.get('job_url_direct', '')),
-                        title=safe_str(row.get('title', '')),
-                        company=safe_str(row.get('company', '')),
-                        location=safe_str(row.get('location', '')),
-                        date_posted=safe_str(row.get('date_posted', '')),
-                        job_type=safe_str(row.get('job_type', '')),
-                        salary_source=safe_str(row.get('salary_source', '')),
-                        interval=safe_str(row.get('interval', '')),
-                        min_amount=safe_str(row.get('min_amount', '')),
-                        max_amount=safe_str(row.get('max_amount', '')),
-                        currency=safe_str(row.get('currency', '')),
-                        is_remote=safe_str(row.get('is_remote', '')),
-                        job_level=safe_str(row.get('job_level', '')),
-                        job_function=safe_str(row.get('job_function', '')),
-                        listing_type=safe_str(row.get('listing_type', '')),
-                        emails=safe_str(row.get('emails', '')),
-                        description=safe_str(row.get('description', ''), max_length=5000),
-                        company_industry=safe_str(row.get('company_industry', '')),
-                        company_url=safe_str(row.get('company_url', '')),
-                        company_logo=safe_str(row.get('company_logo', '')),
-                        company_url_direct=safe_str(row.get('company_url_direct', '')),
-                        company_addresses=safe_str(row.get('company_addresses', '')),
-                        company_num_employees=safe_str(row.get('company_num_employees', '')),
-                        company_revenue=safe_str(row.get('company_revenue', '')),
-                        company_description=safe_str(row.get('company_description', ''), max_length=1000),
-                        skills=safe_str(row.get('skills', ''), max_length=1000),
-                        experience_range=safe_str(row.get('experience_range', '')),
-                        company_rating=safe_str(row.get('company_rating', '')),
-                        company_reviews_count=safe_str(row.get('company_reviews_count', '')),
-                        vacancy_count=safe_str(row.get('vacancy_count', '')),
-                        work_from_home_type=safe_str(row.get('work_from_home_type', '')),
-                        jobs_scraped_at=scraped_at,
-                        batch_id=batch_id,
-                    )
-                created_count += 1
-
-            except Exception as e:
-                error_count += 1
-                self.stderr.write(f"Error creating job (row {index}): {e}")
+                _, task, result, error = event
+                if error is not None:
+                    failed_tasks += 1
+                    self.stderr.write(self.style.ERROR(f'Error during scraping {task}: {error}'))
+                    continue
 
-        # Summary
-        self.stdout.write(self.style.SUCCESS(
-            f'\n=== Scraping Summary ===\n'
-            f'Total scraped: {len(jobs_df)}\n'
-            f'Created: {created_count}\n'
-            f'Skipped (duplicates): {skipped_count}\n'
-            f'Errors: {error_count}\n'
-            f'Batch ID: {batch_id}\n'
-        ))
\ No newline at end of file
+                started_at, fetched, stopped_early = result
+                total_scraped += fetched
+                # Every page of a task is queued before its 'done' event, so its rows are saved by now.
+                # If any failed to save, the next run must cover this window again.
+                if counts[task][2]:
+                    self.stderr.write(self.style.WARNING(
+                        f'{task}: {counts[task][2]} row(s) failed to save; watermark not advanced'))
+                else:
+                    # Measured from when the sub-scrape started, so postings made while it ran are not missed
+                    self.save_watermark(task, started_at, batch_id, fetched)
+                if not fetched:
+                    self.stdout.write(f'{task}: no new jobs (last {windows[task]}h)')
+                    continue
+                self.stdout.write(self.style.SUCCESS(
+                    f'{task}: {fetched} jobs in the last {windows[task]}h, {counts[task][0]} new, '
+                    f'{counts[task][1]} updated' + (', stopped at already-seen postings' if stopped_early else '')))
+        finally:
+            stop.set()
+
+        return f'Sub-scrapes: {len(tasks)} ({failed_tasks} failed)\nTotal scraped: {total_scraped}\n'
+
+    def load_watermarks(self, tasks):
+        by_key = {(task.site, task.term, task.location): task for task in tasks}
+        watermarks = {}
+        for watermark in ScrapeWatermark.objects.filter(site__in={task.site for task in tasks}):
+            task = by_key.get((watermark.site, watermark.search_term, watermark.location))
+            if task is not None:
+                watermarks[task] = watermark.last_scraped_at
+        return watermarks
+
+    def window_hours(self, last_scraped_at, max_hours, overlap_hours):
+        """Hours of postings to ask for: the time since the last scrape plus the overlap."""
+        if last_scraped_at is None:
+            return max_hours
+        since = (timezone.now() - last_scraped_at).total_seconds() / 3600
+        return max(1, min(max_hours, math.ceil(since + overlap_hours)))
+
+    def save_watermark(self, task, started_at, batch_id, fetched):
+        ScrapeWatermark.objects.update_or_create(
+            site=task.site, search_term=task.term, location=task.location,
+            defaults={'last_scraped_at': started_at, 'last_batch_id': batch_id, 'last_fetched': fetched},
+        )
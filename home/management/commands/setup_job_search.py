@@ -0,0 +1,108 @@
+"""
+Install the PostgreSQL pieces behind job search and backfill the search vectors.
+
+    * a trigger that keeps Jobs.search_vector current on every insert and on
+      updates to title, company, skills or description (the ORM, bulk and
+      COPY loaders all go through it, so no loader has to compute it);
+    * pg_trgm and trigram GIN indexes on title and company, for typo-tolerant
+      lookups when full-text search finds nothing, and on UPPER(location), the
+      expression Django's ``location__icontains`` filters on;
+    * a chunked backfill of search_vector for rows loaded before the trigger.
+
+Run after ``migrate`` has created the search_vector column and its GIN index.
+Every step is idempotent, so the command is safe to re-run.
+
+Usage:
+    python manage.py setup_job_search
+    python manage.py setup_job_search --chunk-size 5000 --skip-backfill
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from home.models import Jobs
+
+SEARCH_CONFIG = 'english'
+
+# Title matters most, then company, skills and finally the long description
+SEARCH_WEIGHTS = (('title', 'A'), ('company', 'B'), ('skills', 'C'), ('description', 'D'))
+
+# Index name suffix -> indexed expression. Django compiles ``__icontains`` to
+# ``UPPER(col::text) LIKE UPPER('%...%')``, which only an index on that same
+# expression can serve.
+TRIGRAM_INDEXES = {
+    'title': 'title',
+    'company': 'company',
+    'location_upper': 'UPPER(location::text)',
+}
+
+
+class Command(BaseCommand):
+    help = 'Install the job search trigger and trigram indexes, then backfill search vectors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows backfilled per transaction (default: 2000)')
+        parser.add_argument('--skip-backfill', action='store_true',
+                            help='Only install the trigger and indexes')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Job search needs PostgreSQL')
+
+        table = connection.ops.quote_name(Jobs._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            self.install_trigger(cursor, table)
+            for name, expression in TRIGRAM_INDEXES.items():
+                # CONCURRENTLY cannot run inside a transaction; this command runs in autocommit
+                cursor.execute(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {Jobs._meta.db_table}_{name}_trgm '
+                    f'ON {table} USING gin (({expression}) gin_trgm_ops)'
+                )
+        self.stdout.write('Trigger and trigram indexes installed')
+
+        if not options['skip_backfill']:
+            self.backfill(table, max(1, options['chunk_size']))
+
+    def install_trigger(self, cursor, table):
+        function = f'{Jobs._meta.db_table}_search_vector_update'
+        vector = ' || '.join(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.{field}, '')), '{weight}')"
+            for field, weight in SEARCH_WEIGHTS
+        )
+        with transaction.atomic():
+            cursor.execute(f"""
+                CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector := {vector};
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+            """)
+            cursor.execute(f'DROP TRIGGER IF EXISTS {function} ON {table}')
+            cursor.execute(
+                f'CREATE TRIGGER {function} '
+                f'BEFORE INSERT OR UPDATE OF {", ".join(field for field, _ in SEARCH_WEIGHTS)} ON {table} '
+                f'FOR EACH ROW EXECUTE FUNCTION {function}()'
+            )
+
+    def backfill(self, table, chunk_size):
+        # Touching title fires the trigger, which fills in the vector
+        done = 0
+        started = time.perf_counter()
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {table} SET title = title WHERE id IN ('
+                    f'SELECT id FROM {table} WHERE search_vector IS NULL ORDER BY id LIMIT %s)',
+                    [chunk_size],
+                )
+                updated = cursor.rowcount
+            if not updated:
+                break
+            done += updated
+            self.stdout.write(f'{done} rows indexed ({time.perf_counter() - started:.1f}s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfill complete: {done} rows'))
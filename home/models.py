@@ -1,10 +1,13 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 class Jobs(models.Model):
     id = models.CharField(max_length=255, primary_key=True)
     site = models.CharField(max_length=255, null=True)
-    job_url = models.CharField(max_length=1000, null=True)  # URLs can be long
+    job_url = models.CharField(max_length=1000, null=True, db_index=True)  # URLs can be long
     job_url_direct = models.CharField(max_length=1000, null=True)  # URLs can be long
     title = models.CharField(max_length=500, null=True)  # Job titles can be detailed
     company = models.CharField(max_length=255, null=True)
@@ -38,6 +41,29 @@ class Jobs(models.Model):
     work_from_home_type = models.CharField(max_length=255, null=True)
     jobs_scraped_at = models.CharField(max_length=255, null=True)
     batch_id = models.CharField(max_length=255, null=True)
+    content_hash = models.CharField(max_length=64, null=True, db_index=True)  # SHA-256 of the posting content
+    updated_at = models.DateTimeField(auto_now=True, null=True)  # Last time the content changed
+
+    # Typed copies of the scraped text fields above, parsed at ingest, for filtering and sorting
+    min_salary = models.DecimalField(max_digits=14, decimal_places=2, null=True)
+    max_salary = models.DecimalField(max_digits=14, decimal_places=2, null=True)
+    posted_date = models.DateField(null=True)
+    remote = models.BooleanField(null=True)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, null=True)
+    scraped_at = models.DateTimeField(null=True)
+
+    # Weighted title/company/skills/description, kept current by a database
+    # trigger installed by ``manage.py setup_job_search``
+    search_vector = SearchVectorField(null=True)
+
+    # Near-duplicate detection (home/dedup.py): the MinHash signature of title,
+    # company and description, and the id of the first job seen with the same
+    # posting (the job's own id if it is that first one)
+    minhash = models.BinaryField(null=True)
+    canonical_id = models.CharField(max_length=255, null=True, db_index=True)
+
+    # How many JobSkill rows the job has; NULL until its skills are extracted
+    skill_count = models.IntegerField(null=True)
 
     def __str__(self):
         return self.title or "Untitled Job"
@@ -45,12 +71,82 @@ class Jobs(models.Model):
     class Meta:
         verbose_name = "Job"
         verbose_name_plural = "Jobs"
-        ordering = ['-jobs_scraped_at']
+        # Rows not backfilled yet (scraped_at NULL) last, not first as a plain DESC puts them on PostgreSQL
+        ordering = [models.F('scraped_at').desc(nulls_last=True), '-id']
+        indexes = [
+            # Newest-first listing, also the keyset for pagination
+            models.Index(fields=['scraped_at', 'id']),
+            # Job search filters, each followed by the listing order
+            models.Index(fields=['site', 'scraped_at']),
+            models.Index(fields=['remote', 'posted_date']),
+            models.Index(fields=['posted_date', 'min_salary']),
+            GinIndex(fields=['search_vector']),
+        ]
+
+
+class JobLSHBucket(models.Model):
+    """One LSH band of a job's MinHash signature.
+
+    Jobs that share a bucket key agree on every value of that band and are
+    candidate near-duplicates; each job has one row per band.
+    """
+    key = models.BigIntegerField(db_index=True)
+    job = models.ForeignKey(Jobs, on_delete=models.CASCADE, related_name='lsh_buckets')
+
+    def __str__(self):
+        return f'{self.key}: {self.job_id}'
+
+class JobSkill(models.Model):
+    """A technical skill a job mentions, normalized to the scanner taxonomy.
+
+    Filled at ingest (home/job_skills.py). The unique constraint doubles as
+    the job -> skills index and the (skill, job) index serves skill -> jobs
+    lookups and per-skill counts.
+    """
+    job = models.ForeignKey(Jobs, on_delete=models.CASCADE, related_name='job_skills')
+    skill = models.CharField(max_length=100)
+    category = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'skill'], name='unique_job_skill'),
+        ]
+        indexes = [
+            models.Index(fields=['skill', 'job']),
+            models.Index(fields=['category', 'skill']),
+        ]
+
+    def __str__(self):
+        return f'{self.job_id}: {self.skill}'
+
+class ScrapeWatermark(models.Model):
+    """When each (site, search term, location) scrape last completed.
+
+    ``scrape_jobs`` only asks for postings newer than this (plus an overlap),
+    instead of a fixed window on every run.
+    """
+    site = models.CharField(max_length=255)
+    search_term = models.CharField(max_length=255)
+    location = models.CharField(max_length=255)
+    last_scraped_at = models.DateTimeField()
+    last_batch_id = models.CharField(max_length=255, null=True)
+    last_fetched = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['site', 'search_term', 'location'],
+                                    name='unique_scrape_watermark'),
+        ]
+
+    def __str__(self):
+        return f'{self.site}: "{self.search_term}" in {self.location} @ {self.last_scraped_at}'
 
 class Resume(models.Model):
     # Basic Info
     file_name = models.CharField(max_length=255)
     file_path = models.CharField(max_length=500, blank=True, null=True)
+    content_hash = models.CharField(max_length=64, blank=True, null=True)  # SHA-256 of the file bytes
+    scanner_version = models.CharField(max_length=20, blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     scanned_at = models.DateTimeField(auto_now=True)
 
@@ -79,6 +175,10 @@ class Resume(models.Model):
     soft_skills = models.JSONField(default=list, blank=True)
     skills_by_category = models.JSONField(default=dict, blank=True)
     total_skills_count = models.IntegerField(default=0)
+    # technical_skills as a fixed-width bitset over the scanner taxonomy (home/skill_bitsets.py)
+    skill_bitset = models.BinaryField(max_length=32, blank=True, null=True)
+    # Hashed term frequencies of the resume text, for ranking jobs by similarity (home/job_vectors.py)
+    text_terms = models.BinaryField(blank=True, null=True)
 
     # Sections & Structure
     sections_detected = models.JSONField(default=list, blank=True)
@@ -108,6 +208,7 @@ class Resume(models.Model):
             models.Index(fields=['-ats_score']),
             models.Index(fields=['-scanned_at']),
             models.Index(fields=['email']),
+            models.Index(fields=['content_hash', 'scanner_version']),
         ]
 
     def __str__(self):
@@ -123,3 +224,43 @@ class Resume(models.Model):
             return "Fair"
         else:
             return "Poor"
+
+class ScanJob(models.Model):
+    """An uploaded resume waiting for (or done with) a background ATS scan.
+
+    Rows are the work queue for ``manage.py scan_worker``, which claims queued
+    jobs with ``SELECT ... FOR UPDATE SKIP LOCKED``. Only the uploader (or
+    staff) can see a job's status.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    file = models.FileField(upload_to='resumes/%Y/%m/%d/')
+    original_name = models.CharField(max_length=255)
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, blank=True, null=True,
+                                    related_name='scan_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    resume = models.ForeignKey(Resume, on_delete=models.SET_NULL, blank=True, null=True,
+                               related_name='scan_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.original_name} ({self.status})"
@@ -0,0 +1,117 @@
+"""
+Concurrent fan-out of job scrapes across search terms, locations and sites.
+
+Every (site, term, location) combination is one sub-scrape. Each site's
+sub-scrapes run in that site's own thread pool (jobspy is I/O bound), behind
+its own ``SiteLimiter``, so a site never sees more than its allowed number of
+concurrent requests or a faster start rate than allowed, and a sub-scrape
+waiting for one site's limit never holds a thread another site could use.
+A sub-scrape fetches its results a page at a time through ``limited_call``,
+which takes a limiter slot per request and retries a failed page on its own,
+with exponential backoff.
+"""
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ScrapeTask:
+    site: str
+    term: str
+    location: str
+
+    def __str__(self):
+        return f'{self.site}: "{self.term}" in {self.location}'
+
+
+def build_tasks(terms, locations, sites):
+    """Every term × location × site combination, without duplicates."""
+    return list(dict.fromkeys(
+        ScrapeTask(site, term, location)
+        for term, location, site in itertools.product(terms, locations, sites)
+    ))
+
+
+class SiteLimiter:
+    """Caps concurrent requests to one site and spaces out their start times."""
+
+    def __init__(self, concurrency=1, min_interval=0.0):
+        self.concurrency = max(1, concurrency)
+        self.semaphore = threading.BoundedSemaphore(self.concurrency)
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    @contextmanager
+    def slot(self):
+        with self.semaphore:
+            with self.lock:
+                wait = self.next_start - time.monotonic()
+                self.next_start = max(self.next_start, time.monotonic()) + self.min_interval
+            if wait > 0:
+                time.sleep(wait)
+            yield
+
+
+def call_with_retry(func, retries=3, backoff=2.0, on_retry=None):
+    """Call ``func``, retrying failures after ``backoff * 2**attempt`` seconds (plus jitter)."""
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt * random.uniform(1.0, 1.5)
+            if on_retry:
+                on_retry(attempt + 1, e, delay)
+            time.sleep(delay)
+
+
+def limited_call(limiter, func, retries=3, backoff=2.0, on_retry=None):
+    """Call ``func`` within ``limiter``'s limits (if any), retrying failures.
+
+    The slot is released between attempts, so a backoff never holds it.
+    """
+    def attempt():
+        if limiter is None:
+            return func()
+        with limiter.slot():
+            return func()
+
+    return call_with_retry(attempt, retries, backoff, on_retry)
+
+
+def fan_out(tasks, fetch, workers=8, limiters=None):
+    """Run ``fetch(task)`` for every task concurrently.
+
+    Yields ``(task, result, error)`` as each sub-scrape finishes, so results
+    can be ingested while the rest are still running. ``limiters`` maps a
+    site name to its ``SiteLimiter``; ``fetch`` makes its requests through
+    ``limited_call`` with its site's limiter.
+
+    Every site gets its own pool of at most ``workers`` threads, and a limited
+    site no more than its limiter's concurrency, so its queued sub-scrapes
+    wait in the pool's queue rather than in a thread blocked on the limiter.
+    """
+    limiters = limiters or {}
+
+    with ExitStack() as stack:
+        pools = {}
+        futures = {}
+        for task in tasks:
+            if task.site not in pools:
+                limiter = limiters.get(task.site)
+                size = min(max(1, workers), limiter.concurrency) if limiter else max(1, workers)
+                pools[task.site] = stack.enter_context(
+                    ThreadPoolExecutor(max_workers=size, thread_name_prefix=f'scrape-{task.site}'))
+            futures[pools[task.site].submit(fetch, task)] = task
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
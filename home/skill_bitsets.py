@@ -0,0 +1,243 @@
+"""
+Fixed-width skill bitsets for ranking resumes against a job.
+
+Each resume's technical skills are stored as a bitset over the scanner's
+skill taxonomy (``IndustryATSScanner.technical_skills``, in declaration
+order, duplicates dropped): ``SKILL_BITSET_WORDS`` little-endian 64-bit
+words in ``Resume.skill_bitset``. Bit positions are only stable while the
+taxonomy is append-only; inserting or removing a skill means re-running
+``manage.py backfill_skill_bitsets --all``.
+
+``CandidateRanker`` keeps every resume's bitset, ATS score and years of
+experience in NumPy arrays, so ranking all candidates for a job is an AND
+and a popcount per bitset word the job uses, and one ``argpartition`` over
+the whole table.
+"""
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+from django.db import connection
+from django.db.models import Max
+
+from home.models import Resume
+
+SKILL_BITSET_WORDS = 4
+SKILL_BITSET_BYTES = SKILL_BITSET_WORDS * 8
+
+# How much skill coverage, ATS score and experience count towards a candidate's rank
+RANK_WEIGHTS = {'skills': 0.6, 'ats_score': 0.25, 'experience': 0.15}
+EXPERIENCE_CAP_YEARS = 10
+
+# How often CandidateRanker looks for newly scanned resumes, and how often it
+# reads every resume again to drop deleted ones
+REFRESH_SECONDS = 30
+FULL_RELOAD_SECONDS = 15 * 60
+
+# scanned_at is set on INSERT, but concurrent writers commit in any order, so
+# a resume can become visible after one scanned later. Each check re-reads
+# this far back from the newest scanned_at it has seen.
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+@lru_cache(maxsize=None)
+def skill_positions():
+    """``{skill: bit}`` for every technical skill in the scanner taxonomy."""
+    from home.management.commands.ats_resume_scan import IndustryATSScanner
+
+    skills = dict.fromkeys(skill for category in IndustryATSScanner().technical_skills.values()
+                           for skill in category)
+    if len(skills) > SKILL_BITSET_WORDS * 64:
+        raise ValueError(f'{len(skills)} skills do not fit in {SKILL_BITSET_WORDS} 64-bit words')
+    return {skill: bit for bit, skill in enumerate(skills)}
+
+
+def skill_mask(skills):
+    """The skills as an array of ``SKILL_BITSET_WORDS`` uint64 words; unknown skills are ignored."""
+    positions = skill_positions()
+    words = np.zeros(SKILL_BITSET_WORDS, dtype=np.uint64)
+    for skill in skills:
+        bit = positions.get(skill)
+        if bit is not None:
+            words[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+    return words
+
+
+def encode_skills(skills):
+    return skill_mask(skills).astype('<u8').tobytes()
+
+
+def decode_skills(bitset):
+    words = np.frombuffer(bytes(bitset), dtype='<u8')
+    return [skill for skill, bit in skill_positions().items() if int(words[bit // 64]) >> (bit % 64) & 1]
+
+
+def count_matches(bitsets, mask):
+    """Bits of ``mask`` set in each column of word-major ``bitsets``."""
+    matched = np.zeros(bitsets.shape[1], dtype=np.uint16)
+    for word in np.flatnonzero(mask):
+        if hasattr(np, 'bitwise_count'):
+            matched += np.bitwise_count(bitsets[word] & mask[word])
+            continue
+        # NumPy < 2.0 has no popcount ufunc; a job's mask has few bits, so test them one by one
+        for bit in range(64):
+            flag = np.uint64(1) << np.uint64(bit)
+            if mask[word] & flag:
+                matched += (bitsets[word] & flag).astype(bool)
+    return matched
+
+
+class CandidateRanker:
+    """Every resume's skill bitset, ATS score and experience, as NumPy columns.
+
+    Bitsets are stored word-major (``SKILL_BITSET_WORDS x resumes``), so each
+    word the job's mask uses is one contiguous pass and unused words are
+    skipped. ``refresh()`` appends or replaces the resumes scanned since the
+    last load, and now and then reloads everything in the background.
+    """
+
+    def __init__(self, chunk_size=20000):
+        self.chunk_size = chunk_size
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.bitsets = np.zeros((SKILL_BITSET_WORDS, 0), dtype=np.uint64)
+        self.ats_scores = np.zeros(0, dtype=np.float32)
+        self.years = np.zeros(0, dtype=np.float32)
+        self.loaded_until = None
+        self.checked_at = None
+        self.reloaded_at = None
+        self.reloader = None
+        self.lock = threading.Lock()
+        self._profile_scores = {}
+
+    def _read(self, queryset):
+        ids, bitsets, scores, years = [], [], [], []
+        rows = queryset.exclude(skill_bitset=None).order_by('id')
+        last_id = 0
+        while True:
+            chunk = list(rows.filter(id__gt=last_id).values_list(
+                'id', 'skill_bitset', 'ats_score', 'years_of_experience')[:self.chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            for resume_id, bitset, ats_score, experience in chunk:
+                ids.append(resume_id)
+                bitsets.append(bytes(bitset))
+                scores.append(ats_score or 0.0)
+                years.append(experience or 0)
+        return (
+            np.array(ids, dtype=np.int64),
+            np.ascontiguousarray(
+                np.frombuffer(b''.join(bitsets), dtype='<u8').astype(np.uint64).reshape(-1, SKILL_BITSET_WORDS).T),
+            np.array(scores, dtype=np.float32),
+            np.array(years, dtype=np.float32),
+        )
+
+    def refresh(self):
+        """Bring the columns up to date, checking at most every ``REFRESH_SECONDS``.
+
+        A check reads the resumes scanned since the newest one loaded, minus
+        ``REFRESH_OVERLAP``, and appends them or replaces their older copies.
+        Every ``FULL_RELOAD_SECONDS`` a background thread also reads all
+        resumes again, so deleted ones drop out and backfilled bitsets (which
+        keep their ``scanned_at``) are picked up; ranking carries on against
+        the current columns while it runs. Only the first load blocks.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.checked_at is not None and now - self.checked_at < REFRESH_SECONDS:
+                return
+            self.checked_at = now
+            if self.reloaded_at is None:
+                self._set_columns(*self._read_all())
+                self.reloaded_at = now
+                return
+
+            latest = Resume.objects.aggregate(latest=Max('scanned_at'))['latest']
+            if latest is not None:
+                rows = Resume.objects.all()
+                if self.loaded_until is not None:
+                    rows = rows.filter(scanned_at__gt=self.loaded_until - REFRESH_OVERLAP)
+                changed = self._read(rows)
+                keep = ~np.isin(self.ids, changed[0])
+                columns = tuple(np.concatenate([column[..., keep], new], axis=-1)
+                                for column, new in zip((self.ids, self.bitsets, self.ats_scores, self.years), changed))
+                self._set_columns(columns, latest)
+
+            if now - self.reloaded_at >= FULL_RELOAD_SECONDS and not (self.reloader and self.reloader.is_alive()):
+                self.reloaded_at = now
+                self.reloader = threading.Thread(target=self._reload_in_background, name='candidate-ranker-reload',
+                                                 daemon=True)
+                self.reloader.start()
+
+    def reload(self):
+        """Read every resume again, then swap the new columns in."""
+        columns, latest = self._read_all()
+        with self.lock:
+            self._set_columns(columns, latest)
+            # Catch up on the resumes saved while the table was being read
+            self.checked_at = None
+
+    def _reload_in_background(self):
+        try:
+            self.reload()
+        finally:
+            # The thread's own connection; don't leave it open
+            connection.close()
+
+    def _read_all(self):
+        # MAX first: a resume saved during the read is then re-read by the next check
+        latest = Resume.objects.aggregate(latest=Max('scanned_at'))['latest']
+        return self._read(Resume.objects.all()), latest
+
+    def _set_columns(self, columns, latest):
+        self.ids, self.bitsets, self.ats_scores, self.years = columns
+        self.loaded_until = latest
+        self._profile_scores = {}
+
+    def profile_scores(self, weights):
+        """The part of every resume's score that does not depend on the job."""
+        key = (weights['ats_score'], weights['experience'])
+        if key not in self._profile_scores:
+            self._profile_scores[key] = (
+                weights['ats_score'] / 100 * self.ats_scores
+                + weights['experience'] / EXPERIENCE_CAP_YEARS * np.minimum(self.years, EXPERIENCE_CAP_YEARS)
+            ).astype(np.float32)
+        return self._profile_scores[key]
+
+    def rank(self, skills, k=20, weights=RANK_WEIGHTS):
+        """The ``k`` best resumes for a job requiring ``skills``, as dicts, best first.
+
+        Skill coverage is the share of the job's skills the resume has; only
+        resumes with at least one of them are ranked.
+        """
+        mask = skill_mask(skills)
+        required = sum(bin(int(word)).count('1') for word in mask)
+        if not required or not len(self.ids) or k <= 0:
+            return []
+
+        with self.lock:
+            matched = count_matches(self.bitsets, mask)
+            scores = matched * np.float32(weights['skills'] / required) + self.profile_scores(weights)
+            scores[matched == 0] = -1
+
+            k = min(k, len(scores))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[scores[best] >= 0]
+            best = best[np.argsort(-scores[best], kind='stable')]
+            return [{
+                'resume_id': int(self.ids[i]),
+                'score': round(float(scores[i]), 4),
+                'matched_skills': int(matched[i]),
+                'required_skills': required,
+            } for i in best]
+
+
+_ranker = CandidateRanker()
+
+
+def get_candidate_ranker():
+    """The process-wide ranker, kept close to the resumes table (see ``CandidateRanker.refresh``)."""
+    _ranker.refresh()
+    return _ranker
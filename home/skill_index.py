@@ -0,0 +1,226 @@
+"""
+Inverted skill index for matching resumes against jobs.
+
+Each job's skills are read from its ``JobSkill`` rows (``home.job_skills``),
+extracted once at ingest with the ATS scanner's skill matcher, so jobs and
+resumes share one vocabulary of normalized skill names. The index is kept as
+NumPy arrays in compressed sparse row form, in both directions:
+
+    skill -> rows of the jobs that mention it   (postings, for candidates)
+    row   -> skills the job mentions            (forward, for scoring)
+
+Matching a resume only touches the posting lists of its own skills, so the
+cost grows with the number of candidate jobs, not the size of the table.
+
+On disk the index is a directory of segments (``.npz`` files). Each ingest
+batch appends a segment with the jobs it created or changed; when a job
+appears in more than one segment the newest one wins. ``manage.py
+build_skill_index`` rebuilds everything into a single base segment.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+
+from home.job_skills import populate_job_skills
+from home.models import Jobs, JobSkill
+
+BASE_SEGMENT = 'base.npz'
+
+
+def index_directory():
+    return getattr(settings, 'SKILL_INDEX_DIR', os.path.join(settings.BASE_DIR, 'skill_index'))
+
+
+def write_segment(queryset, path=None, chunk_size=2000, on_progress=None):
+    """Save the skills of every job in ``queryset`` as one segment.
+
+    Skills come from ``JobSkill``; jobs not extracted yet are extracted
+    first. Returns the number of jobs written. The segment is written to a
+    temporary file and renamed into place, so readers never see a partial one.
+    """
+    populate_job_skills(queryset.filter(skill_count__isnull=True))
+    vocabulary = {}
+    job_ids, offsets, skills = [], [0], []
+
+    last_id = None
+    rows = queryset.order_by('id').values_list('id', flat=True)
+    while True:
+        chunk = rows if last_id is None else rows.filter(id__gt=last_id)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1]
+        job_skills = {}
+        for job_id, skill in JobSkill.objects.filter(job_id__in=chunk).values_list('job_id', 'skill'):
+            job_skills.setdefault(job_id, []).append(skill)
+        for job_id in chunk:
+            job_ids.append(job_id)
+            skills.extend(vocabulary.setdefault(skill, len(vocabulary))
+                          for skill in sorted(job_skills.get(job_id, ())))
+            offsets.append(len(skills))
+        if on_progress:
+            on_progress(len(job_ids))
+
+    if not job_ids:
+        return 0
+    directory = index_directory()
+    os.makedirs(directory, exist_ok=True)
+    path = path or os.path.join(directory, f'segment-{time.time_ns()}.npz')
+    temporary = path + '.tmp.npz'
+    np.savez(
+        temporary,
+        job_ids=np.array(job_ids, dtype=str),
+        offsets=np.array(offsets, dtype=np.int64),
+        skills=np.array(skills, dtype=np.int32),
+        vocabulary=np.array(list(vocabulary), dtype=str),
+    )
+    os.replace(temporary, path)
+    return len(job_ids)
+
+
+def index_batch(batch_id):
+    """Append a segment for the jobs a scrape batch created or changed."""
+    return write_segment(Jobs.objects.filter(batch_id=batch_id))
+
+
+def rebuild(chunk_size=2000, on_progress=None):
+    """Index every job into a fresh base segment and drop the older segments."""
+    directory = index_directory()
+    stale = segment_paths(directory)
+    count = write_segment(Jobs.objects.all(), os.path.join(directory, BASE_SEGMENT), chunk_size, on_progress)
+    # Segments appended while the rebuild ran are newer than the base; keep them
+    for path in stale:
+        if os.path.basename(path) != BASE_SEGMENT:
+            os.remove(path)
+    return count
+
+
+def segment_paths(directory):
+    """Segment files oldest first: the base segment, then appended ones by timestamp."""
+    if not os.path.isdir(directory):
+        return []
+    names = [name for name in os.listdir(directory) if name.endswith('.npz') and '.tmp' not in name]
+    names.sort(key=lambda name: (name != BASE_SEGMENT, len(name), name))
+    return [os.path.join(directory, name) for name in names]
+
+
+@dataclass
+class JobMatch:
+    job_id: str
+    score: float
+    matched_skills: list
+    missing_skills: list
+
+
+class SkillIndex:
+    """Merged, read-only view of all segments."""
+
+    def __init__(self, segments):
+        vocabulary = {}
+        job_ids, offsets, skills = [], [np.zeros(1, dtype=np.int64)], []
+        for segment in segments:
+            # Re-number each segment's skills into the merged vocabulary
+            remap = np.array([vocabulary.setdefault(str(skill), len(vocabulary))
+                              for skill in segment['vocabulary']], dtype=np.int32)
+            job_ids.append(segment['job_ids'])
+            offsets.append(segment['offsets'][1:] + offsets[-1][-1])
+            skills.append(remap[segment['skills']] if len(remap) else segment['skills'])
+
+        self.vocabulary = list(vocabulary)
+        self.skill_ids = vocabulary
+        self.job_ids = np.concatenate(job_ids) if job_ids else np.array([], dtype=str)
+        self.offsets = np.concatenate(offsets)
+        self.skills = np.concatenate(skills) if skills else np.array([], dtype=np.int32)
+        rows = len(self.job_ids)
+        row_of_entry = np.repeat(np.arange(rows, dtype=np.int32), np.diff(self.offsets))
+
+        # Only the newest copy of a job counts
+        _, last = np.unique(self.job_ids[::-1], return_index=True)
+        self.live = np.zeros(rows, dtype=bool)
+        self.live[rows - 1 - last] = True
+        self.job_count = int(self.live.sum())
+
+        # Inverted lists: rows grouped by skill
+        order = np.argsort(self.skills, kind='stable')
+        self.postings = row_of_entry[order]
+        self.posting_offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.skills, minlength=len(self.vocabulary)), out=self.posting_offsets[1:])
+
+        # Rare skills say more about a match than ubiquitous ones
+        live_entries = self.live[row_of_entry]
+        frequency = np.bincount(self.skills[live_entries], minlength=len(self.vocabulary))
+        self.idf = np.log((1 + self.job_count) / (1 + frequency)) + 1.0
+        self.job_norms = np.sqrt(np.bincount(row_of_entry, weights=self.idf[self.skills] ** 2, minlength=rows))
+
+    @classmethod
+    def load(cls, paths=None):
+        segments = []
+        for path in segment_paths(index_directory()) if paths is None else paths:
+            with np.load(path) as segment:
+                segments.append({name: segment[name] for name in segment.files})
+        return cls(segments)
+
+    def job_skills(self, row):
+        return [self.vocabulary[skill] for skill in self.skills[self.offsets[row]:self.offsets[row + 1]]]
+
+    def top_jobs(self, skills, k=20):
+        """The ``k`` jobs closest to a set of skills, best first.
+
+        Scores are the cosine similarity of IDF-weighted skill sets. Only jobs
+        that share at least one skill are scored.
+        """
+        wanted = sorted({self.skill_ids[skill] for skill in skills if skill in self.skill_ids})
+        if not wanted or k <= 0:
+            return []
+
+        spans = [(self.posting_offsets[skill], self.posting_offsets[skill + 1]) for skill in wanted]
+        candidates = np.concatenate([self.postings[start:end] for start, end in spans])
+        weights = np.concatenate([np.full(end - start, self.idf[skill] ** 2)
+                                  for skill, (start, end) in zip(wanted, spans)])
+        # A dense accumulator is cheaper than sorting the candidates to group them
+        overlap = np.bincount(candidates, weights=weights, minlength=len(self.job_ids))
+        candidates = np.flatnonzero(overlap > 0)
+        candidates = candidates[self.live[candidates]]
+        overlap = overlap[candidates]
+        if not len(candidates):
+            return []
+        resume_norm = np.sqrt((self.idf[wanted] ** 2).sum())
+        scores = overlap / (self.job_norms[candidates] * resume_norm)
+
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.lexsort((candidates[best], -scores[best]))]
+
+        known = {self.vocabulary[skill] for skill in wanted}
+        matches = []
+        for position in best:
+            row = candidates[position]
+            job_skills = self.job_skills(row)
+            matches.append(JobMatch(
+                job_id=str(self.job_ids[row]),
+                score=round(float(scores[position]), 4),
+                matched_skills=[skill for skill in job_skills if skill in known],
+                missing_skills=[skill for skill in job_skills if skill not in known],
+            ))
+        return matches
+
+
+_cache_lock = threading.Lock()
+_cache = (None, None)
+
+
+def get_skill_index():
+    """The current index, reloaded only when the segment files change."""
+    global _cache
+    with _cache_lock:
+        paths = segment_paths(index_directory())
+        signature = tuple((path, os.stat(path).st_mtime_ns) for path in paths)
+        if _cache[0] != signature:
+            _cache = (signature, SkillIndex.load(paths))
+        return _cache[1]
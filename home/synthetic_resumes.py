@@ -0,0 +1,139 @@
+"""
+Reproducible synthetic resumes for benchmarking the ATS scanner.
+
+Resumes are generated from a seed, so the same arguments always produce the
+same corpus. They are written as TXT or as PDF. PDFs use a minimal built-in
+writer (Helvetica, one text object per page), so no PDF library is needed
+beyond PyPDF2 for reading them back.
+"""
+import os
+import random
+
+from home.management.commands.ats_resume_scan import IndustryATSScanner
+
+LINES_PER_PAGE = 48
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Ananya', 'Rohan', 'Meera', 'Karan', 'Isha']
+LAST_NAMES = ['Sharma', 'Patel', 'Kulkarni', 'Iyer', 'Deshmukh', 'Reddy', 'Joshi', 'Nair', 'Gupta', 'Rao']
+CITIES = ['Pune, MH', 'Mumbai, MH', 'Bangalore, KA', 'Hyderabad, TS', 'Chennai, TN']
+COMPANIES = ['Infosys', 'TCS', 'Wipro', 'Persistent Systems', 'Zensar', 'Accenture', 'Capgemini']
+ROLES = ['Software Engineer', 'Data Engineer', 'Backend Developer', 'Data Scientist', 'DevOps Engineer']
+FILLER = ('designed built maintained delivered owned migrated automated reviewed documented '
+          'platform service pipeline dashboard feature module release customer team stakeholder '
+          'requirements performance reliability quality scalable robust internal external weekly '
+          'across multiple projects using with for the and of to in on').split()
+TRENDS = ['increased', 'reduced', 'improved', 'decreased']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Fraction of filler words replaced by a skill from the scanner taxonomy
+SKILL_DENSITIES = {'low': 0.02, 'medium': 0.08, 'high': 0.2}
+
+
+class SyntheticResumeGenerator:
+    """Generates resume text of a given length (in pages) and skill density."""
+
+    def __init__(self, seed=42):
+        self.seed = seed
+        scanner = IndustryATSScanner()
+        self.skills = scanner.all_skills + scanner.soft_skills
+
+    def generate(self, pages=1, density='medium', index=0):
+        rng = random.Random(f'{self.seed}-{pages}-{density}-{index}')
+        skill_rate = SKILL_DENSITIES[density]
+
+        def sentence(words=12):
+            return ' '.join(rng.choice(self.skills) if rng.random() < skill_rate else rng.choice(FILLER)
+                            for _ in range(words))
+
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        lines = [
+            f'{first} {last}',
+            f'{first.lower()}.{last.lower()}@example.com | +91 {rng.randint(7000000000, 9999999999)}',
+            f'linkedin.com/in/{first.lower()}-{last.lower()} | github.com/{first.lower()}{last.lower()}',
+            rng.choice(CITIES),
+            '',
+            'Summary',
+            f'{rng.randint(2, 15)}+ years of experience as a {rng.choice(ROLES)}. {sentence(20)}',
+            '',
+            'Skills',
+            ', '.join(rng.sample(self.skills, max(3, int(len(self.skills) * skill_rate)))),
+            '',
+            'Education',
+            f'Bachelor of Engineering, University of Pune, {rng.randint(2005, 2018)}, GPA: {rng.uniform(2.5, 4.0):.2f}',
+            '',
+            'Work Experience',
+        ]
+
+        target = pages * LINES_PER_PAGE
+        while len(lines) < target:
+            start = rng.randint(2008, 2022)
+            lines.append(f'{rng.choice(ROLES)}, {rng.choice(COMPANIES)}')
+            lines.append(f'{rng.choice(MONTHS)} {start} - {rng.choice(MONTHS)} {start + rng.randint(1, 3)}')
+            for _ in range(rng.randint(3, 6)):
+                if rng.random() < 0.4:
+                    lines.append(f'- {rng.choice(TRENDS)} {sentence(5)} by {rng.randint(5, 80)}%')
+                else:
+                    lines.append(f'- {sentence()}')
+            lines.append('')
+
+        return '\n'.join(lines[:target]) + '\n'
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path, text, lines_per_page=LINES_PER_PAGE):
+    """Write ``text`` as a simple PDF, ``lines_per_page`` lines to a page."""
+    lines = text.split('\n')
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>', b'']
+    pages_id = 2
+    kids = []
+    for page_lines in pages:
+        content = ('BT /F1 10 Tf 14 TL 50 770 Td ' +
+                   ' '.join(f"({_pdf_escape(line)}) '" for line in page_lines) +
+                   ' ET').encode('latin-1', 'replace')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R '
+                       b'/Resources << /Font << /F1 1 0 R >> >> >>' % (pages_id, len(objects)))
+        kids.append(len(objects))
+    objects[pages_id - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % kid for kid in kids), len(kids))
+    objects.append(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, len(objects), xref)
+
+    with open(path, 'wb') as file:
+        file.write(out)
+
+
+def build_corpus(directory, page_counts=(1, 2, 5, 10, 25, 50), densities=('low', 'medium', 'high'),
+                 formats=('txt', 'pdf'), per_combination=1, seed=42):
+    """Write one resume per size/density/format combination and return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    generator = SyntheticResumeGenerator(seed)
+    paths = []
+    for pages in page_counts:
+        for density in densities:
+            for index in range(per_combination):
+                text = generator.generate(pages, density, index)
+                for fmt in formats:
+                    path = os.path.join(directory, f'resume_{pages:02d}p_{density}_{index}.{fmt}')
+                    if fmt == 'pdf':
+                        write_pdf(path, text)
+                    else:
+                        with open(path, 'w', encoding='utf-8') as file:
+                            file.write(text)
+                    paths.append(path)
+    return paths
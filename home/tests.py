@@ -1,3 +1,1282 @@
-from django.test import TestCase
+"""
+Tests for the home app.
 
-# Create your tests here.
+Scrapes run against ``FakeBoard`` in place of ``jobspy.scrape_jobs``, so
+nothing here touches the network. The PostgreSQL-only tests run when the
+test database is PostgreSQL, e.g. ``python manage.py test home`` against the
+production settings.
+"""
+import io
+import json
+import os
+import re
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipIf, skipUnless
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from home import job_vectors
+from home.dedup import JobDeduplicator, minhash, shingles, similarity
+from home.job_skills import populate_job_skills
+from home.job_vectors import HashingTokenizer, decode_terms
+from home.jobs_ingest import (
+    HASHED_FIELDS, JOB_COLUMNS, CopyJobsLoader, JobsIngester, clean_jobs_frame, content_hashes, parse_typed_columns,
+)
+from home.management.commands import ats_resume_scan as scan_command
+from home.management.commands import scan_worker as worker_command
+from home.management.commands.ats_regex_bench import EXTRACTORS, adversarial_inputs
+from home.management.commands.ats_resume_scan import (
+    ExtractionLimitExceeded, IndustryATSScanner, ResumeBulkWriter, ResumeScanCache, ScanHook, SkillMatcher,
+    PATTERNS, StageProfiler, _trend_claims, resume_fields_from_scan,
+)
+from home.models import JobLSHBucket, Jobs, JobSkill, Resume, ScanJob, ScrapeWatermark
+from home.scraping import ScrapeTask, SiteLimiter, build_tasks, call_with_retry, fan_out, limited_call
+from home.skill_bitsets import (
+    FULL_RELOAD_SECONDS, CandidateRanker, count_matches, decode_skills, encode_skills, skill_mask,
+)
+from home.skill_index import SkillIndex, write_segment
+from home.synthetic_resumes import SyntheticResumeGenerator, write_pdf
+from home.views import distinct_postings, filter_jobs, search_jobs
+
+try:
+    from home.management.commands import scrape_jobs as scrape_command
+except ImportError:  # python-jobspy not installed
+    scrape_command = None
+
+on_postgresql = skipUnless(connection.vendor == 'postgresql', 'needs PostgreSQL')
+
+NO_FILTERS = {'site': '', 'location': '', 'remote': '', 'days': '', 'skill': ''}
+
+POSTING = (
+    'We are hiring a senior data engineer to design and run batch and streaming pipelines '
+    'on AWS. You will model data in Snowflake, orchestrate jobs with Airflow, write Python '
+    'and SQL every day, review pull requests, mentor two junior engineers and work with '
+    'analysts to define metrics. Experience with Kafka, Docker and Terraform is a plus.'
+)
+
+
+def write_file(path, content):
+    with open(path, 'wb' if isinstance(content, bytes) else 'w') as file:
+        file.write(content)
+    return path
+
+
+def job_frame(*rows):
+    return pd.DataFrame([{'site': 'indeed', 'company': 'Acme', **row} for row in rows])
+
+
+def ingest(ingester, *rows, batch_id='batch-1'):
+    ingester.ingest(clean_jobs_frame(job_frame(*rows), batch_id, '2024-05-01T10:00:00'))
+    return ingester.created, ingester.updated, ingester.skipped, ingester.errors
+
+
+class FakeBoard:
+    """Stands in for ``jobspy.scrape_jobs``: every site lists ``postings`` jobs, newest first.
+
+    The request at each ``(site, offset)`` in ``fail_at`` fails once.
+    """
+
+    def __init__(self, postings, fail_at=()):
+        self.postings = postings
+        self.fail_at = set(fail_at)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, site_name, search_term, results_wanted, offset=0, hours_old=None, **kwargs):
+        site = site_name[0]
+        with self.lock:
+            self.calls.append((site, offset, hours_old))
+            if (site, offset) in self.fail_at:
+                self.fail_at.remove((site, offset))
+                raise ConnectionError('connection reset')
+        newest = self.postings - 1 - offset
+        return pd.DataFrame([{
+            'id': f'{site}-{number}',
+            'site': site,
+            'job_url': f'https://{site}.example/jobs/{number}',
+            'title': f'{search_term} {number}',
+            'company': 'Acme',
+        } for number in range(newest, max(-1, newest - results_wanted), -1)])
+
+    def offsets(self, site='indeed'):
+        return [offset for call_site, offset, _ in self.calls if call_site == site]
+
+
+def stubborn(seconds):
+    """Keep busy for ``seconds``, swallowing exceptions the way PyPDF2's parsers do."""
+    until = time.monotonic() + seconds
+    while time.monotonic() < until:
+        try:
+            time.sleep(0.01)
+        except Exception:
+            pass
+
+
+class SkillMatcherTests(SimpleTestCase):
+
+    def test_skill_matcher_follows_word_boundaries(self):
+        matcher = SkillMatcher()
+        for phrase in ('java', 'javascript', 'spring', 'spring boot', 'c++', 'api'):
+            matcher.add(phrase, phrase, allow_plural=phrase == 'api')
+
+        self.assertEqual(matcher.find('java, javascript and spring boot apis'),
+                         {'java', 'javascript', 'spring', 'spring boot', 'api'})
+        self.assertEqual(matcher.find('javas springs c+'), set())
+
+    def test_skill_matcher_agrees_with_regex(self):
+        phrases = ['go', 'golang', 'node.js', 'c#', 'ci/cd', 'sql', 'sql server', 'r']
+        matcher = SkillMatcher()
+        for phrase in phrases:
+            matcher.add(phrase, phrase)
+        texts = ['go and golang', 'node.js, c# & ci/cd', 'ms sql server; r/sql', 'gopher nodejs c r']
+        for text in texts:
+            expected = {phrase for phrase in phrases if re.search(r'\b' + re.escape(phrase) + r'\b', text)}
+            self.assertEqual(matcher.find(text), expected, text)
+
+    def test_extract_skills_groups_by_category(self):
+        skills = IndustryATSScanner().extract_skills('Python and Django APIs, Docker, teamwork and leadership')
+        self.assertEqual(sorted(skills['technical']), ['django', 'docker', 'python'])
+        self.assertEqual(sorted(skills['soft']), ['leadership', 'teamwork'])
+        self.assertEqual(skills['by_category'], {'programming': ['python'], 'web_backend': ['django'],
+                                                 'devops': ['docker']})
+        self.assertEqual(skills['total'], 5)
+
+
+class BatchScanCommandTests(TransactionTestCase):
+    """``manage.py ats_resume_scan`` in batch mode.
+
+    The scanner workers run as threads rather than processes, so they see the
+    test database; a TransactionTestCase, since they query it from their own
+    connections.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        generator = SyntheticResumeGenerator()
+        for name, index in [('a.txt', 0), ('b.txt', 0), ('c.txt', 1)]:
+            write_file(os.path.join(self.directory, name), generator.generate(index=index))
+        write_file(os.path.join(self.directory, 'short.txt'), 'Too short to score')
+        write_file(os.path.join(self.directory, 'notes.docx'), b'not a resume')
+
+    def scan(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        with mock.patch.object(scan_command, 'ProcessPoolExecutor', ThreadPoolExecutor):
+            call_command('ats_resume_scan', *args, '--workers', '2', stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_directory_batch_saves_each_resume_once(self):
+        out, err = self.scan('--dir', self.directory)
+        self.assertIn('Resumes: 4', out)
+        self.assertIn('Scanned: 2', out)
+        self.assertIn('Saved to database: 2', out)
+        self.assertIn('Duplicates within this batch: 1', out)
+        self.assertIn('short.txt: Insufficient text extracted', err)
+        self.assertEqual(sorted(Resume.objects.values_list('file_name', flat=True)), ['a.txt', 'c.txt'])
+
+        # The next run is answered from the stored scans
+        out, _ = self.scan('--dir', self.directory)
+        self.assertIn('Already scanned (cached): 2', out)
+        self.assertEqual(Resume.objects.count(), 2)
+
+    def test_glob_and_manifest_paths_are_merged(self):
+        manifest = write_file(os.path.join(tempfile.mkdtemp(dir=self.directory), 'manifest'),
+                              f"# resumes\n{os.path.join(self.directory, 'c.txt')}\n\n"
+                              f"{os.path.join(self.directory, 'missing.txt')}\n")
+        out, err = self.scan('--glob', os.path.join(self.directory, '**'), '--manifest', manifest, '--no-save')
+
+        # The glob's directories and .docx file are skipped, c.txt is scanned once
+        self.assertIn('Resumes: 5', out)
+        self.assertIn('Scanned: 2', out)
+        self.assertIn('missing.txt: File not found', err)
+        self.assertFalse(Resume.objects.exists())
+
+    def test_batch_needs_resumes(self):
+        with self.assertRaisesMessage(CommandError, 'No resumes found to scan'):
+            self.scan('--dir', tempfile.mkdtemp(dir=self.directory))
+
+
+class ResumeScanCacheTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.text = SyntheticResumeGenerator().generate()
+        self.path = write_file(os.path.join(self.directory, 'resume.txt'), self.text)
+        self.scanner = IndustryATSScanner(cache=ResumeScanCache())
+
+    def save(self, results, path=None):
+        return Resume.objects.create(**resume_fields_from_scan(results, path or self.path))
+
+    def test_identical_bytes_are_answered_from_the_stored_scan(self):
+        first = self.scanner.scan_resume(self.path)
+        self.assertNotIn('cached', first)
+        resume = self.save(first)
+
+        copy = write_file(os.path.join(self.directory, 'copy.txt'), self.text)
+        with mock.patch.object(IndustryATSScanner, 'extract_resume', side_effect=AssertionError('parsed again')):
+            cached = self.scanner.scan_resume(copy)
+        self.assertEqual((cached['cached'], cached['resume_id']), (True, resume.id))
+        self.assertEqual(cached['score'], first['score'])
+        self.assertEqual(cached['text_terms'], first['text_terms'])
+
+        self.assertNotIn('cached', self.scanner.scan_resume(copy, force=True))
+
+    def test_changed_bytes_miss(self):
+        self.save(self.scanner.scan_resume(self.path))
+        changed = write_file(os.path.join(self.directory, 'changed.txt'), self.text + 'Kotlin\n')
+        self.assertNotIn('cached', self.scanner.scan_resume(changed))
+
+    def test_other_scanner_version_misses(self):
+        self.save(self.scanner.scan_resume(self.path))
+        with mock.patch.object(IndustryATSScanner, 'SCANNER_VERSION', 'test'):
+            self.assertNotIn('cached', self.scanner.scan_resume(self.path))
+
+    def test_truncated_scan_is_reused_only_under_the_same_limits(self):
+        truncated = IndustryATSScanner(cache=ResumeScanCache(), max_chars=500).scan_resume(self.path)
+        self.assertTrue(truncated['extraction']['truncated'])
+        self.save(truncated)
+
+        self.assertNotIn('cached', self.scanner.scan_resume(self.path))
+        self.assertTrue(IndustryATSScanner(cache=ResumeScanCache(), max_chars=500).scan_resume(self.path)['cached'])
+
+
+class PdfExtractionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'resume.pdf')
+        write_pdf(self.path, SyntheticResumeGenerator().generate(pages=5))
+
+    def extract(self, **limits):
+        return IndustryATSScanner(**limits).extract_resume(self.path)
+
+    def test_reads_every_page_within_the_limits(self):
+        text, extraction = self.extract()
+        self.assertGreaterEqual(extraction['pages_total'], 5)
+        self.assertEqual(extraction['pages_read'], extraction['pages_total'])
+        self.assertFalse(extraction['truncated'])
+        self.assertEqual(extraction['characters'], len(text))
+
+    def test_stops_at_max_pages(self):
+        _, extraction = self.extract(max_pages=2)
+        self.assertEqual((extraction['pages_read'], extraction['truncated_by']), (2, 'max_pages'))
+        self.assertEqual(extraction['limits']['max_pages'], 2)
+
+    def test_stops_once_max_chars_are_read(self):
+        text, extraction = self.extract(max_chars=1000)
+        self.assertEqual((extraction['pages_read'], extraction['truncated_by']), (1, 'max_chars'))
+        self.assertEqual(len(text), 1000)
+
+    @skipUnless(hasattr(signal, 'setitimer'), 'needs SIGALRM timers')
+    def test_deadline_interrupts_a_page_that_swallows_exceptions(self):
+        def pages(pdf_reader):
+            yield 'first page'
+            stubborn(3)
+            yield 'second page'
+
+        scanner = IndustryATSScanner(max_seconds=0.2)
+        started = time.monotonic()
+        with mock.patch.object(scanner, 'iter_pdf_pages', pages):
+            text, extraction = scanner.extract_resume(self.path)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(text, 'first page\n')
+        self.assertEqual((extraction['pages_read'], extraction['truncated_by']), (1, 'max_seconds'))
+
+    @skipUnless(hasattr(signal, 'setitimer'), 'needs SIGALRM timers')
+    def test_pdf_that_cannot_be_opened_in_time_is_rejected(self):
+        with mock.patch.object(scan_command.PyPDF2, 'PdfReader', lambda stream: stubborn(3)):
+            with self.assertRaises(ExtractionLimitExceeded):
+                self.extract(max_seconds=0.2)
+
+    def test_corrupt_pdf_is_a_read_error(self):
+        write_file(self.path, b'%PDF-1.4 not really')
+        with self.assertRaisesMessage(Exception, 'Error reading PDF') as raised:
+            self.extract()
+        self.assertNotIsInstance(raised.exception, ExtractionLimitExceeded)
+
+
+class CountingText(str):
+    """A str that counts the ``lower()`` and ``split()`` calls made on it."""
+
+    def lower(self):
+        self.calls['lower'] += 1
+        return str.lower(self)
+
+    def split(self, *args, **kwargs):
+        self.calls['split'] += 1
+        return str.split(self, *args, **kwargs)
+
+
+class ResumeDocumentTests(SimpleTestCase):
+
+    def test_views_are_built_once_for_all_extractors(self):
+        scanner = IndustryATSScanner()
+        text = CountingText(SyntheticResumeGenerator().generate(pages=2))
+        text.calls = Counter()
+        doc = scanner.preprocess(text).prepare('lines', 'lower_lines', 'words')
+
+        for _ in range(2):
+            for extractor in (scanner.extract_contact_info, scanner.detect_sections, scanner.extract_education,
+                              scanner.extract_experience, scanner.extract_skills, scanner.check_achievements,
+                              scanner.calculate_keywords):
+                extractor(doc)
+        # One lowercased copy, and one split each for the lines and the words
+        self.assertEqual(text.calls, {'lower': 1, 'split': 2})
+
+    def test_extractors_accept_raw_text(self):
+        scanner = IndustryATSScanner()
+        text = SyntheticResumeGenerator().generate()
+        doc = scanner.preprocess(text)
+        self.assertEqual(scanner.extract_contact_info(text), scanner.extract_contact_info(doc))
+        self.assertEqual(scanner.detect_sections(text), scanner.detect_sections(doc))
+        self.assertEqual(list(doc.section_spans), ['summary', 'skills', 'education', 'experience'])
+
+
+class ExtractorPatternTests(SimpleTestCase):
+
+    def test_extractors_are_linear_time_on_adversarial_input(self):
+        # 1 MB single-line inputs that send backtracking patterns quadratic
+        scanner = IndustryATSScanner()
+        for name, text in adversarial_inputs(1000000).items():
+            for extractor in EXTRACTORS:
+                doc = scanner.preprocess(text)
+                started = time.perf_counter()
+                getattr(scanner, extractor)(doc)
+                with self.subTest(input=name, extractor=extractor):
+                    self.assertLess(time.perf_counter() - started, 2.0)
+
+    def test_trend_claims_match_regex(self):
+        lines = ['increased revenue by 20% in 2023', 'increased it', 'we increased 3 things, then 4',
+                 'decreased costs 15%', '5 increased']
+        for line in lines:
+            self.assertEqual(_trend_claims([line], 'increased'), re.findall(r'increased.*\d+', line), line)
+
+    def test_email_pattern_still_finds_addresses(self):
+        contact = IndustryATSScanner().extract_contact_info('Priya Iyer\npriya.iyer@example.com, +91 9876543210')
+        self.assertEqual(contact['emails'], ['priya.iyer@example.com'])
+        self.assertEqual(contact['phones'], ['+91 9876543210'])
+
+
+class ScanJobTests(TransactionTestCase):
+    """Upload -> ScanJob -> ``manage.py scan_worker`` -> ``scan_job_status``.
+
+    The worker's pool runs threads rather than processes, so they see the
+    test database.
+    """
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(User.objects.create_user('candidate', password='secret'))
+
+    def upload(self, name='resume.txt', content=None):
+        content = SyntheticResumeGenerator().generate() if content is None else content
+        return self.client.post(reverse('resume_upload'), {'resume': SimpleUploadedFile(name, content.encode())})
+
+    def run_worker(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        with mock.patch.object(worker_command, 'ProcessPoolExecutor', ThreadPoolExecutor):
+            call_command('scan_worker', '--once', '--workers', '1', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_upload_is_scanned_by_the_worker(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], ScanJob.STATUS_QUEUED)
+
+        self.run_worker()
+        status = self.client.get(status_url).json()
+        self.assertEqual(status['status'], ScanJob.STATUS_DONE)
+        resume = Resume.objects.get(pk=status['resume_id'])
+        self.assertEqual((resume.file_name, resume.ats_score), ('resume.txt', status['ats_score']))
+
+        # Someone else's job looks the same as a missing one
+        self.client.force_login(User.objects.create_user('other', password='secret'))
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+
+    def test_failed_scan_is_reported(self):
+        status_url = self.upload(content='Too short to score').json()['status_url']
+        self.run_worker()
+        status = self.client.get(status_url).json()
+        self.assertEqual((status['status'], status['error']), (ScanJob.STATUS_FAILED, 'Insufficient text extracted'))
+        self.assertFalse(Resume.objects.exists())
+
+    def test_uploads_are_checked(self):
+        self.assertEqual(self.upload('resume.docx').status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.upload().status_code, 302)
+        self.assertFalse(ScanJob.objects.exists())
+
+    def test_resume_and_job_status_are_saved_together(self):
+        self.upload()
+        job = ScanJob.objects.get()
+        future = Future()
+        future.set_result((job.file.path, IndustryATSScanner().scan_resume(job.file.path), None))
+
+        # The job's status update fails after the Resume row was written
+        filter_jobs = ScanJob.objects.filter
+        failures = [DatabaseError('connection lost')]
+
+        def flaky_filter(*args, **kwargs):
+            jobs = filter_jobs(*args, **kwargs)
+            if failures:
+                jobs.update = mock.Mock(side_effect=failures.pop())
+            return jobs
+
+        with mock.patch.object(ScanJob.objects, 'filter', flaky_filter):
+            worker_command.Command(stdout=io.StringIO(), stderr=io.StringIO()).finish_job(job, future)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (ScanJob.STATUS_FAILED, 'Could not save: connection lost'))
+        self.assertFalse(Resume.objects.exists())
+
+    def test_stale_jobs_are_recovered_while_the_worker_runs(self):
+        self.upload()
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        abandoned = ScanJob.objects.create(file='resumes/abandoned.txt', original_name='abandoned.txt',
+                                           status=ScanJob.STATUS_RUNNING, started_at=an_hour_ago, attempts=3)
+        with mock.patch.object(worker_command.Command, 'recover_stale_jobs',
+                               autospec=True, side_effect=worker_command.Command.recover_stale_jobs) as recover:
+            self.run_worker('--recover-every', '0')
+        # Before the first claim and again after finishing the upload
+        self.assertGreaterEqual(recover.call_count, 2)
+        abandoned.refresh_from_db()
+        self.assertEqual((abandoned.status, abandoned.error),
+                         (ScanJob.STATUS_FAILED, 'Gave up after repeated worker failures'))
+
+    def test_stale_job_with_attempts_left_is_requeued(self):
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        stale = ScanJob.objects.create(file='resumes/a.txt', original_name='a.txt',
+                                       status=ScanJob.STATUS_RUNNING, started_at=an_hour_ago, attempts=1)
+        running = ScanJob.objects.create(file='resumes/b.txt', original_name='b.txt',
+                                         status=ScanJob.STATUS_RUNNING, started_at=timezone.now(), attempts=1)
+        worker_command.Command(stdout=io.StringIO()).recover_stale_jobs(stale_after=900, max_attempts=3)
+        self.assertEqual(dict(ScanJob.objects.values_list('pk', 'status')),
+                         {stale.pk: ScanJob.STATUS_QUEUED, running.pk: ScanJob.STATUS_RUNNING})
+
+
+class ResumeBulkWriterTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_file(os.path.join(directory, 'resume.txt'), SyntheticResumeGenerator().generate())
+            cls.results = IndustryATSScanner().scan_resume(path)
+
+    def stored(self):
+        return sorted(Resume.objects.values_list('file_name', flat=True))
+
+    def test_results_are_inserted_a_batch_at_a_time(self):
+        saved = []
+        writer = ResumeBulkWriter(batch_size=2, on_saved=lambda file_path, resume: saved.append(resume.pk))
+        writer.add(self.results, 'a.txt')
+        self.assertEqual(self.stored(), [])
+        writer.add(self.results, 'b.txt')
+        self.assertEqual(self.stored(), ['a.txt', 'b.txt'])
+        writer.add(self.results, 'c.txt')
+        self.assertEqual(len(self.stored()), 2)
+
+        writer.flush()
+        self.assertEqual(self.stored(), ['a.txt', 'b.txt', 'c.txt'])
+        self.assertEqual((writer.saved, writer.failed), (3, 0))
+        self.assertEqual(sorted(saved), sorted(Resume.objects.values_list('pk', flat=True)))
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        errors = []
+        writer = ResumeBulkWriter(batch_size=10, on_error=lambda file_path, error: errors.append(file_path))
+        writer.add(self.results, 'good.txt')
+        writer.add(self.results, 'bad.txt', ats_score=None)
+        writer.add(self.results, 'also_good.txt')
+        writer.flush()
+
+        self.assertEqual(self.stored(), ['also_good.txt', 'good.txt'])
+        self.assertEqual(errors, ['bad.txt'])
+        self.assertEqual((writer.saved, writer.failed), (2, 1))
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+
+    def run_benchmark(self, *args):
+        call_command('ats_benchmark', '--pages', '1', '--densities', 'low', '--formats', 'txt',
+                     '--repeat', '1', *args, stdout=io.StringIO())
+
+    def test_saved_baseline_is_compared_with_a_tolerance(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        baseline = os.path.join(directory, 'baseline.json')
+        self.run_benchmark('--save-baseline', baseline)
+        # One run of one file is too noisy for the default tolerance; this only checks the round trip
+        self.run_benchmark('--compare', baseline, '--tolerance', '100')
+
+        with open(baseline) as file:
+            saved = json.load(file)
+        self.assertIn('preprocess', saved['stages'])
+        for stats in saved['stages'].values():
+            stats['p50_ms'] = stats['p95_ms'] = 0.001
+        write_file(baseline, json.dumps(saved))
+        with self.assertRaisesRegex(CommandError, 'scan_resume p50'):
+            self.run_benchmark('--compare', baseline)
+
+
+class ScanProfilingTests(TestCase):
+
+    STAGES = ['read', 'cache_lookup', 'extract_text', 'preprocess', 'contact_info', 'sections', 'education',
+              'experience', 'skills', 'achievements', 'keywords', 'text_terms']
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = write_file(os.path.join(self.directory, 'resume.txt'), SyntheticResumeGenerator().generate())
+
+    def test_profiler_reports_every_stage_in_order(self):
+        results = IndustryATSScanner(cache=ResumeScanCache(), hooks=[StageProfiler()]).scan_resume(self.path)
+        stages = results['profile']['stages']
+        self.assertEqual([stage['stage'] for stage in stages], self.STAGES)
+        self.assertTrue(all(stage['seconds'] >= 0 for stage in stages))
+        self.assertAlmostEqual(results['profile']['total_seconds'],
+                               sum(stage['seconds'] for stage in stages), places=5)
+
+        self.assertNotIn('profile', IndustryATSScanner().scan_resume(self.path))
+
+    def test_hooks_see_cached_scans(self):
+        class Recorder(ScanHook):
+            def __init__(self):
+                self.calls = []
+
+            def scan_started(self, file_path):
+                self.calls.append('started')
+
+            def stage_finished(self, stage, seconds, allocated_blocks):
+                self.calls.append(stage)
+
+            def scan_finished(self, file_path, results):
+                self.calls.append('cached' if results.get('cached') else 'finished')
+
+        scanner = IndustryATSScanner(cache=ResumeScanCache())
+        Resume.objects.create(**resume_fields_from_scan(scanner.scan_resume(self.path), self.path))
+
+        recorder = Recorder()
+        scanner.add_hook(recorder)
+        scanner.scan_resume(self.path)
+        self.assertEqual(recorder.calls, ['started', 'read', 'cache_lookup', 'cached'])
+
+    def test_store_profile_keeps_the_breakdown(self):
+        out = io.StringIO()
+        call_command('ats_resume_scan', self.path, '--store-profile', stdout=out)
+        self.assertIn('STAGE PROFILE', out.getvalue())
+        profile = Resume.objects.get().full_scan_data['profile']
+        self.assertEqual([stage['stage'] for stage in profile['stages']], self.STAGES)
+
+        other = write_file(os.path.join(self.directory, 'other.txt'), SyntheticResumeGenerator().generate(index=1))
+        call_command('ats_resume_scan', other, '--profile', stdout=io.StringIO())
+        self.assertNotIn('profile', Resume.objects.get(file_name='other.txt').full_scan_data)
+
+
+class JobsIngestTests(TestCase):
+
+    def test_clean_jobs_frame(self):
+        frame = job_frame(
+            {'id': 'in-1', 'job_url': 'https://indeed.example/1', 'title': 'Engineer',
+             'description': 'x' * 6000, 'min_amount': float('nan')},
+            {'id': None, 'job_url': 'https://indeed.example/2', 'title': None},
+        )
+        first, second = (dict(zip(JOB_COLUMNS, row)) for row in clean_jobs_frame(frame, 'batch-1', '2024-05-01'))
+
+        self.assertEqual(first['id'], 'in-1')
+        self.assertEqual(len(first['description']), 5000)
+        self.assertEqual(first['min_amount'], '')
+        self.assertEqual(first['batch_id'], 'batch-1')
+        self.assertEqual(second['title'], '')
+        # Without a scraper id the URL decides it, so a re-scrape gets the same one
+        again = dict(zip(JOB_COLUMNS, clean_jobs_frame(frame, 'batch-2', '2024-05-02')[1]))
+        self.assertTrue(second['id'].startswith('job-'))
+        self.assertEqual(second['id'], again['id'])
+
+    def test_parse_typed_columns(self):
+        text = {field: pd.Series(values, dtype=object) for field, values in {
+            'min_amount': ['1,200', 'negotiable', ''],
+            'max_amount': ['99999999999999', '2500.456', ''],
+            'date_posted': ['2024-05-01', 'yesterday', ''],
+            'is_remote': ['True', 'no', 'maybe'],
+            'company_rating': ['4.25', '7', ''],
+            'jobs_scraped_at': ['2024-05-01T10:00:00', 'not a date', ''],
+        }.items()}
+        typed = parse_typed_columns(text)
+
+        self.assertEqual(list(typed['min_salary']), [1200.0, None, None])
+        self.assertEqual(list(typed['max_salary']), [None, 2500.46, None])
+        self.assertEqual(list(typed['posted_date']), [date(2024, 5, 1), None, None])
+        self.assertEqual(list(typed['remote']), [True, False, None])
+        self.assertEqual(list(typed['rating']), [4.25, None, None])
+        self.assertEqual(typed['scraped_at'][0].date(), date(2024, 5, 1))
+        self.assertEqual(list(typed['scraped_at'][1:]), [None, None])
+
+    def test_backfill_gives_every_row_a_scraped_at(self):
+        rows = {
+            'parsed': {'jobs_scraped_at': '2024-05-03T10:00:00', 'min_amount': '1,000'},
+            'last_write': {'jobs_scraped_at': 'not a date'},
+            'posting_day': {'jobs_scraped_at': 'not a date', 'date_posted': '2024-05-01'},
+            'unknown': {'jobs_scraped_at': None},
+        }
+        for pk, fields in rows.items():
+            Jobs.objects.create(id=pk, job_url=f'https://indeed.example/{pk}', **fields)
+        Jobs.objects.exclude(pk='last_write').update(updated_at=None)
+        last_write = Jobs.objects.get(pk='last_write').updated_at
+
+        call_command('backfill_job_columns', stdout=io.StringIO())
+        scraped_at = dict(Jobs.objects.values_list('id', 'scraped_at'))
+        self.assertEqual(scraped_at['parsed'].date(), date(2024, 5, 3))
+        self.assertEqual(scraped_at['last_write'], last_write)
+        self.assertEqual(scraped_at['posting_day'], datetime(2024, 5, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(scraped_at['unknown'], datetime(1970, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(Jobs.objects.get(pk='parsed').min_salary, 1000)
+
+    def test_content_hash_tracks_posting_content_only(self):
+        def row_hash(**changes):
+            row = {'title': 'Engineer', 'company_rating': '4.1', 'company_num_employees': '500'}
+            frame = job_frame({**row, **changes})
+            return clean_jobs_frame(frame, 'batch-1', '2024-05-01')[0][JOB_COLUMNS.index('content_hash')]
+
+        self.assertEqual(row_hash(), row_hash(company_num_employees='501'))
+        self.assertNotEqual(row_hash(), row_hash(title='Senior Engineer'))
+        self.assertNotEqual(row_hash(), row_hash(company_rating='4.2'))
+
+    def test_content_hashes_separate_fields(self):
+        text = {field: pd.Series(['', ''], dtype=object) for field in HASHED_FIELDS}
+        text['title'] = pd.Series(['ab', 'a'], dtype=object)
+        text['company'] = pd.Series(['', 'b'], dtype=object)
+        first, second = content_hashes(text)
+        self.assertNotEqual(first, second)
+
+    def test_ingester_counts(self):
+        ingester = JobsIngester()
+        rows = [{'id': f'in-{number}', 'job_url': f'https://indeed.example/{number}', 'title': 'Engineer'}
+                for number in range(3)]
+        self.assertEqual(ingest(ingester, *rows), (3, 0, 0, 0))
+
+        changed = dict(rows[1], title='Senior Engineer')
+        repeated = dict(rows[2], id='in-2-again')
+        self.assertEqual(ingest(JobsIngester(), rows[0], changed, rows[2], repeated), (0, 1, 3, 0))
+        self.assertEqual(Jobs.objects.get(pk='in-1').title, 'Senior Engineer')
+
+        errors = []
+        ingester = JobsIngester(on_error=lambda index, error: errors.append(index))
+        # A new posting whose id belongs to a stored one is an error, not an overwrite
+        collision = {'id': 'in-0', 'job_url': 'https://indeed.example/other', 'title': 'Other'}
+        self.assertEqual(ingest(ingester, collision), (0, 0, 0, 1))
+        self.assertEqual(errors, [0])
+        self.assertEqual(Jobs.objects.get(pk='in-0').title, 'Engineer')
+
+    @on_postgresql
+    def test_copy_loader_matches_orm_ingester(self):
+        batches = [
+            [
+                {'id': 'in-1', 'job_url': 'https://indeed.example/1', 'title': 'Engineer',
+                 'min_amount': '1,000', 'is_remote': 'true', 'date_posted': '2024-05-01'},
+                {'id': 'in-2', 'job_url': 'https://indeed.example/2', 'title': 'Analyst'},
+                {'id': 'no-url', 'job_url': None, 'title': 'Walk-in'},
+            ],
+            [
+                # unchanged, changed under a new id, new, repeated URL, id taken, id taken without URL
+                {'id': 'in-1', 'job_url': 'https://indeed.example/1', 'title': 'Engineer',
+                 'min_amount': '1,000', 'is_remote': 'true', 'date_posted': '2024-05-01'},
+                {'id': 'in-2b', 'job_url': 'https://indeed.example/2', 'title': 'Senior Analyst'},
+                {'id': 'in-3', 'job_url': 'https://indeed.example/3', 'title': 'Manager'},
+                {'id': 'in-3b', 'job_url': 'https://indeed.example/3', 'title': 'Manager'},
+                {'id': 'in-1', 'job_url': 'https://indeed.example/other', 'title': 'Other'},
+                {'id': 'no-url', 'job_url': None, 'title': 'Walk-in, again'},
+            ],
+        ]
+
+        def load(make_loader):
+            Jobs.objects.all().delete()
+            fallbacks, counts = [], []
+            for number, batch in enumerate(batches):
+                errors = []
+                loader = make_loader(lambda index, error: errors.append(index), fallbacks.append)
+                counts.append(ingest(loader, *batch, batch_id=f'batch-{number}') + (errors,))
+            rows = list(Jobs.objects.order_by('id').values_list(
+                'id', 'job_url', 'title', 'content_hash', 'min_salary', 'remote', 'posted_date', 'scraped_at'))
+            return counts, rows, fallbacks
+
+        orm_counts, orm_rows, _ = load(lambda on_error, on_fallback: JobsIngester(on_error=on_error))
+        copy_counts, copy_rows, fallbacks = load(
+            lambda on_error, on_fallback: CopyJobsLoader(on_error=on_error, on_fallback=on_fallback))
+
+        self.assertEqual(fallbacks, [])
+        self.assertEqual(copy_counts, orm_counts)
+        self.assertEqual(copy_rows, orm_rows)
+        self.assertEqual(orm_counts[1], (1, 1, 2, 2, [4, 5]))
+
+
+
+class ScrapingTests(SimpleTestCase):
+
+    def test_build_tasks_drops_duplicates(self):
+        tasks = build_tasks(['data engineer', 'data engineer'], ['Pune'], ['indeed', 'linkedin'])
+        self.assertEqual(tasks, [ScrapeTask('indeed', 'data engineer', 'Pune'),
+                                 ScrapeTask('linkedin', 'data engineer', 'Pune')])
+
+    @mock.patch('home.scraping.time.sleep')
+    def test_call_with_retry_backs_off_then_succeeds(self, sleep):
+        func = mock.Mock(side_effect=[ConnectionError('a'), ConnectionError('b'), 'page'])
+        retries = []
+        result = call_with_retry(func, retries=3, backoff=1.0,
+                                 on_retry=lambda attempt, error, delay: retries.append((attempt, str(error))))
+        self.assertEqual(result, 'page')
+        self.assertEqual(retries, [(1, 'a'), (2, 'b')])
+        first, second = (call.args[0] for call in sleep.call_args_list)
+        self.assertTrue(1.0 <= first <= 1.5 and 2.0 <= second <= 3.0)
+
+    @mock.patch('home.scraping.time.sleep')
+    def test_call_with_retry_gives_up(self, sleep):
+        func = mock.Mock(side_effect=ConnectionError('down'))
+        with self.assertRaises(ConnectionError):
+            call_with_retry(func, retries=2)
+        self.assertEqual(func.call_count, 3)
+
+    @mock.patch('home.scraping.time.sleep')
+    def test_limited_call_releases_slot_between_attempts(self, sleep):
+        limiter = SiteLimiter(concurrency=1)
+        free_during_backoff = []
+
+        def on_retry(attempt, error, delay):
+            acquired = limiter.semaphore.acquire(blocking=False)
+            free_during_backoff.append(acquired)
+            if acquired:
+                limiter.semaphore.release()
+
+        func = mock.Mock(side_effect=[ConnectionError('reset'), 'page'])
+        self.assertEqual(limited_call(limiter, func, on_retry=on_retry), 'page')
+        self.assertEqual(free_during_backoff, [True])
+
+    def test_fan_out_keeps_throttled_site_to_its_own_threads(self):
+        release = threading.Event()
+        running = {'slow': 0, 'peak': 0}
+        lock = threading.Lock()
+        limiters = {'slow': SiteLimiter(concurrency=1)}
+
+        def fetch(task):
+            if task.site == 'slow':
+                with limiters['slow'].slot():
+                    with lock:
+                        running['slow'] += 1
+                        running['peak'] = max(running['peak'], running['slow'])
+                    release.wait(5)
+                    with lock:
+                        running['slow'] -= 1
+            return task.term
+
+        tasks = [ScrapeTask('slow', f'term {number}', 'Pune') for number in range(3)]
+        tasks.append(ScrapeTask('fast', 'fast term', 'Pune'))
+        results = fan_out(tasks, fetch, workers=2, limiters=limiters)
+        # The fast site finishes while every slow sub-scrape is still waiting
+        first_task, first_result, first_error = next(results)
+        release.set()
+        rest = list(results)
+
+        self.assertEqual((first_task.site, first_result, first_error), ('fast', 'fast term', None))
+        self.assertEqual(sorted(result for _, result, _ in rest), ['term 0', 'term 1', 'term 2'])
+        self.assertEqual(running['peak'], 1)
+
+    def test_fan_out_reports_errors_per_task(self):
+        def fetch(task):
+            if task.site == 'linkedin':
+                raise ConnectionError('blocked')
+            return task.site
+
+        results = {task.site: (result, error)
+                   for task, result, error in fan_out(build_tasks(['t'], ['l'], ['indeed', 'linkedin']), fetch)}
+        self.assertEqual(results['indeed'], ('indeed', None))
+        self.assertIsNone(results['linkedin'][0])
+        self.assertIsInstance(results['linkedin'][1], ConnectionError)
+
+
+@skipIf(scrape_command is None, 'needs python-jobspy')
+class ScrapeJobsCommandTests(TransactionTestCase):
+    """``manage.py scrape_jobs`` end to end against ``FakeBoard``.
+
+    A TransactionTestCase, since the scrape threads query the jobs the main
+    thread saved.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        # The command writes its CSV backup to the working directory
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.directory)
+        settings_override = override_settings(SKILL_INDEX_DIR=os.path.join(self.directory, 'skill_index'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.stderr = io.StringIO()
+
+    def scrape(self, board, config=None, *args):
+        config = {'sites': ['indeed'], 'site_limits': {'indeed': {'concurrency': 2, 'min_interval': 0}},
+                  **(config or {})}
+        path = write_file(os.path.join(self.directory, 'config.json'), json.dumps(config))
+        with mock.patch.object(scrape_command, 'scrape_jobs', board):
+            call_command('scrape_jobs', '--config', path, '--chunk-size', '2', '--backoff', '0', *args,
+                         stdout=io.StringIO(), stderr=self.stderr)
+
+    def test_every_sub_scrape_is_saved(self):
+        board = FakeBoard(5)
+        self.scrape(board, {'sites': ['indeed', 'google'], 'terms': ['engineer', 'analyst'],
+                            'site_limits': {site: {'min_interval': 0} for site in ('indeed', 'google')}})
+        self.assertEqual(len(board.calls), 2 * 2 * 3)
+        self.assertEqual(Jobs.objects.count(), 10)
+
+    def test_failed_page_is_retried_on_its_own(self):
+        board = FakeBoard(5, fail_at={('indeed', 2)})
+        self.scrape(board)
+        self.assertEqual(board.offsets(), [0, 2, 2, 4])
+        self.assertEqual(Jobs.objects.count(), 5)
+        self.assertIn('Retrying', self.stderr.getvalue())
+
+    def test_load_from_reingests_the_backup_in_chunks(self):
+        self.scrape(FakeBoard(5))
+        backup, = (name for name in os.listdir(self.directory) if name.startswith('jobs_'))
+        Jobs.objects.all().delete()
+
+        out = io.StringIO()
+        call_command('scrape_jobs', '--load-from', backup, '--chunk-size', '2', stdout=out)
+        self.assertIn('5 rows read', out.getvalue())
+        self.assertEqual(sorted(Jobs.objects.values_list('id', flat=True)),
+                         [f'indeed-{number}' for number in range(5)])
+
+        with self.assertRaisesMessage(CommandError, 'Backup not found'):
+            call_command('scrape_jobs', '--load-from', 'missing.csv', stdout=io.StringIO())
+
+    def test_watermark_narrows_the_next_window(self):
+        board = FakeBoard(5)
+        self.scrape(board)
+        watermark = ScrapeWatermark.objects.get(site='indeed')
+        self.assertEqual(watermark.last_fetched, 5)
+
+        self.scrape(board)
+        first_window, second_window = (hours for _, offset, hours in board.calls if offset == 0)
+        self.assertEqual(first_window, 200)
+        self.assertLessEqual(second_window, 3)
+
+        self.scrape(board, None, '--full')
+        self.assertEqual(board.calls[-1][2], 200)
+
+    def test_watermark_is_kept_when_rows_fail_to_save(self):
+        # Its id belongs to another posting, so the scraped indeed-1 cannot be saved
+        Jobs.objects.create(id='indeed-1', job_url='https://elsewhere.example/1', title='Other')
+        self.scrape(FakeBoard(3))
+        self.assertEqual(Jobs.objects.count(), 3)
+        self.assertFalse(ScrapeWatermark.objects.exists())
+        self.assertIn('watermark not advanced', self.stderr.getvalue())
+
+    def test_early_stop_only_on_newest_first_sites(self):
+        self.scrape(FakeBoard(5))
+
+        board = FakeBoard(7)
+        self.scrape(board)
+        self.assertEqual(board.offsets(), [0, 2, 4, 6])
+
+        board = FakeBoard(9)
+        self.scrape(board, {'newest_first_sites': ['indeed']})
+        # The second page holds postings 6 and 5, already stored by the run before
+        self.assertEqual(board.offsets(), [0, 2])
+        self.assertEqual(Jobs.objects.count(), 9)
+
+    def test_saving_error_stops_the_scrapers(self):
+        with mock.patch.object(scrape_command.Command, 'ingest_chunk', side_effect=DatabaseError('disk full')):
+            with self.assertRaises(DatabaseError):
+                self.scrape(FakeBoard(100), {'terms': ['a', 'b', 'c']}, '--workers', '1')
+
+        # Nothing is left blocked on the queue the failed command stopped reading
+        scrapers = [thread for thread in threading.enumerate() if thread.name.startswith('scrape-')]
+        for thread in scrapers:
+            thread.join(timeout=5)
+        self.assertEqual([thread.name for thread in scrapers if thread.is_alive()], [])
+
+
+class JobListTests(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        # Two pairs share a scraped_at, so pages must break ties on id
+        for job_id, age in [('a', 0), ('b', 1), ('c', 1), ('d', 2), ('e', 2), ('f', 3)]:
+            Jobs.objects.create(id=job_id, title='Engineer', location='Pune', scraped_at=now - timedelta(hours=age))
+        Jobs.objects.create(id='not-backfilled', title='Engineer')
+
+    def test_pages_follow_the_cursor_without_gaps_or_repeats(self):
+        listed, query, pages = [], 'per_page=2', 0
+        while query is not None:
+            response = self.client.get(f"{reverse('job_list')}?{query}")
+            self.assertEqual(response.status_code, 200)
+            listed.extend(job.id for job in response.context['jobs'])
+            self.assertEqual(response.context['is_first_page'], pages == 0)
+            query, pages = response.context['next_page_query'], pages + 1
+
+        self.assertEqual(listed, ['a', 'c', 'b', 'e', 'd', 'f'])
+        self.assertEqual(pages, 3)
+
+    def test_invalid_cursor_starts_over(self):
+        response = self.client.get(reverse('job_list'), {'after': 'not-a-cursor', 'per_page': 2})
+        self.assertEqual([job.id for job in response.context['jobs']], ['a', 'c'])
+        self.assertTrue(response.context['is_first_page'])
+
+
+@on_postgresql
+class JobSearchSetupTests(TransactionTestCase):
+    """``manage.py setup_job_search``; a TransactionTestCase, as it creates indexes CONCURRENTLY."""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                self.skipTest('needs the pg_trgm extension')
+
+    def test_trigger_and_search(self):
+        now = timezone.now()
+        Jobs.objects.create(id='j1', title='Data Engineer', company='Acme Analytics', location='Pune, MH',
+                            description='Build pipelines in Python.', scraped_at=now)
+        call_command('setup_job_search', stdout=io.StringIO())
+        Jobs.objects.create(id='j2', title='Nurse', company='City Hospital', location='Mumbai, MH',
+                            description='Night shifts.', scraped_at=now)
+
+        # The backfill filled the existing row, the trigger the new one
+        self.assertFalse(Jobs.objects.filter(search_vector__isnull=True).exists())
+        self.assertEqual([job.id for job in search_jobs('pipelines python', NO_FILTERS)], ['j1'])
+        self.assertEqual([job.id for job in search_jobs('night shift', NO_FILTERS)], ['j2'])
+        # No full-text match for a misspelt company: trigram similarity takes over
+        self.assertEqual([job.id for job in search_jobs('Acme Analytcs', NO_FILTERS)], ['j1'])
+
+        Jobs.objects.filter(pk='j2').update(description='Day shifts.')
+        self.assertEqual([job.id for job in search_jobs('night shift', NO_FILTERS)], [])
+
+    def test_search_returns_one_copy_per_posting(self):
+        for job_id in ('j1', 'j2'):
+            Jobs.objects.create(id=job_id, title='Data Engineer', company='Acme Analytics', canonical_id='j1',
+                                description='Build pipelines in Python.', scraped_at=timezone.now())
+        call_command('setup_job_search', stdout=io.StringIO())
+        self.assertEqual([job.id for job in search_jobs('pipelines python', NO_FILTERS)], ['j1'])
+        self.assertEqual([job.id for job in search_jobs('Acme Analytcs', NO_FILTERS)], ['j1'])
+
+    def test_location_filter_can_use_the_trigram_index(self):
+        call_command('setup_job_search', stdout=io.StringIO())
+        with connection.cursor() as cursor:
+            # Leave the planner a bitmap scan or nothing, as it would pick on a large table
+            cursor.execute('SET enable_seqscan = off')
+            cursor.execute('SET enable_indexscan = off')
+        plan = filter_jobs(Jobs.objects.all(), {**NO_FILTERS, 'location': 'pune'}).explain()
+        self.assertIn('home_jobs_location_upper_trgm', plan)
+
+
+class SkillIndexTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(SKILL_INDEX_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        for job_id, description in [('web', 'Python, Django and PostgreSQL'),
+                                    ('data', 'Python, AWS, Docker and PostgreSQL'),
+                                    ('java', 'Java, Kafka and AWS')]:
+            Jobs.objects.create(id=job_id, title='Engineer', description=description, scraped_at=timezone.now())
+        write_segment(Jobs.objects.all())
+
+    def test_top_jobs_ranks_jobs_sharing_skills(self):
+        matches = SkillIndex.load().top_jobs(['python', 'django', 'postgresql'], k=5)
+        self.assertEqual([match.job_id for match in matches], ['web', 'data'])
+        self.assertEqual(matches[0].score, 1.0)
+        self.assertEqual(sorted(matches[1].matched_skills), ['postgresql', 'python'])
+        self.assertEqual(sorted(matches[1].missing_skills), ['aws', 'docker'])
+
+        self.assertEqual([match.job_id for match in SkillIndex.load().top_jobs(['python', 'aws'], k=1)], ['data'])
+        self.assertEqual(SkillIndex.load().top_jobs(['cobol']), [])
+
+    def test_newer_segment_replaces_a_job(self):
+        Jobs.objects.filter(pk='java').update(description='Python, Django and PostgreSQL', skill_count=None)
+        write_segment(Jobs.objects.filter(pk='java'))
+        matches = SkillIndex.load().top_jobs(['java', 'kafka'])
+        self.assertEqual(matches, [])
+
+    def test_top_jobs_view_is_limited_to_the_uploader(self):
+        owner = User.objects.create_user('owner', password='secret')
+        resume = Resume.objects.create(file_name='resume.pdf', technical_skills=['python', 'django'])
+        ScanJob.objects.create(file='resumes/resume.pdf', original_name='resume.pdf', uploaded_by=owner,
+                               status=ScanJob.STATUS_DONE, resume=resume)
+        url = reverse('resume_top_jobs', args=[resume.id])
+
+        self.client.force_login(owner)
+        response = self.client.get(url, {'k': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['id'] for job in response.json()['jobs']], ['web'])
+
+        self.client.force_login(User.objects.create_user('other', password='secret'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class CountingPattern:
+    """Wraps a compiled pattern, counting its ``findall()`` calls."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.findall_calls = 0
+
+    def findall(self, text):
+        self.findall_calls += 1
+        return self.pattern.findall(text)
+
+    def __getattr__(self, name):
+        return getattr(self.pattern, name)
+
+
+class JobVectorTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(JOB_VECTORS_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        for job_id, title, description in [
+            ('data', 'Data Engineer', 'Build batch and streaming pipelines with Python, Spark, Airflow and SQL.'),
+            ('web', 'Web Developer', 'Build web applications with Python, Django and React.'),
+            ('nurse', 'Staff Nurse', 'Night shifts on a busy surgical ward; patient care and charting.'),
+        ]:
+            Jobs.objects.create(id=job_id, title=title, description=description, scraped_at=timezone.now())
+        job_vectors.rebuild()
+
+        self.text = SyntheticResumeGenerator().generate()
+        self.path = write_file(os.path.join(self.directory, 'resume.txt'), self.text)
+
+    def test_text_terms_reuse_the_keyword_tokens(self):
+        pattern = CountingPattern(PATTERNS['keyword'])
+        with mock.patch.dict(PATTERNS, keyword=pattern):
+            results = IndustryATSScanner().scan_resume(self.path)
+        # calculate_keywords and text_terms share one tokenization
+        self.assertEqual(pattern.findall_calls, 1)
+
+        expected = HashingTokenizer()(self.text)
+        stored = decode_terms(results['text_terms'])
+        self.assertEqual(sorted(stored), sorted(expected))
+        for feature, frequency in expected.items():
+            self.assertAlmostEqual(stored[feature], frequency, places=5)
+
+    def test_top_jobs_ranks_by_similarity(self):
+        vectors = job_vectors.JobVectors(job_vectors.segment_paths(self.directory))
+        ranked = vectors.top_jobs(['Python data pipelines with Spark and Airflow', 'patient care on night shifts'])
+        self.assertEqual([job_id for job_id, _ in ranked[0]], ['data', 'web'])
+        self.assertEqual([job_id for job_id, _ in ranked[1]], ['nurse'])
+        self.assertGreater(ranked[0][0][1], ranked[0][1][1])
+
+    def test_similar_jobs_view(self):
+        owner = User.objects.create_user('owner', password='secret')
+        terms = HashingTokenizer()('Python, Spark and Airflow pipelines')
+        resume = Resume.objects.create(file_name='resume.txt', text_terms=job_vectors.encode_terms(terms))
+        ScanJob.objects.create(file='resumes/resume.txt', original_name='resume.txt', uploaded_by=owner,
+                               status=ScanJob.STATUS_DONE, resume=resume)
+        url = reverse('resume_similar_jobs', args=[resume.id])
+
+        self.client.force_login(owner)
+        response = self.client.get(url, {'k': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['id'] for job in response.json()['jobs']], ['data'])
+
+        self.client.force_login(User.objects.create_user('other', password='secret'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_similar_jobs_needs_stored_text_terms(self):
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+        resume = Resume.objects.create(file_name='old.pdf')
+        self.assertEqual(self.client.get(reverse('resume_similar_jobs', args=[resume.id])).status_code, 409)
+
+
+class SkillBitsetTests(SimpleTestCase):
+
+    def test_encode_skills_round_trip(self):
+        bitset = encode_skills(['python', 'kotlin', 'rest api', 'not a skill'])
+        self.assertEqual(len(bitset), 32)
+        self.assertEqual(set(decode_skills(bitset)), {'python', 'kotlin', 'rest api'})
+
+    def test_count_matches(self):
+        resumes = [['python', 'django'], ['java'], ['python', 'sql', 'django', 'docker'], []]
+        bitsets = np.stack([np.frombuffer(encode_skills(skills), dtype='<u8') for skills in resumes],
+                           axis=1).astype(np.uint64)
+        job = {'python', 'django', 'docker'}
+        self.assertEqual(count_matches(bitsets, skill_mask(job)).tolist(),
+                         [len(job.intersection(skills)) for skills in resumes])
+
+
+class CandidateRankerTests(TransactionTestCase):
+    """A TransactionTestCase, since full reloads read the resumes from their own thread."""
+
+    def add_resume(self, *skills):
+        return Resume.objects.create(file_name='resume.pdf', skill_bitset=encode_skills(skills))
+
+    def test_refresh_is_throttled_and_incremental(self):
+        ranker = CandidateRanker()
+        self.add_resume('python')
+        ranker.refresh()
+        self.assertEqual(len(ranker.ids), 1)
+
+        java = self.add_resume('java')
+        with self.assertNumQueries(0):
+            ranker.refresh()
+        ranker.checked_at -= 60
+        ranker.refresh()
+        self.assertEqual(len(ranker.ids), 2)
+        self.assertEqual([candidate['resume_id'] for candidate in ranker.rank(['java'])], [java.id])
+
+    def test_resume_committed_after_a_newer_one_is_picked_up(self):
+        ranker = CandidateRanker()
+        self.add_resume('python')
+        ranker.refresh()
+
+        # Inserted before the last check, but committed only after it
+        late = self.add_resume('java')
+        Resume.objects.filter(pk=late.pk).update(scanned_at=ranker.loaded_until - timedelta(seconds=5))
+        ranker.checked_at = None
+        ranker.refresh()
+        self.assertEqual([candidate['resume_id'] for candidate in ranker.rank(['java'])], [late.id])
+        self.assertEqual(len(ranker.ids), 2)
+
+    def test_full_reload_runs_in_the_background(self):
+        ranker = CandidateRanker()
+        kept, deleted = self.add_resume('python'), self.add_resume('python', 'java')
+        ranker.refresh()
+        deleted.delete()
+
+        release = threading.Event()
+        read = ranker._read
+
+        def slow_read(queryset):
+            if threading.current_thread() is ranker.reloader:
+                release.wait(5)
+            return read(queryset)
+
+        ranker.checked_at, ranker.reloaded_at = None, ranker.reloaded_at - FULL_RELOAD_SECONDS
+        with mock.patch.object(ranker, '_read', slow_read):
+            ranker.refresh()
+            # Ranking is served from the loaded columns while the reload reads
+            self.assertEqual(len(ranker.rank(['python'])), 2)
+            release.set()
+            ranker.reloader.join(5)
+        self.assertEqual([candidate['resume_id'] for candidate in ranker.rank(['python'])], [kept.id])
+
+    def test_job_candidates_is_staff_only(self):
+        Jobs.objects.create(id='a1', title='Python developer', skills='Python')
+        url = reverse('job_candidates', args=['a1'])
+        self.assertEqual(self.client.get(url).status_code, 302)
+        user = User.objects.create_user('recruiter', password='secret')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class DedupTests(TestCase):
+
+    def test_minhash(self):
+        self.assertIsNone(minhash(shingles('Engineer', 'Acme', 'short')))
+        signature = minhash(shingles('Data Engineer', 'Acme', POSTING))
+        self.assertEqual(similarity(signature, minhash(shingles('Data Engineer', 'Acme', POSTING))), 1.0)
+        changed = minhash(shingles('Data Engineer', 'Acme', POSTING.replace('two junior', 'three junior')))
+        self.assertGreater(similarity(signature, changed), 0.8)
+
+    def test_deduplicator_groups_cross_site_copies(self):
+        Jobs.objects.create(id='in-1', site='indeed', title='Data Engineer', company='Acme', description=POSTING)
+        Jobs.objects.create(id='li-1', site='linkedin', title='Data Engineer', company='Acme',
+                            description=POSTING.replace('two junior', 'three junior'))
+        Jobs.objects.create(id='zr-1', site='zip_recruiter', title='Nurse', company='City Hospital',
+                            description='Care for patients on the night shift. ' * 10)
+        Jobs.objects.create(id='go-1', site='google', title='Intern', company='Acme', description='Short.')
+
+        deduplicator = JobDeduplicator(chunk_size=2).run(Jobs.objects.all())
+        canonical = dict(Jobs.objects.values_list('id', 'canonical_id'))
+        self.assertEqual(canonical, {'in-1': 'in-1', 'li-1': 'in-1', 'zr-1': 'zr-1', 'go-1': 'go-1'})
+        self.assertEqual(deduplicator.duplicates, 1)
+        self.assertFalse(JobLSHBucket.objects.filter(job_id='go-1').exists())
+
+        # Re-running a changed canonical job does not move its group
+        Jobs.objects.filter(pk='in-1').update(description=POSTING + ' Apply today.')
+        JobDeduplicator().run(Jobs.objects.filter(pk='in-1'))
+        self.assertEqual(dict(Jobs.objects.values_list('id', 'canonical_id'))['in-1'], 'in-1')
+
+
+class DuplicateJobViewTests(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        for job_id, site, canonical_id, remote in [('a1', 'indeed', 'a1', None), ('a2', 'linkedin', 'a1', True),
+                                                   ('a3', 'google', 'a1', True), ('b1', 'indeed', None, None)]:
+            Jobs.objects.create(id=job_id, site=site, canonical_id=canonical_id, remote=remote,
+                                title='Python developer', scraped_at=now)
+
+    def filtered(self, **filters):
+        return sorted(filter_jobs(Jobs.objects.all(), {**NO_FILTERS, **filters}).values_list('id', flat=True))
+
+    def test_filter_jobs_keeps_one_copy_per_posting(self):
+        self.assertEqual(self.filtered(), ['a1', 'b1'])
+        # The canonical copy is on another site, or does not match the filter
+        self.assertEqual(self.filtered(site='linkedin'), ['a2'])
+        self.assertEqual(self.filtered(remote='1'), ['a2'])
+
+    @skipIf(connection.vendor == 'postgresql', 'full-text search is covered by JobSearchSetupTests')
+    def test_search_jobs_collapses_duplicates(self):
+        self.assertEqual(sorted(job.id for job in search_jobs('python', NO_FILTERS)), ['a1', 'b1'])
+
+    def test_rankings_keep_the_best_ranked_copy(self):
+        self.assertEqual(list(distinct_postings(['a3', 'b1', 'a1', 'missing', 'a2'], 5)), ['a3', 'b1'])
+        self.assertEqual(list(distinct_postings(['a3', 'b1'], 1)), ['a3'])
+
+
+class JobSkillTests(TestCase):
+
+    def test_populate_job_skills_marks_every_job(self):
+        Jobs.objects.create(id='j1', title='Python developer', description='Django, PostgreSQL and Docker')
+        Jobs.objects.create(id='j2', title='Night watchman', description='Walk the site twice an hour')
+
+        self.assertEqual(populate_job_skills(Jobs.objects.all(), chunk_size=1), (2, 4))
+        self.assertEqual(sorted(JobSkill.objects.filter(job_id='j1').values_list('skill', flat=True)),
+                         ['django', 'docker', 'postgresql', 'python'])
+        self.assertEqual(dict(Jobs.objects.values_list('id', 'skill_count')), {'j1': 4, 'j2': 0})
+
+        # Jobs without any skill are not picked up again
+        out = io.StringIO()
+        call_command('backfill_job_skills', stdout=out)
+        self.assertIn('Backfill complete: 0 jobs', out.getvalue())
+
+    def test_skill_filter_and_counts_use_job_skills(self):
+        Jobs.objects.create(id='in-1', title='Python developer', description='Django', canonical_id='in-1')
+        Jobs.objects.create(id='li-1', title='Python developer', description='Django', canonical_id='in-1')
+        Jobs.objects.create(id='in-2', title='Python scripter', description='Night shifts')
+        populate_job_skills(Jobs.objects.all())
+
+        self.assertEqual(sorted(filter_jobs(Jobs.objects.all(), {**NO_FILTERS, 'skill': 'django'})
+                                .values_list('id', flat=True)), ['in-1'])
+        response = self.client.get(reverse('job_skill_counts'), {'category': 'programming'})
+        self.assertEqual(response.json()['skills'], [{'skill': 'python', 'category': 'programming', 'jobs': 2}])
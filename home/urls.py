@@ -5,5 +5,11 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('job_list/', views.job_list, name='job_list'),
     path('job_search/', views.job_search, name='job_search'),
+    path('jobs/skills/', views.job_skill_counts, name='job_skill_counts'),
+    path('jobs/<str:job_id>/candidates/', views.job_candidates, name='job_candidates'),
     path('resume_analyzer/', views.resume_analyzer, name='resume_analyzer'),
+    path('resume_analyzer/upload/', views.resume_upload, name='resume_upload'),
+    path('resume_analyzer/jobs/<int:job_id>/', views.scan_job_status, name='scan_job_status'),
+    path('resume_analyzer/resumes/<int:resume_id>/jobs/', views.resume_top_jobs, name='resume_top_jobs'),
+    path('resume_analyzer/resumes/<int:resume_id>/similar_jobs/', views.resume_similar_jobs, name='resume_similar_jobs'),
 ]
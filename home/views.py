@@ -1,5 +1,25 @@
+import base64
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.db.models.functions import Coalesce, Greatest
+from django.http import JsonResponse
 from django.shortcuts import render
-from home.models import Jobs
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlencode
+from django.views.decorators.http import require_GET, require_POST
+from home.job_vectors import decode_terms, get_job_vectors
+from home.job_skills import job_text, skill_categories, skill_extractor
+from home.models import Jobs, JobSkill, Resume, ScanJob
+from home.skill_bitsets import get_candidate_ranker
+from home.skill_index import get_skill_index
 from django.shortcuts import render, redirect
 from django.contrib.auth.views import LoginView, PasswordResetView, PasswordChangeView, PasswordResetConfirmView
 from admin_material.forms import RegistrationForm, LoginForm, UserPasswordResetForm, UserSetPasswordForm, UserPasswordChangeForm
@@ -9,19 +29,375 @@ from django.contrib.auth import logout
 def index(request):    
     return render(request, 'pages/index.html')
 
+JOB_LIST_PAGE_SIZE = 50
+JOB_LIST_MAX_PAGE_SIZE = 100
+JOB_SITES = ['indeed', 'linkedin', 'zip_recruiter', 'google']
+
+# Only what job_search.html shows; descriptions are never loaded for the list
+JOB_LIST_COLUMNS = ['id', 'title', 'company', 'location', 'site', 'job_url',
+                    'posted_date', 'remote', 'scraped_at']
+
+
+def encode_job_cursor(job):
+    raw = f'{job.scraped_at.isoformat()}|{job.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_job_cursor(cursor):
+    """Return ``(scraped_at, id)`` from a cursor, or None if it is not valid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        scraped_at, job_id = raw.split('|', 1)
+        scraped_at = parse_datetime(scraped_at)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return (scraped_at, job_id) if scraped_at is not None else None
+
+def job_filters(request):
+    return {
+        'site': request.GET.get('site', ''),
+        'location': request.GET.get('location', '').strip(),
+        'remote': request.GET.get('remote', ''),
+        'days': request.GET.get('days', ''),
+        'skill': request.GET.get('skill', '').strip().lower(),
+    }
+
+def match_job_filters(jobs, filters):
+    if filters['site']:
+        jobs = jobs.filter(site=filters['site'])
+    if filters['location']:
+        # Served by the UPPER(location) trigram index from ``manage.py setup_job_search``
+        jobs = jobs.filter(location__icontains=filters['location'])
+    if filters['remote'] in ('1', '0'):
+        jobs = jobs.filter(remote=filters['remote'] == '1')
+    if filters['days'].isdigit():
+        jobs = jobs.filter(posted_date__gte=timezone.localdate() - timedelta(days=int(filters['days'])))
+    if filters['skill']:
+        # JobSkill is unique per (job, skill), so the join never repeats a job
+        jobs = jobs.filter(job_skills__skill=filters['skill'])
+    return jobs
+
+def filter_jobs(jobs, filters):
+    """``jobs`` matching ``filters``, one row per posting.
+
+    Copies of a posting scraped from several sites share a ``canonical_id``.
+    Of the copies that match the filters, only one is kept: the canonical row
+    if it matches, otherwise the copy with the lowest id. So filtering on a
+    site shows that site's copy even when the canonical row is another site's.
+    """
+    better_copies = match_job_filters(Jobs.objects.order_by(), filters).filter(
+        canonical_id=OuterRef('canonical_id'),
+    ).exclude(id=OuterRef('id')).filter(
+        # The other copy is canonical, or neither is and it has the lower id
+        Q(id=F('canonical_id')) | (Q(id__lt=OuterRef('id')) & ~Q(canonical_id=OuterRef('id'))),
+    )
+    return match_job_filters(jobs, filters).filter(~Exists(better_copies))
+
+def visible_resumes(user):
+    """The resumes ``user`` may see: all of them for staff, else the ones their own uploads produced."""
+    if user.is_staff:
+        return Resume.objects.all()
+    return Resume.objects.filter(Exists(ScanJob.objects.filter(resume=OuterRef('pk'), uploaded_by=user)))
+
+def distinct_postings(job_ids, k):
+    """The best ranked of ``job_ids`` (best first), at most one per posting.
+
+    Returns ``{job_id: job}`` for up to ``k`` jobs, loaded with the list
+    columns; a job is dropped if a better ranked copy of it was kept.
+    """
+    jobs = Jobs.objects.only(*JOB_LIST_COLUMNS, 'canonical_id').in_bulk(job_ids)
+    kept, postings = {}, set()
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        if job is None or (job.canonical_id or job.id) in postings:
+            continue
+        postings.add(job.canonical_id or job.id)
+        kept[job_id] = job
+        if len(kept) == k:
+            break
+    return kept
+
+def job_page_size(request):
+    try:
+        return min(JOB_LIST_MAX_PAGE_SIZE, max(1, int(request.GET.get('per_page', JOB_LIST_PAGE_SIZE))))
+    except ValueError:
+        return JOB_LIST_PAGE_SIZE
+
 def job_list(request):
-    jobs = Jobs.objects.all()
-    return render(request, 'pages/job_search.html', {'jobs': jobs})
+    """Newest jobs first, paginated by keyset on ``(scraped_at, id)``.
+
+    Each page seeks past the last row of the previous one via the ``after``
+    cursor, so every page costs the same however deep it is. Rows without a
+    ``scraped_at`` (not yet backfilled) are not listed.
+    """
+    filters = job_filters(request)
+    page_size = job_page_size(request)
+
+    jobs = Jobs.objects.filter(scraped_at__isnull=False).only(*JOB_LIST_COLUMNS).order_by('-scraped_at', '-id')
+    jobs = filter_jobs(jobs, filters)
+
+    cursor = decode_job_cursor(request.GET.get('after', ''))
+    if cursor is not None:
+        scraped_at, job_id = cursor
+        jobs = jobs.filter(Q(scraped_at__lt=scraped_at) | Q(scraped_at=scraped_at, id__lt=job_id))
+
+    # One extra row tells whether there is a next page without a COUNT(*)
+    page = list(jobs[:page_size + 1])
+    has_next = len(page) > page_size
+    page = page[:page_size]
+
+    active = {key: value for key, value in filters.items() if value}
+    if page_size != JOB_LIST_PAGE_SIZE:
+        active['per_page'] = page_size
+    return render(request, 'pages/job_search.html', {
+        'segment': 'job_search',
+        'jobs': page,
+        'q': '',
+        'filters': filters,
+        'sites': JOB_SITES,
+        'skills': sorted(skill_categories()),
+        'is_first_page': cursor is None,
+        'first_page_query': urlencode(active),
+        'next_page_query': urlencode({**active, 'after': encode_job_cursor(page[-1])}) if has_next else None,
+    })
 
 # Pages
 def index(request):
   return render(request, 'pages/index.html', { 'segment': 'index' })
 
+@login_required
 def resume_analyzer(request):
   return render(request, 'pages/resume_analyzer.html', { 'segment': 'resume_analyzer' })
 
+@login_required
+@require_POST
+def resume_upload(request):
+  """Store an uploaded resume and queue it for the scan worker.
+
+  Returns immediately with the job id; scanning happens in ``manage.py scan_worker``
+  and the uploader polls ``scan_job_status``.
+  """
+  upload = request.FILES.get('resume')
+  if upload is None:
+    return JsonResponse({'error': 'No file uploaded (expected field "resume")'}, status=400)
+
+  ext = os.path.splitext(upload.name)[1].lower()
+  if ext not in ('.pdf', '.txt'):
+    return JsonResponse({'error': f'Unsupported format: {ext or "none"}'}, status=400)
+  if upload.size > settings.RESUME_UPLOAD_MAX_BYTES:
+    return JsonResponse({'error': 'File too large'}, status=400)
+
+  job = ScanJob.objects.create(file=upload, original_name=upload.name, uploaded_by=request.user)
+  return JsonResponse({
+    'job_id': job.id,
+    'status': job.status,
+    'status_url': reverse('scan_job_status', args=[job.id]),
+  }, status=202)
+
+@login_required
+@require_GET
+def scan_job_status(request, job_id):
+  jobs = ScanJob.objects.select_related('resume').filter(pk=job_id)
+  if not request.user.is_staff:
+    # Someone else's job looks the same as a missing one
+    jobs = jobs.filter(uploaded_by=request.user)
+  job = jobs.first()
+  if job is None:
+    return JsonResponse({'error': 'Scan job not found'}, status=404)
+
+  data = {
+    'job_id': job.id,
+    'file_name': job.original_name,
+    'status': job.status,
+    'created_at': job.created_at.isoformat(),
+    'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+  }
+  if job.status == ScanJob.STATUS_FAILED:
+    data['error'] = job.error
+  if job.resume is not None:
+    data['resume_id'] = job.resume.id
+    data['ats_score'] = job.resume.ats_score
+    data['score_category'] = job.resume.score_category
+  return JsonResponse(data)
+
+@login_required
+@require_GET
+def resume_top_jobs(request, resume_id):
+  """The jobs that best match a scanned resume's technical skills.
+
+  Scored against the inverted skill index (see ``home.skill_index``), so only
+  jobs sharing at least one skill with the resume are considered.
+  """
+  # Someone else's resume looks the same as a missing one
+  resume = visible_resumes(request.user).filter(pk=resume_id).only('id', 'technical_skills').first()
+  if resume is None:
+    return JsonResponse({'error': 'Resume not found'}, status=404)
+  try:
+    k = min(JOB_LIST_MAX_PAGE_SIZE, max(1, int(request.GET.get('k', 20))))
+  except ValueError:
+    return JsonResponse({'error': 'k must be a number'}, status=400)
+
+  # Every site can hold a copy of a posting, so rank enough to fill k postings
+  matches = get_skill_index().top_jobs(resume.technical_skills, k * len(JOB_SITES))
+  jobs = distinct_postings([match.job_id for match in matches], k)
+  return JsonResponse({
+    'resume_id': resume.id,
+    'skills': resume.technical_skills,
+    'jobs': [{
+      'id': job.id,
+      'title': job.title,
+      'company': job.company,
+      'location': job.location,
+      'site': job.site,
+      'job_url': job.job_url,
+      'score': match.score,
+      'matched_skills': match.matched_skills,
+      'missing_skills': match.missing_skills,
+    } for match in matches if (job := jobs.get(match.job_id)) is not None],
+  })
+
+@login_required
+@require_GET
+def resume_similar_jobs(request, resume_id):
+  """The jobs whose descriptions are most similar to a resume's text (TF-IDF cosine).
+
+  Uses the term frequencies stored when the resume was scanned; the file is
+  not read again.
+  """
+  # Someone else's resume looks the same as a missing one
+  resume = visible_resumes(request.user).filter(pk=resume_id).only('id', 'text_terms').first()
+  if resume is None:
+    return JsonResponse({'error': 'Resume not found'}, status=404)
+  if resume.text_terms is None:
+    return JsonResponse({'error': 'Resume was scanned before text vectors were stored; scan it again'}, status=409)
+  try:
+    k = min(JOB_LIST_MAX_PAGE_SIZE, max(1, int(request.GET.get('k', 20))))
+  except ValueError:
+    return JsonResponse({'error': 'k must be a number'}, status=400)
+  try:
+    terms = decode_terms(resume.text_terms)
+  except ValueError:
+    return JsonResponse({'error': 'Stored text vector is invalid; scan the resume again'}, status=409)
+
+  matches = get_job_vectors().top_jobs_for_terms([terms], k * len(JOB_SITES))[0]
+  jobs = distinct_postings([job_id for job_id, _ in matches], k)
+  return JsonResponse({
+    'resume_id': resume.id,
+    'jobs': [{
+      'id': job.id,
+      'title': job.title,
+      'company': job.company,
+      'location': job.location,
+      'site': job.site,
+      'job_url': job.job_url,
+      'score': score,
+    } for job_id, score in matches if (job := jobs.get(job_id)) is not None],
+  })
+
+@login_required
+@require_GET
+def job_candidates(request, job_id):
+  """The resumes that best fit a job: skill coverage, ATS score and experience combined.
+
+  Lists candidates' names and scores across all uploads, so staff only.
+  """
+  if not request.user.is_staff:
+    return JsonResponse({'error': 'Staff only'}, status=403)
+  job = Jobs.objects.filter(pk=job_id).only('id', 'title', 'skills', 'description', 'skill_count').first()
+  if job is None:
+    return JsonResponse({'error': 'Job not found'}, status=404)
+  try:
+    k = min(JOB_LIST_MAX_PAGE_SIZE, max(1, int(request.GET.get('k', 20))))
+  except ValueError:
+    return JsonResponse({'error': 'k must be a number'}, status=400)
+
+  if job.skill_count is None:
+    # Not backfilled into JobSkill yet
+    skills = sorted(skill_extractor()(job_text(job.title, job.skills, job.description)))
+  else:
+    skills = sorted(job.job_skills.values_list('skill', flat=True))
+  ranked = get_candidate_ranker().rank(skills, k)
+  resumes = Resume.objects.only('id', 'candidate_name', 'file_name', 'ats_score', 'years_of_experience').in_bulk(
+    [candidate['resume_id'] for candidate in ranked])
+  return JsonResponse({
+    'job_id': job.id,
+    'skills': skills,
+    'candidates': [dict(
+      candidate,
+      candidate_name=resume.candidate_name,
+      file_name=resume.file_name,
+      ats_score=resume.ats_score,
+      years_of_experience=resume.years_of_experience,
+    ) for candidate in ranked if (resume := resumes.get(candidate['resume_id'])) is not None],
+  })
+
+@require_GET
+def job_skill_counts(request):
+  """How many postings mention each skill, most in demand first (optionally within one category).
+
+  Copies of a posting from several sites count once, by their ``canonical_id``.
+  """
+  counts = JobSkill.objects.all()
+  category = request.GET.get('category', '')
+  if category:
+    counts = counts.filter(category=category)
+  counts = counts.values('skill', 'category').annotate(jobs=Count(Coalesce('job__canonical_id', 'job_id'), distinct=True)).order_by('-jobs', 'skill')
+  return JsonResponse({'skills': list(counts[:JOB_LIST_MAX_PAGE_SIZE])})
+
+def search_jobs(q, filters):
+  """Jobs matching ``q``, best match first.
+
+  Full-text search over the trigger-maintained ``search_vector`` (title,
+  company, skills, description), ranked by ``ts_rank``. When that finds
+  nothing, e.g. for a misspelt company, fall back to trigram similarity on
+  title and company. Other databases get a plain ``icontains`` lookup.
+  """
+  jobs = filter_jobs(Jobs.objects.only(*JOB_LIST_COLUMNS), filters)
+  if connection.vendor != 'postgresql':
+    return jobs.filter(Q(title__icontains=q) | Q(company__icontains=q)).order_by('-id')
+
+  query = SearchQuery(q, search_type='websearch', config='english')
+  matches = (jobs.filter(search_vector=query)
+             .annotate(rank=SearchRank(F('search_vector'), query))
+             .order_by('-rank', '-id'))
+  if matches.exists():
+    return matches
+  return (jobs.filter(Q(title__trigram_similar=q) | Q(company__trigram_similar=q))
+          .annotate(rank=Greatest(TrigramSimilarity('title', q), TrigramSimilarity('company', q)))
+          .order_by('-rank', '-id'))
+
 def job_search(request):
-  return render(request, 'pages/job_search.html', { 'segment': 'job_search' })
+  q = request.GET.get('q', '').strip()
+  if not q:
+    return job_list(request)
+
+  filters = job_filters(request)
+  page_size = job_page_size(request)
+  try:
+    page_number = max(1, int(request.GET.get('page', 1)))
+  except ValueError:
+    page_number = 1
+
+  # Ranked results cannot be keyset-paginated on a stable column, but search
+  # pages are shallow; one extra row still saves the COUNT(*)
+  offset = (page_number - 1) * page_size
+  page = list(search_jobs(q, filters)[offset:offset + page_size + 1])
+  has_next = len(page) > page_size
+  page = page[:page_size]
+
+  active = {'q': q, **{key: value for key, value in filters.items() if value}}
+  if page_size != JOB_LIST_PAGE_SIZE:
+    active['per_page'] = page_size
+  return render(request, 'pages/job_search.html', {
+    'segment': 'job_search',
+    'jobs': page,
+    'q': q,
+    'filters': filters,
+    'sites': JOB_SITES,
+    'skills': sorted(skill_categories()),
+    'is_first_page': page_number == 1,
+    'first_page_query': urlencode(active),
+    'next_page_query': urlencode({**active, 'page': page_number + 1}) if has_next else None,
+  })
 
 def notification(request):
   return render(request, 'pages/notifications.html', { 'segment': 'notification' })
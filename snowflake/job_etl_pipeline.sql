@@ -96,6 +96,7 @@ CREATE OR REPLACE TABLE JOBS_STAGE (
 	COMPANY_REVIEWS_COUNT NUMBER(38,0),
 	VACANCY_COUNT NUMBER(38,0),
 	WORK_FROM_HOME_TYPE VARCHAR(16777216),
+	CONTENT_HASH VARCHAR(64),
 	LOAD_TIMESTAMP TIMESTAMP_NTZ(9),
 	STAGE_TIMESTAMP TIMESTAMP_NTZ(9),
 	BATCH_ID VARCHAR(16777216)
@@ -139,6 +140,7 @@ CREATE OR REPLACE TABLE JOBS (
     COMPANY_REVIEWS_COUNT NUMBER,
     VACANCY_COUNT NUMBER,
     WORK_FROM_HOME_TYPE STRING,
+    CONTENT_HASH STRING,  -- SHA-256 of the posting content; see Step 4
     CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP(),
     UPDATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP(),
     BATCH_ID STRING
@@ -257,6 +259,9 @@ BEGIN
         rows_loaded := SQLROWCOUNT;
 
         -- Step 4: Insert into jobs_stage (transform and deduplicate)
+        -- CONTENT_HASH covers the posting content plus the company rating and logo
+        -- (the other company metadata drifts constantly). A posting is staged when
+        -- its URL is new or its content changed since it was last staged.
         INSERT INTO jobs_stage (
             SITE, JOB_URL, JOB_URL_DIRECT, TITLE, COMPANY, LOCATION, DATE_POSTED,
             JOB_TYPE, SALARY_SOURCE, INTERVAL, MIN_AMOUNT, MAX_AMOUNT, CURRENCY,
@@ -264,9 +269,28 @@ BEGIN
             COMPANY_INDUSTRY, COMPANY_URL, COMPANY_LOGO, COMPANY_URL_DIRECT,
             COMPANY_ADDRESSES, COMPANY_NUM_EMPLOYEES, COMPANY_REVENUE,
             COMPANY_DESCRIPTION, SKILLS, EXPERIENCE_RANGE, COMPANY_RATING,
-            COMPANY_REVIEWS_COUNT, VACANCY_COUNT, WORK_FROM_HOME_TYPE,
+            COMPANY_REVIEWS_COUNT, VACANCY_COUNT, WORK_FROM_HOME_TYPE, CONTENT_HASH,
             LOAD_TIMESTAMP, STAGE_TIMESTAMP, BATCH_ID
         )
+        WITH hashed_load AS (
+            SELECT
+                l.*,
+                SHA2(CONCAT_WS(CHR(31),
+                    COALESCE(TRIM(l.TITLE), ''), COALESCE(TRIM(l.COMPANY), ''),
+                    COALESCE(TRIM(l.LOCATION), ''), COALESCE(TRIM(l.DATE_POSTED), ''),
+                    COALESCE(TRIM(l.JOB_TYPE), ''), COALESCE(TRIM(l.SALARY_SOURCE), ''),
+                    COALESCE(TRIM(l.INTERVAL), ''), COALESCE(TRIM(l.MIN_AMOUNT), ''),
+                    COALESCE(TRIM(l.MAX_AMOUNT), ''), COALESCE(TRIM(l.CURRENCY), ''),
+                    COALESCE(TRIM(l.IS_REMOTE), ''), COALESCE(TRIM(l.JOB_LEVEL), ''),
+                    COALESCE(TRIM(l.JOB_FUNCTION), ''), COALESCE(TRIM(l.EMAILS), ''),
+                    COALESCE(TRIM(l.DESCRIPTION), ''), COALESCE(TRIM(l.SKILLS), ''),
+                    COALESCE(TRIM(l.EXPERIENCE_RANGE), ''), COALESCE(TRIM(l.VACANCY_COUNT), ''),
+                    COALESCE(TRIM(l.WORK_FROM_HOME_TYPE), ''), COALESCE(TRIM(l.COMPANY_RATING), ''),
+                    COALESCE(TRIM(l.COMPANY_LOGO), '')
+                ), 256) AS CONTENT_HASH
+            FROM jobs_load l
+            WHERE l.BATCH_ID = :batch_id
+        )
         SELECT
             NULLIF(TRIM(l.SITE), ''),
             NULLIF(TRIM(l.JOB_URL), ''),
@@ -301,13 +325,13 @@ BEGIN
             TRY_TO_NUMBER(l.COMPANY_REVIEWS_COUNT),
             TRY_TO_NUMBER(l.VACANCY_COUNT),
             NULLIF(l.WORK_FROM_HOME_TYPE, ''),
+            l.CONTENT_HASH,
             l.LOAD_TIMESTAMP,
             CURRENT_TIMESTAMP(),
             l.BATCH_ID
-        FROM jobs_load l
-        LEFT JOIN jobs_stage s ON l.JOB_URL = s.JOB_URL
-        WHERE s.JOB_URL IS NULL
-        AND l.BATCH_ID = :batch_id;
+        FROM hashed_load l
+        LEFT JOIN jobs_stage s ON l.JOB_URL = s.JOB_URL AND l.CONTENT_HASH = s.CONTENT_HASH
+        WHERE s.JOB_URL IS NULL;
 
         rows_staged := SQLROWCOUNT;
 
@@ -319,7 +343,7 @@ BEGIN
             COMPANY_INDUSTRY, COMPANY_URL, COMPANY_LOGO, COMPANY_URL_DIRECT,
             COMPANY_ADDRESSES, COMPANY_NUM_EMPLOYEES, COMPANY_REVENUE,
             COMPANY_DESCRIPTION, SKILLS, EXPERIENCE_RANGE, COMPANY_RATING,
-            COMPANY_REVIEWS_COUNT, VACANCY_COUNT, WORK_FROM_HOME_TYPE,
+            COMPANY_REVIEWS_COUNT, VACANCY_COUNT, WORK_FROM_HOME_TYPE, CONTENT_HASH,
             CREATED_AT, UPDATED_AT, BATCH_ID
         )
         SELECT
@@ -330,7 +354,7 @@ BEGIN
             s.COMPANY_LOGO, s.COMPANY_URL_DIRECT, s.COMPANY_ADDRESSES,
             s.COMPANY_NUM_EMPLOYEES, s.COMPANY_REVENUE, s.COMPANY_DESCRIPTION, s.SKILLS,
             s.EXPERIENCE_RANGE, s.COMPANY_RATING, s.COMPANY_REVIEWS_COUNT,
-            s.VACANCY_COUNT, s.WORK_FROM_HOME_TYPE,
+            s.VACANCY_COUNT, s.WORK_FROM_HOME_TYPE, s.CONTENT_HASH,
             s.STAGE_TIMESTAMP, s.STAGE_TIMESTAMP, s.BATCH_ID
         FROM jobs_stage s
         LEFT JOIN JOBS j ON s.JOB_URL = j.JOB_URL
@@ -339,13 +363,15 @@ BEGIN
 
         rows_inserted := SQLROWCOUNT;
 
-        -- Step 6: Update existing jobs if any changes
+        -- Step 6: Update existing jobs whose content changed. Rows with the same
+        -- CONTENT_HASH (including the ones Step 5 just inserted) are not rewritten.
         MERGE INTO JOBS j
         USING (
             SELECT * FROM jobs_stage WHERE BATCH_ID = :batch_id
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY JOB_URL ORDER BY STAGE_ID DESC) = 1
         ) s
         ON j.JOB_URL = s.JOB_URL
-        WHEN MATCHED THEN UPDATE SET
+        WHEN MATCHED AND j.CONTENT_HASH IS DISTINCT FROM s.CONTENT_HASH THEN UPDATE SET
             j.TITLE = s.TITLE,
             j.COMPANY = s.COMPANY,
             j.LOCATION = s.LOCATION,
@@ -361,11 +387,13 @@ BEGIN
             j.JOB_FUNCTION = s.JOB_FUNCTION,
             j.DESCRIPTION = s.DESCRIPTION,
             j.COMPANY_RATING = s.COMPANY_RATING,
+            j.COMPANY_LOGO = s.COMPANY_LOGO,
             j.VACANCY_COUNT = s.VACANCY_COUNT,
+            j.CONTENT_HASH = s.CONTENT_HASH,
             j.UPDATED_AT = CURRENT_TIMESTAMP(),
             j.BATCH_ID = s.BATCH_ID;
 
-        rows_updated := SQLROWCOUNT - rows_inserted;
+        rows_updated := SQLROWCOUNT;
 
         -- Clean up temp table
         DROP TABLE IF EXISTS temp_jobs_load;